@@ -0,0 +1,62 @@
+"""Per-image overhead of adding artifacts one at a time versus in bulk.
+
+Stores a batch of small PNGs, the shape of a ComfyUI run, through
+Entry.add_artifact in a loop and through Entry.add_artifacts, in fresh
+workspaces, and prints the time per image of each.
+
+    python benchmarks/bulk_artifacts.py --images 64 --rounds 5
+"""
+
+import argparse
+import io
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from codex.core.workspace import Workspace
+
+
+def make_images(count: int, size: int) -> list[bytes]:
+    images = []
+    for i in range(count):
+        buf = io.BytesIO()
+        Image.new("RGB", (size, size), (i % 256, 255 - i % 256, 64)).save(buf, "PNG")
+        images.append(buf.getvalue())
+    return images
+
+
+def run_once(images: list[bytes], bulk: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        ws = Workspace.initialize(Path(tmp), "Benchmark", thumbnail_workers=0)
+        try:
+            entry = ws.create_notebook("NB").create_page("Page").create_entry("custom", "E", {})
+            start = time.perf_counter()
+            if bulk:
+                entry.add_artifacts([{"type": "image/png", "data": data} for data in images])
+            else:
+                for data in images:
+                    entry.add_artifact("image/png", data)
+            return time.perf_counter() - start
+        finally:
+            ws.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=64, help="Images per batch")
+    parser.add_argument("--size", type=int, default=256, help="Image width and height")
+    parser.add_argument("--rounds", type=int, default=5, help="Batches per mode")
+    args = parser.parse_args()
+
+    images = make_images(args.images, args.size)
+    for label, bulk in (("add_artifact loop", False), ("add_artifacts", True)):
+        timings = [run_once(images, bulk) for _ in range(args.rounds)]
+        per_image = statistics.median(timings) / args.images * 1000
+        print(f"{label:>18}: {per_image:7.3f} ms/image (median of {args.rounds})")
+
+
+if __name__ == "__main__":
+    main()
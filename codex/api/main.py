@@ -3,9 +3,10 @@
 import logging
 import os
 from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 
 from codex.api.routes.artifacts import router as artifacts_router
 from codex.api.routes.entries import router as entries_router
@@ -17,8 +18,15 @@ from codex.api.routes.pages import router as pages_router
 from codex.api.routes.search import router as search_router
 from codex.api.routes.sql import router as sql_router
 from codex.api.routes.workspace import router as workspace_router
-from codex.api.utils import DEFAULT_WORKSPACE_PATH
-from codex.core.workspace import Workspace
+from codex.api.utils import (
+    ARCHIVE_INTERVAL,
+    DEFAULT_WORKSPACE_PATH,
+    GC_INTERVAL,
+    WORKSPACE_OPTIONS,
+    get_workspace_registry,
+)
+from codex.core.maintenance import Archiver, GarbageCollector, PeriodicTask
+from codex.core.workspace import WorkspaceRegistry
 
 DEBUG = os.environ.get("DEBUG", "false") == "true"
 if DEBUG:
@@ -29,13 +37,34 @@ else:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize workspace on startup if needed."""
+    """Initialize workspace on startup if needed and own the workspace registry."""
+    registry = WorkspaceRegistry(**WORKSPACE_OPTIONS)
+    app.state.workspace_registry = registry
+
     workspace_path = Path(DEFAULT_WORKSPACE_PATH)
     try:
-        Workspace.load(workspace_path)
+        ws = registry.get(workspace_path)
     except ValueError:
-        Workspace.initialize(workspace_path, "Default Workspace")
-    yield
+        ws = registry.initialize(workspace_path, "Default Workspace")
+
+    tasks = []
+    if ARCHIVE_INTERVAL:
+        tasks.append(PeriodicTask(ARCHIVE_INTERVAL, Archiver(ws).run, name="archiver"))
+    if GC_INTERVAL:
+        # Released blobs are found from their refcounts; full sweeps of the
+        # store are left to `codex storage gc`
+        gc = partial(GarbageCollector(ws).run, full=False)
+        tasks.append(PeriodicTask(GC_INTERVAL, gc, name="gc"))
+    for task in tasks:
+        task.start()
+
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.stop()
+        # Flushes pending Git commits before disposing of the managers
+        registry.close()
 
 
 app = FastAPI(
@@ -75,3 +104,12 @@ async def root():
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def metrics(registry: WorkspaceRegistry = Depends(get_workspace_registry)):
+    """Runtime metrics for monitoring."""
+    return {
+        "workspace_registry": registry.stats(),
+        "workspaces": {str(ws.path): ws.stats() for ws in registry.loaded()},
+    }
@@ -1,38 +1,41 @@
 """Artifacts API routes."""
 
-import io
 import json
 from typing import Optional
 
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 
-from codex.api.utils import get_workspace_path
+from codex.api.utils import PRESIGNED_REDIRECTS, get_workspace_path, get_workspace_registry
+from codex.core.derivatives import (
+    DEFAULT_DERIVATIVE_QUALITY,
+    DerivativeSpec,
+    negotiate_format,
+)
 from codex.core.entry import Entry as CoreEntry
-from codex.core.workspace import Workspace
+from codex.core.storage import STREAM_CHUNK_SIZE, parse_hash
+from codex.core.thumbnails import DEFAULT_THUMBNAIL_SIZE, THUMBNAIL_SIZES
+from codex.core.workspace import Workspace, WorkspaceRegistry
 from codex.db.models import Artifact, Entry
+from codex.db.serialization import artifact_to_dict, entry_to_dict
 
 router = APIRouter()
 
 
 def _entry_to_core(ws: Workspace, entry: Entry) -> CoreEntry:
     """Convert a db Entry model to a CoreEntry instance."""
-    return CoreEntry.from_dict(ws, {
-        "id": entry.id,
-        "page_id": entry.page_id,
-        "entry_type": entry.entry_type,
-        "title": entry.title,
-        "created_at": entry.created_at.isoformat() if entry.created_at else None,
-        "status": entry.status,
-        "parent_id": entry.parent_id,
-        "inputs": json.loads(entry.inputs) if entry.inputs else {},
-        "outputs": json.loads(entry.outputs) if entry.outputs else {},
-        "execution": json.loads(entry.execution) if entry.execution else {},
-        "metrics": json.loads(entry.metrics) if entry.metrics else {},
-        "metadata": json.loads(entry.metadata_) if entry.metadata_ else {},
-        "tags": [et.tag.name for et in entry.tags] if entry.tags else [],
-    })
+    return CoreEntry.from_dict(ws, entry_to_dict(entry))
 
 
 class ArtifactUploadRequest(BaseModel):
@@ -49,10 +52,11 @@ async def upload_artifact(
     entry_id: str = Query(...),
     file: UploadFile = File(...),
     metadata: Optional[str] = None,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Upload artifact to entry."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
@@ -61,12 +65,15 @@ async def upload_artifact(
 
             core_entry = _entry_to_core(ws, entry)
 
-            data = await file.read()
             artifact_metadata = json.loads(metadata) if metadata else {}
 
-            artifact = core_entry.add_artifact(
+            # The upload is already spooled by the server; copy it into the
+            # blob store in chunks off the event loop instead of reading it
+            # into memory
+            artifact = await run_in_threadpool(
+                core_entry.add_artifact_stream,
                 artifact_type=file.content_type or "application/octet-stream",
-                data=data,
+                stream=file.file,
                 metadata=artifact_metadata,
             )
 
@@ -81,36 +88,138 @@ async def upload_artifact(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{artifact_hash}")
+# Blobs are content-addressed, so a given URL never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against a strong ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _iter_stream(stream):
+    """Yield chunks from a file object, closing it at the end."""
+    with stream:
+        while chunk := stream.read(STREAM_CHUNK_SIZE):
+            yield chunk
+
+
+@router.api_route("/{artifact_hash}", methods=["GET", "HEAD"])
 async def get_artifact(
     artifact_hash: str,
     workspace_path: Optional[str] = Query(None),
     thumbnail: bool = Query(default=False),
+    size: int = Query(default=DEFAULT_THUMBNAIL_SIZE),
+    width: Optional[int] = Query(None),
+    height: Optional[int] = Query(None),
+    image_format: Optional[str] = Query(None, alias="format"),
+    quality: Optional[int] = Query(None),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
-    """Retrieve artifact by hash."""
+    """Retrieve artifact by hash.
+
+    The blob is streamed from disk. Range requests are supported for
+    seeking, except on archived blobs, which are decompressed on the fly,
+    and small blobs read from pack files. With a remote blob backend that
+    can presign URLs, clients are redirected to download from it directly;
+    otherwise the blob is fetched into the local cache first.
+    The content hash is a strong ETag, and responses are cacheable
+    forever. Thumbnails (``size`` is the longest edge) are rendered on first
+    request if they don't exist yet.
+
+    Images can also be requested resized to ``width`` and/or ``height`` and
+    re-encoded in ``format`` at ``quality``. Without a format, or with
+    ``format=auto``, AVIF or WebP is served to clients whose Accept header
+    allows it and JPEG to the rest. Derivatives are cached on disk.
+    """
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        digest = parse_hash(artifact_hash)
+        ws = registry.get(get_workspace_path(workspace_path))
+        storage = ws.storage_manager
 
         if thumbnail:
-            data = ws.storage_manager.get_thumbnail(artifact_hash)
-            if not data:
-                raise HTTPException(status_code=404, detail="Thumbnail not found")
-            media_type = "image/jpeg"
-        else:
-            data = ws.storage_manager.retrieve(artifact_hash)
-            if not data:
+            if size not in THUMBNAIL_SIZES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid thumbnail size: {size} (choose from {list(THUMBNAIL_SIZES)})",
+                )
+            # e.g. "<digest>.thumb" or "<digest>.thumb-512"
+            etag = f'"{storage.get_thumbnail_path(digest, size).stem}"'
+            headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+            # Served from memory once hot; misses read the file
+            data = await run_in_threadpool(storage.get_thumbnail, digest, size)
+            if data is None:
+                if await run_in_threadpool(storage.ensure_thumbnail, digest, size) is None:
+                    raise HTTPException(status_code=404, detail="Thumbnail not found")
+                data = await run_in_threadpool(storage.get_thumbnail, digest, size)
+            return Response(content=data, media_type="image/jpeg", headers=headers)
+
+        if any(v is not None for v in (width, height, image_format, quality)):
+            negotiated = image_format in (None, "auto")
+            try:
+                spec = DerivativeSpec(
+                    width=width,
+                    height=height,
+                    format=negotiate_format(accept) if negotiated else image_format,
+                    quality=DEFAULT_DERIVATIVE_QUALITY if quality is None else quality,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            etag = f'"{digest}.{spec.key}"'
+            headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+            if negotiated:
+                headers["Vary"] = "Accept"
+            if _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+            path = await run_in_threadpool(storage.ensure_derivative, digest, spec)
+            if path is None:
+                raise HTTPException(status_code=404, detail="Image not found")
+            return FileResponse(path, media_type=spec.media_type, headers=headers)
+
+        etag = f'"{digest}"'
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        # The ETag is the content hash, so revalidating needs neither the
+        # database nor the blob's bytes, only that it still exists
+        if _etag_matches(if_none_match, etag):
+            if not await run_in_threadpool(storage.exists, digest):
                 raise HTTPException(status_code=404, detail="Artifact not found")
+            return Response(status_code=304, headers=headers)
 
-            session = ws.db_manager.get_session()
-            try:
-                artifact = Artifact.find_one_by(session, hash=artifact_hash)
-                media_type = artifact.type if artifact else "application/octet-stream"
-            finally:
-                session.close()
+        session = ws.db_manager.get_session()
+        try:
+            artifact = Artifact.find_one_by(session, hash=f"sha256:{digest}")
+            media_type = artifact.type if artifact else "application/octet-stream"
+        finally:
+            session.close()
+
+        url = (
+            await run_in_threadpool(storage.presigned_url, digest, media_type)
+            if PRESIGNED_REDIRECTS
+            else None
+        )
+        path = storage.get_blob_path(digest)
+        if url is None and not await run_in_threadpool(storage.fetch, digest):
+            if not await run_in_threadpool(storage.exists, digest):
+                raise HTTPException(status_code=404, detail="Artifact not found")
+
+        if url is not None:
+            return RedirectResponse(url, status_code=307, headers={"ETag": etag})
+
+        if path.is_file():
+            return FileResponse(path, media_type=media_type, headers=headers)
 
+        stream = storage.open_blob(digest)
+        if stream is None:
+            raise HTTPException(status_code=404, detail="Artifact not found")
         return StreamingResponse(
-            io.BytesIO(data),
-            media_type=media_type,
+            _iter_stream(stream), media_type=media_type, headers=headers
         )
     except HTTPException:
         raise
@@ -124,30 +233,18 @@ async def get_artifact(
 async def get_artifact_info(
     artifact_hash: str,
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Get artifact metadata."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             artifact = Artifact.find_one_by(session, hash=artifact_hash)
             if not artifact:
                 raise HTTPException(status_code=404, detail="Artifact not found")
 
-            return {
-                "id": artifact.id,
-                "entry_id": artifact.entry_id,
-                "type": artifact.type,
-                "hash": artifact.hash,
-                "size_bytes": artifact.size_bytes,
-                "path": artifact.path,
-                "thumbnail_path": artifact.thumbnail_path,
-                "created_at": artifact.created_at.isoformat() if artifact.created_at else None,
-                "archived": artifact.archived,
-                "archive_strategy": artifact.archive_strategy,
-                "original_size_bytes": artifact.original_size_bytes,
-                "metadata": json.loads(artifact.metadata_) if artifact.metadata_ else {},
-            }
+            return artifact_to_dict(artifact)
         finally:
             session.close()
     except HTTPException:
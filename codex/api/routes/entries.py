@@ -1,52 +1,35 @@
 """Entries API routes."""
 
-import json
-from typing import Optional
+import math
+from datetime import datetime
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
-from codex.api.utils import get_workspace_path
+from codex.api.utils import get_workspace_path, get_workspace_registry
 from codex.core.entry import Entry as CoreEntry
 from codex.core.page import Page as CorePage
-from codex.core.workspace import Workspace
+from codex.core.workspace import Workspace, WorkspaceRegistry
 from codex.db.models import Artifact, Entry, Page
+from codex.db.operations import BULK_CHUNK_SIZE, MAX_LINEAGE_DEPTH
+from codex.db.serialization import artifact_to_dict, entry_to_dict, page_to_dict
 
 router = APIRouter()
 
+# Largest series returned per key when downsampling
+MAX_METRIC_POINTS = 10000
+
 
 def _entry_to_core(ws: Workspace, entry: Entry) -> CoreEntry:
     """Convert a db Entry model to a CoreEntry instance."""
-    return CoreEntry.from_dict(ws, {
-        "id": entry.id,
-        "page_id": entry.page_id,
-        "entry_type": entry.entry_type,
-        "title": entry.title,
-        "created_at": entry.created_at.isoformat() if entry.created_at else None,
-        "status": entry.status,
-        "parent_id": entry.parent_id,
-        "inputs": json.loads(entry.inputs) if entry.inputs else {},
-        "outputs": json.loads(entry.outputs) if entry.outputs else {},
-        "execution": json.loads(entry.execution) if entry.execution else {},
-        "metrics": json.loads(entry.metrics) if entry.metrics else {},
-        "metadata": json.loads(entry.metadata_) if entry.metadata_ else {},
-        "tags": [et.tag.name for et in entry.tags] if entry.tags else [],
-    })
+    return CoreEntry.from_dict(ws, entry_to_dict(entry))
 
 
 def _page_to_core(ws: Workspace, page: Page) -> CorePage:
     """Convert a db Page model to a CorePage instance."""
-    return CorePage.from_dict(ws, {
-        "id": page.id,
-        "notebook_id": page.notebook_id,
-        "title": page.title,
-        "date": page.date.isoformat() if page.date else None,
-        "created_at": page.created_at.isoformat() if page.created_at else None,
-        "updated_at": page.updated_at.isoformat() if page.updated_at else None,
-        "narrative": json.loads(page.narrative) if page.narrative else {},
-        "tags": [pt.tag.name for pt in page.tags] if page.tags else [],
-        "metadata": json.loads(page.metadata_) if page.metadata_ else {},
-    })
+    return CorePage.from_dict(ws, page_to_dict(page))
 
 
 class EntryCreateRequest(BaseModel):
@@ -62,6 +45,48 @@ class EntryCreateRequest(BaseModel):
     execute_immediately: bool = False
 
 
+class EntryImportRecord(BaseModel):
+    """One entry of a bulk import; fields left out get create() defaults."""
+
+    id: Optional[str] = None
+    page_id: str
+    entry_type: str
+    title: str
+    created_at: Optional[datetime] = None
+    status: Optional[str] = None
+    parent_id: Optional[str] = None
+    inputs: dict = {}
+    outputs: dict = {}
+    execution: dict = {}
+    metrics: dict = {}
+    metadata: Optional[dict] = None
+    tags: list[str] = []
+
+
+class EntryBulkRequest(BaseModel):
+    """Request model for importing many entries."""
+
+    workspace_path: Optional[str] = None
+    entries: list[EntryImportRecord]
+    chunk_size: int = Field(default=BULK_CHUNK_SIZE, ge=1)
+
+
+class MetricPointRecord(BaseModel):
+    """One value of a metric series."""
+
+    key: str = Field(min_length=1)
+    step: int = Field(ge=0)
+    value: float
+    timestamp: Optional[datetime] = None
+
+
+class MetricBatchRequest(BaseModel):
+    """Request model for appending metric values."""
+
+    workspace_path: Optional[str] = None
+    points: list[MetricPointRecord]
+
+
 class EntryResponse(BaseModel):
     """Response model for entry."""
 
@@ -81,10 +106,13 @@ class EntryResponse(BaseModel):
 
 
 @router.post("", response_model=EntryResponse)
-async def create_entry(request: EntryCreateRequest):
+async def create_entry(
+    request: EntryCreateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Create a new entry."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         session = ws.db_manager.get_session()
         try:
             page = Page.get_by_id(session, request.page_id)
@@ -128,32 +156,44 @@ async def create_entry(request: EntryCreateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/bulk")
+async def import_entries(
+    request: EntryBulkRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
+    """Import many entries, validated and inserted in chunked transactions.
+
+    Returns the number of entries imported and the rows per second.
+    """
+    try:
+        ws = registry.get(get_workspace_path(request.workspace_path))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        records = [record.model_dump(exclude_none=True) for record in request.entries]
+        return await run_in_threadpool(CoreEntry.bulk_create, ws, records, request.chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{entry_id}", response_model=EntryResponse)
-async def get_entry(entry_id: str, workspace_path: Optional[str] = Query(None)):
+async def get_entry(
+    entry_id: str,
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Get entry details."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
             if not entry:
                 raise HTTPException(status_code=404, detail="Entry not found")
 
-            return EntryResponse(
-                id=entry.id,
-                page_id=entry.page_id,
-                entry_type=entry.entry_type,
-                title=entry.title,
-                created_at=entry.created_at.isoformat() if entry.created_at else None,
-                status=entry.status,
-                parent_id=entry.parent_id,
-                inputs=json.loads(entry.inputs) if entry.inputs else {},
-                outputs=json.loads(entry.outputs) if entry.outputs else {},
-                execution=json.loads(entry.execution) if entry.execution else {},
-                metrics=json.loads(entry.metrics) if entry.metrics else {},
-                metadata=json.loads(entry.metadata_) if entry.metadata_ else {},
-                tags=[et.tag.name for et in entry.tags] if entry.tags else [],
-            )
+            return EntryResponse(**entry_to_dict(entry))
         finally:
             session.close()
     except HTTPException:
@@ -171,10 +211,14 @@ class EntryExecuteRequest(BaseModel):
 
 
 @router.post("/{entry_id}/execute", response_model=EntryResponse)
-async def execute_entry(entry_id: str, request: EntryExecuteRequest):
+async def execute_entry(
+    entry_id: str,
+    request: EntryExecuteRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Execute an entry."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
@@ -219,10 +263,14 @@ class VariationCreateRequest(BaseModel):
 
 
 @router.post("/{entry_id}/variations", response_model=EntryResponse)
-async def create_variation(entry_id: str, request: VariationCreateRequest):
+async def create_variation(
+    entry_id: str,
+    request: VariationCreateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Create a variation of an entry."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
@@ -265,11 +313,12 @@ async def create_variation(entry_id: str, request: VariationCreateRequest):
 async def get_entry_lineage(
     entry_id: str,
     workspace_path: Optional[str] = Query(None),
-    depth: int = Query(default=3, ge=1, le=10),
+    depth: int = Query(default=3, ge=1, le=MAX_LINEAGE_DEPTH),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
-    """Get entry lineage graph."""
+    """Get entry lineage graph: ancestors and descendants with their edges."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
@@ -291,10 +340,14 @@ async def get_entry_lineage(
 
 
 @router.delete("/{entry_id}")
-async def delete_entry(entry_id: str, workspace_path: Optional[str] = Query(None)):
+async def delete_entry(
+    entry_id: str,
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Delete an entry."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
@@ -317,11 +370,12 @@ async def delete_entry(entry_id: str, workspace_path: Optional[str] = Query(None
 
 @router.get("/{entry_id}/artifacts")
 async def list_entry_artifacts(
-    entry_id: str, workspace_path: Optional[str] = Query(None)
+    entry_id: str, workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """List artifacts for an entry."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             entry = Entry.get_by_id(session, entry_id)
@@ -329,25 +383,86 @@ async def list_entry_artifacts(
                 raise HTTPException(status_code=404, detail="Entry not found")
 
             artifacts = Artifact.find_by(session, entry_id=entry_id)
-            return [
-                {
-                    "id": a.id,
-                    "entry_id": a.entry_id,
-                    "type": a.type,
-                    "hash": a.hash,
-                    "size_bytes": a.size_bytes,
-                    "path": a.path,
-                    "thumbnail_path": a.thumbnail_path,
-                    "created_at": a.created_at.isoformat() if a.created_at else None,
-                    "archived": a.archived,
-                    "archive_strategy": a.archive_strategy,
-                    "original_size_bytes": a.original_size_bytes,
-                    "metadata": json.loads(a.metadata_) if a.metadata_ else {},
-                }
-                for a in artifacts
-            ]
+            return [artifact_to_dict(a) for a in artifacts]
+        finally:
+            session.close()
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{entry_id}/metrics")
+async def log_entry_metrics(
+    entry_id: str,
+    request: MetricBatchRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
+    """Append a batch of values to the entry's metric series.
+
+    Returns the number of points appended and the updated summary
+    (count, min, max, mean, last and step) of every series.
+    """
+    try:
+        ws = registry.get(get_workspace_path(request.workspace_path))
+        session = ws.db_manager.get_session()
+        try:
+            entry = Entry.get_by_id(session, entry_id)
+            if not entry:
+                raise HTTPException(status_code=404, detail="Entry not found")
+            core_entry = _entry_to_core(ws, entry)
         finally:
             session.close()
+
+        # Checked here rather than by the model: a 422 would echo NaN back,
+        # which can't be encoded as JSON
+        if not all(math.isfinite(point.value) for point in request.points):
+            raise HTTPException(status_code=400, detail="Metric values must be finite")
+        points = [point.model_dump(exclude_none=True) for point in request.points]
+        series = await run_in_threadpool(core_entry.log_metrics, points)
+        return {"appended": len(points), "series": series}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{entry_id}/metrics")
+async def get_entry_metrics(
+    entry_id: str,
+    workspace_path: Optional[str] = Query(None),
+    key: Optional[list[str]] = Query(None),
+    step_from: Optional[int] = Query(None, ge=0),
+    step_to: Optional[int] = Query(None, ge=0),
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_METRIC_POINTS),
+    method: Literal["lttb", "minmax"] = "lttb",
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
+    """Get the entry's metric series as step/value/timestamp columns.
+
+    With max_points, each series is downsampled on the server: "lttb"
+    keeps the shape of the curve, "minmax" the extremes of each bucket.
+    Each series also reports its total point count.
+    """
+    try:
+        ws = registry.get(get_workspace_path(workspace_path))
+        session = ws.db_manager.get_session()
+        try:
+            entry = Entry.get_by_id(session, entry_id)
+            if not entry:
+                raise HTTPException(status_code=404, detail="Entry not found")
+            core_entry = _entry_to_core(ws, entry)
+        finally:
+            session.close()
+
+        series = await run_in_threadpool(
+            core_entry.get_metric_series, key, step_from, step_to, max_points, method
+        )
+        return {"series": series}
     except HTTPException:
         raise
     except ValueError as e:
@@ -7,21 +7,16 @@ database connection strings.
 
 from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-from codex.api.utils import get_workspace_path
-from codex.core.workspace import Workspace
+from codex.api.utils import get_workspace_path, get_workspace_registry
+from codex.core.workspace import WorkspaceRegistry
 from codex.integrations import IntegrationRegistry
 
 router = APIRouter()
 
 
-def get_workspace(workspace_path: Optional[str] = None) -> Workspace:
-    """Get a workspace instance."""
-    return Workspace.load(get_workspace_path(workspace_path))
-
-
 class IntegrationVariableCreate(BaseModel):
     """Request body for creating/updating an integration variable."""
 
@@ -59,6 +54,7 @@ class IntegrationVariableResponse(BaseModel):
 async def list_integration_variables(
     integration_type: Optional[str] = None,
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ) -> list[IntegrationVariableResponse]:
     """List all integration variables.
 
@@ -66,7 +62,7 @@ async def list_integration_variables(
         integration_type: Optional filter by integration type
         workspace_path: Optional workspace path
     """
-    ws = get_workspace(workspace_path)
+    ws = registry.get(get_workspace_path(workspace_path))
     variables = ws.db_manager.list_integration_variables(integration_type)
     return variables
 
@@ -80,6 +76,7 @@ async def list_integration_types() -> list[str]:
 @router.post("", status_code=201)
 async def create_integration_variable(
     body: IntegrationVariableCreate,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ) -> IntegrationVariableResponse:
     """Create or update an integration variable.
 
@@ -125,7 +122,7 @@ async def create_integration_variable(
             f"Available types: {IntegrationRegistry.list_integrations()}",
         )
 
-    ws = get_workspace(body.workspace_path)
+    ws = registry.get(get_workspace_path(body.workspace_path))
     variable = ws.db_manager.set_integration_variable(
         integration_type=body.integration_type,
         name=body.name,
@@ -141,9 +138,10 @@ async def get_integration_variable(
     integration_type: str,
     name: str,
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ) -> IntegrationVariableResponse:
     """Get a specific integration variable."""
-    ws = get_workspace(workspace_path)
+    ws = registry.get(get_workspace_path(workspace_path))
     variable = ws.db_manager.get_integration_variable(integration_type, name)
     if not variable:
         raise HTTPException(
@@ -158,9 +156,10 @@ async def update_integration_variable(
     integration_type: str,
     name: str,
     body: IntegrationVariableUpdate,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ) -> IntegrationVariableResponse:
     """Update an existing integration variable."""
-    ws = get_workspace(body.workspace_path)
+    ws = registry.get(get_workspace_path(body.workspace_path))
 
     # Check if variable exists
     existing = ws.db_manager.get_integration_variable(integration_type, name)
@@ -194,9 +193,10 @@ async def delete_integration_variable(
     integration_type: str,
     name: str,
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Delete an integration variable."""
-    ws = get_workspace(workspace_path)
+    ws = registry.get(get_workspace_path(workspace_path))
     success = ws.db_manager.delete_integration_variable(integration_type, name)
     if not success:
         raise HTTPException(
@@ -209,11 +209,12 @@ async def delete_integration_variable(
 async def get_integration_variables_for_type(
     integration_type: str,
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ) -> dict[str, Any]:
     """Get all variables for a specific integration type as a dictionary.
 
     Returns a dictionary mapping variable names to their values,
     suitable for understanding what defaults are configured.
     """
-    ws = get_workspace(workspace_path)
+    ws = registry.get(get_workspace_path(workspace_path))
     return ws.db_manager.get_integration_variables(integration_type)
@@ -2,11 +2,11 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 
-from codex.api.utils import get_workspace_path
-from codex.core.workspace import Workspace
+from codex.api.utils import Pagination, get_workspace_path, get_workspace_registry
+from codex.core.workspace import WorkspaceRegistry
 
 router = APIRouter()
 
@@ -34,10 +34,13 @@ class NotebookResponse(BaseModel):
 
 
 @router.post("", response_model=NotebookResponse)
-async def create_notebook(request: NotebookCreateRequest):
+async def create_notebook(
+    request: NotebookCreateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Create a new notebook."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         notebook = ws.create_notebook(
             title=request.title,
             description=request.description,
@@ -60,11 +63,21 @@ async def create_notebook(request: NotebookCreateRequest):
 
 
 @router.get("")
-async def list_notebooks(workspace_path: Optional[str] = Query(None)):
-    """List all notebooks in workspace."""
+async def list_notebooks(
+    response: Response,
+    workspace_path: Optional[str] = Query(None),
+    pagination: Pagination = Depends(),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
+    """List notebooks in workspace, newest first.
+
+    With a limit, the cursor for the next page is returned in the
+    X-Next-Cursor header.
+    """
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
-        notebooks = ws.list_notebooks()
+        ws = registry.get(get_workspace_path(workspace_path))
+        notebooks = ws.list_notebooks(pagination.limit, pagination.cursor)
+        pagination.set_next_cursor(response, notebooks)
         return [
             {
                 "id": nb.id,
@@ -83,10 +96,14 @@ async def list_notebooks(workspace_path: Optional[str] = Query(None)):
 
 
 @router.get("/{notebook_id}", response_model=NotebookResponse)
-async def get_notebook(notebook_id: str, workspace_path: Optional[str] = Query(None)):
+async def get_notebook(
+    notebook_id: str,
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Get notebook details."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         notebook = ws.get_notebook(notebook_id)
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
@@ -120,10 +137,14 @@ class NotebookUpdateRequest(BaseModel):
 
 
 @router.patch("/{notebook_id}", response_model=NotebookResponse)
-async def update_notebook(notebook_id: str, request: NotebookUpdateRequest):
+async def update_notebook(
+    notebook_id: str,
+    request: NotebookUpdateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Update a notebook."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         notebook = ws.get_notebook(notebook_id)
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
@@ -162,11 +183,12 @@ async def update_notebook(notebook_id: str, request: NotebookUpdateRequest):
 
 @router.delete("/{notebook_id}")
 async def delete_notebook(
-    notebook_id: str, workspace_path: Optional[str] = Query(None)
+    notebook_id: str, workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Delete a notebook."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         notebook = ws.get_notebook(notebook_id)
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
@@ -183,16 +205,21 @@ async def delete_notebook(
 
 @router.get("/{notebook_id}/pages")
 async def list_notebook_pages(
-    notebook_id: str, workspace_path: Optional[str] = Query(None)
+    notebook_id: str,
+    response: Response,
+    workspace_path: Optional[str] = Query(None),
+    pagination: Pagination = Depends(),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
-    """List pages in a notebook."""
+    """List pages in a notebook, newest first (paginated like list_notebooks)."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         notebook = ws.get_notebook(notebook_id)
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
 
-        pages = notebook.list_pages()
+        pages = notebook.list_pages(pagination.limit, pagination.cursor)
+        pagination.set_next_cursor(response, pages)
         return [
             {
                 "id": page.id,
@@ -1,33 +1,23 @@
 """Pages API routes."""
 
-import json
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 
-from codex.api.utils import get_workspace_path
+from codex.api.utils import Pagination, get_workspace_path, get_workspace_registry
 from codex.core.page import Page as CorePage
-from codex.core.workspace import Workspace
+from codex.core.workspace import Workspace, WorkspaceRegistry
 from codex.db.models import Page
+from codex.db.serialization import page_to_dict
 
 router = APIRouter()
 
 
 def _page_to_core(ws: Workspace, page: Page) -> CorePage:
     """Convert a db Page model to a CorePage instance."""
-    return CorePage.from_dict(ws, {
-        "id": page.id,
-        "notebook_id": page.notebook_id,
-        "title": page.title,
-        "date": page.date.isoformat() if page.date else None,
-        "created_at": page.created_at.isoformat() if page.created_at else None,
-        "updated_at": page.updated_at.isoformat() if page.updated_at else None,
-        "narrative": json.loads(page.narrative) if page.narrative else {},
-        "tags": [pt.tag.name for pt in page.tags] if page.tags else [],
-        "metadata": json.loads(page.metadata_) if page.metadata_ else {},
-    })
+    return CorePage.from_dict(ws, page_to_dict(page))
 
 
 class PageCreateRequest(BaseModel):
@@ -55,10 +45,13 @@ class PageResponse(BaseModel):
 
 
 @router.post("", response_model=PageResponse)
-async def create_page(request: PageCreateRequest):
+async def create_page(
+    request: PageCreateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Create a new page."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         notebook = ws.get_notebook(request.notebook_id)
         if not notebook:
             raise HTTPException(status_code=404, detail="Notebook not found")
@@ -90,27 +83,21 @@ async def create_page(request: PageCreateRequest):
 
 
 @router.get("/{page_id}", response_model=PageResponse)
-async def get_page(page_id: str, workspace_path: Optional[str] = Query(None)):
+async def get_page(
+    page_id: str,
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Get page details."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             page = Page.get_by_id(session, page_id)
             if not page:
                 raise HTTPException(status_code=404, detail="Page not found")
 
-            return PageResponse(
-                id=page.id,
-                notebook_id=page.notebook_id,
-                title=page.title,
-                date=page.date.isoformat() if page.date else None,
-                created_at=page.created_at.isoformat() if page.created_at else None,
-                updated_at=page.updated_at.isoformat() if page.updated_at else None,
-                narrative=json.loads(page.narrative) if page.narrative else {},
-                tags=[pt.tag.name for pt in page.tags] if page.tags else [],
-                metadata=json.loads(page.metadata_) if page.metadata_ else {},
-            )
+            return PageResponse(**page_to_dict(page))
         finally:
             session.close()
     except HTTPException:
@@ -133,10 +120,14 @@ class PageUpdateRequest(BaseModel):
 
 
 @router.patch("/{page_id}", response_model=PageResponse)
-async def update_page(page_id: str, request: PageUpdateRequest):
+async def update_page(
+    page_id: str,
+    request: PageUpdateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Update a page."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         session = ws.db_manager.get_session()
         try:
             page = Page.get_by_id(session, page_id)
@@ -189,10 +180,14 @@ class NarrativeUpdateRequest(BaseModel):
 
 
 @router.patch("/{page_id}/narrative", response_model=PageResponse)
-async def update_narrative(page_id: str, request: NarrativeUpdateRequest):
+async def update_narrative(
+    page_id: str,
+    request: NarrativeUpdateRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Update page narrative field."""
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
         session = ws.db_manager.get_session()
         try:
             page = Page.get_by_id(session, page_id)
@@ -224,10 +219,14 @@ async def update_narrative(page_id: str, request: NarrativeUpdateRequest):
 
 
 @router.delete("/{page_id}")
-async def delete_page(page_id: str, workspace_path: Optional[str] = Query(None)):
+async def delete_page(
+    page_id: str,
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Delete a page."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             page = Page.get_by_id(session, page_id)
@@ -249,10 +248,20 @@ async def delete_page(page_id: str, workspace_path: Optional[str] = Query(None))
 
 
 @router.get("/{page_id}/entries")
-async def list_page_entries(page_id: str, workspace_path: Optional[str] = Query(None)):
-    """List entries in a page."""
+async def list_page_entries(
+    page_id: str,
+    response: Response,
+    workspace_path: Optional[str] = Query(None),
+    pagination: Pagination = Depends(),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
+    """List entries in a page, newest first.
+
+    With a limit, the cursor for the next page is returned in the
+    X-Next-Cursor header.
+    """
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         session = ws.db_manager.get_session()
         try:
             page = Page.get_by_id(session, page_id)
@@ -260,7 +269,8 @@ async def list_page_entries(page_id: str, workspace_path: Optional[str] = Query(
                 raise HTTPException(status_code=404, detail="Page not found")
 
             core_page = _page_to_core(ws, page)
-            entries = core_page.list_entries()
+            entries = core_page.list_entries(pagination.limit, pagination.cursor)
+            pagination.set_next_cursor(response, entries)
 
             return [
                 {
@@ -3,11 +3,18 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field, field_validator
 
-from codex.api.utils import get_workspace_path
-from codex.core.workspace import Workspace
+from codex.api.utils import (
+    MAX_PAGE_SIZE,
+    Pagination,
+    get_workspace_path,
+    get_workspace_registry,
+)
+from codex.core.workspace import WorkspaceRegistry
+from codex.db.filters import parse_filters
+from codex.db.pagination import decode_cursor, next_cursor
 
 router = APIRouter()
 
@@ -19,22 +26,47 @@ class SearchRequest(BaseModel):
     query: Optional[str] = None
     entry_type: Optional[str] = None
     tags: Optional[list[str]] = None
+    where: Optional[list[str]] = None
     date_from: Optional[str] = None
     date_to: Optional[str] = None
     notebook_id: Optional[str] = None
     page_id: Optional[str] = None
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+    @field_validator("cursor")
+    @classmethod
+    def check_cursor(cls, value: Optional[str]) -> Optional[str]:
+        if value:
+            decode_cursor(value)
+        return value
+
+    @field_validator("where")
+    @classmethod
+    def check_where(cls, value: Optional[list[str]]) -> Optional[list[str]]:
+        if value:
+            parse_filters(value)
+        return value
 
 
 @router.post("")
-async def search(request: SearchRequest):
-    """Search entries."""
+async def search(
+    request: SearchRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
+    """Search entries.
+
+    ``where`` holds JSON value filters, e.g. ``["metrics.loss < 0.05",
+    "inputs.cfg == 7"]``; entries must match all of them.
+    """
     try:
-        ws = Workspace.load(get_workspace_path(request.workspace_path))
+        ws = registry.get(get_workspace_path(request.workspace_path))
 
         results = ws.search_entries(
             query=request.query,
             entry_type=request.entry_type,
             tags=request.tags,
+            where=request.where,
             date_from=(
                 datetime.fromisoformat(request.date_from) if request.date_from else None
             ),
@@ -43,11 +75,14 @@ async def search(request: SearchRequest):
             ),
             notebook_id=request.notebook_id,
             page_id=request.page_id,
+            limit=request.limit,
+            cursor=request.cursor,
         )
 
         return {
             "results": results,
             "count": len(results),
+            "next_cursor": next_cursor(results, request.limit),
         }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -60,27 +95,41 @@ async def search_get(
     workspace_path: Optional[str] = Query(None),
     query: Optional[str] = None,
     entry_type: Optional[str] = None,
+    tags: Optional[list[str]] = Query(None),
+    where: Optional[list[str]] = Query(None),
     notebook_id: Optional[str] = None,
     page_id: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
+    pagination: Pagination = Depends(),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Search entries (GET method)."""
+    if where:
+        try:
+            parse_filters(where)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
 
         results = ws.search_entries(
             query=query,
             entry_type=entry_type,
+            tags=tags,
+            where=where,
             date_from=datetime.fromisoformat(date_from) if date_from else None,
             date_to=datetime.fromisoformat(date_to) if date_to else None,
             notebook_id=notebook_id,
             page_id=page_id,
+            limit=pagination.limit,
+            cursor=pagination.cursor,
         )
 
         return {
             "results": results,
             "count": len(results),
+            "next_cursor": next_cursor(results, pagination.limit),
         }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -3,11 +3,11 @@
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-from codex.api.utils import get_workspace_path
-from codex.core.workspace import Workspace
+from codex.api.utils import get_workspace_path, get_workspace_registry
+from codex.core.workspace import WorkspaceRegistry
 from codex.integrations import IntegrationRegistry
 
 router = APIRouter()
@@ -30,10 +30,13 @@ class WorkspaceResponse(BaseModel):
 
 
 @router.post("/workspace/init", response_model=WorkspaceResponse)
-async def init_workspace(request: WorkspaceInitRequest):
+async def init_workspace(
+    request: WorkspaceInitRequest,
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Initialize a new workspace."""
     try:
-        ws = Workspace.initialize(Path(request.path), request.name)
+        ws = registry.initialize(Path(request.path), request.name)
         config = ws.get_config()
         return WorkspaceResponse(
             path=str(ws.path),
@@ -46,10 +49,13 @@ async def init_workspace(request: WorkspaceInitRequest):
 
 
 @router.get("/workspace")
-async def get_workspace(workspace_path: Optional[str] = Query(None)):
+async def get_workspace(
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """Get workspace info."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         config = ws.get_config()
         return {
             "path": str(ws.path),
@@ -74,10 +80,13 @@ async def list_integrations():
 
 
 @router.get("/files/notebooks")
-async def list_notebooks_files(workspace_path: Optional[str] = Query(None)):
+async def list_notebooks_files(
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """List all files in the notebooks directory."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         files = ws.scan_notebooks_directory()
         return {
             "path": str(ws.notebooks_path),
@@ -90,10 +99,13 @@ async def list_notebooks_files(workspace_path: Optional[str] = Query(None)):
 
 
 @router.get("/files/artifacts")
-async def list_artifacts_files(workspace_path: Optional[str] = Query(None)):
+async def list_artifacts_files(
+    workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+):
     """List all files in the artifacts directory."""
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
         files = ws.scan_artifacts_directory()
         return {
             "path": str(ws.artifacts_path),
@@ -109,6 +121,7 @@ async def list_artifacts_files(workspace_path: Optional[str] = Query(None)):
 async def get_notebook_file_content(
     path: str = Query(..., description="Relative path to the file"),
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Get the content of a file from the notebooks directory."""
     import mimetypes
@@ -116,7 +129,7 @@ async def get_notebook_file_content(
     from fastapi.responses import FileResponse
 
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
 
         # Sanitize path to prevent directory traversal
         safe_path = Path(path).as_posix()
@@ -159,6 +172,7 @@ async def get_notebook_file_content(
 async def get_artifact_file_content(
     path: str = Query(..., description="Relative path to the file"),
     workspace_path: Optional[str] = Query(None),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
 ):
     """Get the content of a file from the artifacts directory."""
     import mimetypes
@@ -166,7 +180,7 @@ async def get_artifact_file_content(
     from fastapi.responses import FileResponse
 
     try:
-        ws = Workspace.load(get_workspace_path(workspace_path))
+        ws = registry.get(get_workspace_path(workspace_path))
 
         # Sanitize path to prevent directory traversal
         safe_path = Path(path).as_posix()
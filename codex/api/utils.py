@@ -4,11 +4,120 @@ import os
 from pathlib import Path
 from typing import Optional
 
+from fastapi import HTTPException, Query, Request, Response
+
+from codex.core.derivatives import DEFAULT_DERIVATIVE_CACHE_SIZE
+from codex.core.storage import DEFAULT_BLOB_MEMORY_CACHE, DEFAULT_THUMBNAIL_MEMORY_CACHE
+from codex.core.workspace import WorkspaceRegistry
+from codex.db.pagination import decode_cursor, next_cursor
+
 DEFAULT_WORKSPACE_PATH = os.environ.get("CODEX_WORKSPACE_PATH", ".")
 
+# Seconds to coalesce Git manifest writes; 0 commits each change synchronously
+GIT_COMMIT_WINDOW = float(os.environ.get("CODEX_GIT_COMMIT_WINDOW", "1.0"))
+
+# Processes rendering image thumbnails; unset picks a default from the CPU count
+THUMBNAIL_WORKERS = (
+    int(os.environ["CODEX_THUMBNAIL_WORKERS"])
+    if os.environ.get("CODEX_THUMBNAIL_WORKERS")
+    else None
+)
+
+# Store large artifacts as content-defined chunks to share data between
+# near-identical files
+CHUNKED_STORAGE = os.environ.get("CODEX_CHUNKED_STORAGE", "false") == "true"
+
+# Remote blob store shared by every API node (see codex.core.backends), and
+# the bytes of it each node caches on disk
+BLOB_BACKEND = os.environ.get("CODEX_BLOB_BACKEND") or None
+BLOB_CACHE_SIZE = (
+    int(os.environ["CODEX_BLOB_CACHE_SIZE"]) if os.environ.get("CODEX_BLOB_CACHE_SIZE") else None
+)
+
+# Bytes of thumbnails and small blobs each workspace keeps in memory
+THUMBNAIL_MEMORY_CACHE = int(
+    os.environ.get("CODEX_THUMBNAIL_MEMORY_CACHE", DEFAULT_THUMBNAIL_MEMORY_CACHE)
+)
+BLOB_MEMORY_CACHE = int(os.environ.get("CODEX_BLOB_MEMORY_CACHE", DEFAULT_BLOB_MEMORY_CACHE))
+
+# Bytes of resized and re-encoded images each workspace keeps on disk
+DERIVATIVE_CACHE_SIZE = int(
+    os.environ.get("CODEX_DERIVATIVE_CACHE_SIZE", DEFAULT_DERIVATIVE_CACHE_SIZE)
+)
+
+# Redirect blob downloads to presigned backend URLs instead of proxying them
+PRESIGNED_REDIRECTS = os.environ.get("CODEX_PRESIGNED_REDIRECTS", "true") == "true"
+
+# Seconds between background archiver and garbage collector runs; unset
+# disables them
+ARCHIVE_INTERVAL = (
+    float(os.environ["CODEX_ARCHIVE_INTERVAL"])
+    if os.environ.get("CODEX_ARCHIVE_INTERVAL")
+    else None
+)
+GC_INTERVAL = (
+    float(os.environ["CODEX_GC_INTERVAL"])
+    if os.environ.get("CODEX_GC_INTERVAL")
+    else None
+)
+
+MAX_PAGE_SIZE = 1000
+
+# Response header carrying the cursor for the next page of a list endpoint
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Options for every workspace the API server loads
+WORKSPACE_OPTIONS = {
+    "git_commit_window": GIT_COMMIT_WINDOW,
+    "thumbnail_workers": THUMBNAIL_WORKERS,
+    "chunked_storage": CHUNKED_STORAGE,
+    "blob_backend": BLOB_BACKEND,
+    "blob_cache_size": BLOB_CACHE_SIZE,
+    "thumbnail_memory_cache": THUMBNAIL_MEMORY_CACHE,
+    "blob_memory_cache": BLOB_MEMORY_CACHE,
+    "derivative_cache_size": DERIVATIVE_CACHE_SIZE,
+}
+
 
 def get_workspace_path(workspace_path: Optional[str] = None) -> Path:
     """Get the workspace path, using default if not specified or if '.' is passed."""
     if not workspace_path or workspace_path == ".":
         return Path(DEFAULT_WORKSPACE_PATH)
     return Path(workspace_path)
+
+
+def get_workspace_registry(request: Request) -> WorkspaceRegistry:
+    """Get the process-wide workspace registry (FastAPI dependency).
+
+    The registry is created by the application lifespan. Apps driven without
+    running the lifespan get one lazily on first request.
+    """
+    registry = getattr(request.app.state, "workspace_registry", None)
+    if registry is None:
+        registry = WorkspaceRegistry(**WORKSPACE_OPTIONS)
+        request.app.state.workspace_registry = registry
+    return registry
+
+
+class Pagination:
+    """Validated limit/cursor query parameters (FastAPI dependency)."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None),
+    ):
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        self.limit = limit
+        self.cursor = cursor
+
+    def set_next_cursor(self, response: Response, items: list) -> Optional[str]:
+        """Advertise the next page's cursor on the response, if there is one."""
+        cursor = next_cursor(items, self.limit)
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
+        return cursor
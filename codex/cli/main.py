@@ -1,12 +1,23 @@
 """Codex CLI."""
 
+import json
 from datetime import datetime
 from pathlib import Path
 
 import click
 
+from codex.core.maintenance import (
+    DEFAULT_GC_GRACE_PERIOD,
+    Archiver,
+    GarbageCollector,
+    Verifier,
+)
+from codex.core.storage import ARCHIVE_CODECS, DEFAULT_ARCHIVE_CODEC
+from codex.core.thumbnails import DEFAULT_THUMBNAIL_SIZE, THUMBNAIL_SIZES
 from codex.core.utils import format_table
 from codex.core.workspace import Workspace
+from codex.db.operations import BULK_CHUNK_SIZE, MAX_LINEAGE_DEPTH
+from codex.db.pagination import next_cursor
 
 
 @click.group()
@@ -30,6 +41,13 @@ def init(path: str, name: str):
         raise click.Abort()
 
 
+def _echo_next_cursor(items: list, limit: int | None):
+    """Print how to fetch the next page of a limited listing."""
+    cursor = next_cursor(items, limit)
+    if cursor:
+        click.echo(f"More results: --cursor {cursor}")
+
+
 @cli.group()
 def notebook():
     """Notebook management commands."""
@@ -55,12 +73,14 @@ def notebook_create(title: str, description: str, tags: tuple, workspace: str):
 
 
 @notebook.command("list")
+@click.option("--limit", "-l", type=int, default=None, help="Maximum results per page")
+@click.option("--cursor", "-c", default=None, help="Cursor from a previous page")
 @click.option("--workspace", "-w", default=".", help="Workspace path")
-def notebook_list(workspace: str):
-    """List all notebooks."""
+def notebook_list(limit: int, cursor: str, workspace: str):
+    """List notebooks, newest first."""
     try:
         ws = Workspace.load(Path(workspace).resolve())
-        notebooks = ws.list_notebooks()
+        notebooks = ws.list_notebooks(limit, cursor)
 
         if not notebooks:
             click.echo("No notebooks found.")
@@ -70,6 +90,7 @@ def notebook_list(workspace: str):
         for nb in notebooks:
             tags_str = ", ".join(nb.tags) if nb.tags else "none"
             click.echo(f"  {nb.id}: {nb.title} [tags: {tags_str}]")
+        _echo_next_cursor(notebooks, limit)
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -120,9 +141,11 @@ def page_create(title: str, notebook: str, date: str, goal: str, workspace: str)
 
 @page.command("list")
 @click.option("--notebook", "-n", required=True, help="Notebook ID or title")
+@click.option("--limit", "-l", type=int, default=None, help="Maximum results per page")
+@click.option("--cursor", "-c", default=None, help="Cursor from a previous page")
 @click.option("--workspace", "-w", default=".", help="Workspace path")
-def page_list(notebook: str, workspace: str):
-    """List all pages in a notebook."""
+def page_list(notebook: str, limit: int, cursor: str, workspace: str):
+    """List pages in a notebook, newest first."""
     try:
         ws = Workspace.load(Path(workspace).resolve())
 
@@ -139,7 +162,7 @@ def page_list(notebook: str, workspace: str):
             click.echo(f"Notebook not found: {notebook}", err=True)
             raise click.Abort()
 
-        pages = nb.list_pages()
+        pages = nb.list_pages(limit, cursor)
 
         if not pages:
             click.echo(f"No pages found in notebook: {nb.title}")
@@ -149,6 +172,7 @@ def page_list(notebook: str, workspace: str):
         for p in pages:
             date_str = p.date.strftime("%Y-%m-%d") if p.date else "undated"
             click.echo(f"  {p.id}: {p.title} ({date_str})")
+        _echo_next_cursor(pages, limit)
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -222,11 +246,66 @@ def entry_create(
         raise click.Abort()
 
 
+@entry.command("import")
+@click.argument("file", type=click.File("r"))
+@click.option("--page", "-p", default=None, help="Page ID for records that have none")
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(1),
+    default=BULK_CHUNK_SIZE,
+    show_default=True,
+    help="Entries per transaction and Git commit",
+)
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def entry_import(file, page: str, chunk_size: int, workspace: str):
+    """Import entries from a JSON Lines file, one entry per line.
+
+    Use - to read from standard input.
+    """
+
+    def records():
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {number}: {e}")
+            if page:
+                record.setdefault("page_id", page)
+            yield record
+
+    def progress(report: dict):
+        click.echo(
+            f"  {report['entries']} entries, {report['rows_per_second']:.0f} rows/s",
+            err=True,
+        )
+
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+
+        from codex.core.entry import Entry
+
+        try:
+            report = Entry.bulk_create(ws, records(), chunk_size, progress)
+        finally:
+            ws.close()
+        click.echo(
+            f"Imported {report['entries']} entries in {report['chunks']} chunk(s), "
+            f"{report['seconds']:.1f}s ({report['rows_per_second']:.0f} rows/s)."
+        )
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 @entry.command("list")
 @click.option("--page", "-p", required=True, help="Page ID")
+@click.option("--limit", "-l", type=int, default=None, help="Maximum results per page")
+@click.option("--cursor", "-c", default=None, help="Cursor from a previous page")
 @click.option("--workspace", "-w", default=".", help="Workspace path")
-def entry_list(page: str, workspace: str):
-    """List all entries in a page."""
+def entry_list(page: str, limit: int, cursor: str, workspace: str):
+    """List entries in a page, newest first."""
     try:
         ws = Workspace.load(Path(workspace).resolve())
 
@@ -238,7 +317,7 @@ def entry_list(page: str, workspace: str):
             raise click.Abort()
 
         p = Page.from_dict(ws, page_data)
-        entries = p.list_entries()
+        entries = p.list_entries(limit, cursor)
 
         if not entries:
             click.echo(f"No entries found in page: {p.title}")
@@ -247,6 +326,7 @@ def entry_list(page: str, workspace: str):
         click.echo(f"Found {len(entries)} entry(ies) in '{p.title}':")
         for e in entries:
             click.echo(f"  {e.id}: {e.title} [{e.entry_type}] - {e.status}")
+        _echo_next_cursor(entries, limit)
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -297,13 +377,38 @@ def entry_variation(entry_id: str, title: str, override: tuple, workspace: str):
 @cli.command()
 @click.option("--query", "-q", default=None, help="Search query")
 @click.option("--type", "-t", "entry_type", default=None, help="Entry type filter")
+@click.option("--tag", "-T", "tags", multiple=True, help="Require tag (repeatable)")
+@click.option(
+    "--where",
+    "-W",
+    "where",
+    multiple=True,
+    help='Require a JSON value, e.g. "metrics.loss < 0.05" (repeatable)',
+)
+@click.option("--limit", "-l", type=int, default=None, help="Maximum results per page")
+@click.option("--cursor", "-c", default=None, help="Cursor from a previous page")
 @click.option("--workspace", "-w", default=".", help="Workspace path")
-def search(query: str, entry_type: str, workspace: str):
+def search(
+    query: str,
+    entry_type: str,
+    tags: tuple,
+    where: tuple,
+    limit: int,
+    cursor: str,
+    workspace: str,
+):
     """Search entries."""
     try:
         ws = Workspace.load(Path(workspace).resolve())
 
-        results = ws.search_entries(query=query, entry_type=entry_type)
+        results = ws.search_entries(
+            query=query,
+            entry_type=entry_type,
+            tags=list(tags) or None,
+            where=list(where) or None,
+            limit=limit,
+            cursor=cursor,
+        )
 
         if not results:
             click.echo("No entries found.")
@@ -312,6 +417,9 @@ def search(query: str, entry_type: str, workspace: str):
         click.echo(f"Found {len(results)} result(s):")
         for r in results:
             click.echo(f"  {r['id']}: {r['title']} [{r['entry_type']}]")
+            if r.get("snippet"):
+                click.echo(f"      {r['snippet']}")
+        _echo_next_cursor(results, limit)
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -319,7 +427,13 @@ def search(query: str, entry_type: str, workspace: str):
 
 @cli.command()
 @click.argument("entry_id")
-@click.option("--depth", "-d", default=3, help="Lineage depth")
+@click.option(
+    "--depth",
+    "-d",
+    default=3,
+    type=click.IntRange(1, MAX_LINEAGE_DEPTH),
+    help="Lineage depth",
+)
 @click.option("--workspace", "-w", default=".", help="Workspace path")
 def lineage(entry_id: str, depth: int, workspace: str):
     """View entry lineage."""
@@ -339,11 +453,15 @@ def lineage(entry_id: str, depth: int, workspace: str):
         click.echo(f"Lineage for: {e.title} ({e.id})")
         click.echo(f"  Ancestors: {len(lineage_data['ancestors'])}")
         for a in lineage_data["ancestors"]:
-            click.echo(f"    - {a['id']}: {a['title']}")
+            indent = "  " * a["depth"]
+            click.echo(f"  {indent}- {a['id']}: {a['title']}")
 
         click.echo(f"  Descendants: {len(lineage_data['descendants'])}")
         for d in lineage_data["descendants"]:
-            click.echo(f"    - {d['id']}: {d['title']}")
+            indent = "  " * d["depth"]
+            click.echo(f"  {indent}- {d['id']}: {d['title']}")
+
+        click.echo(f"  Edges: {len(lineage_data['edges'])}")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise click.Abort()
@@ -648,6 +766,110 @@ def db_status(workspace: str):
         raise click.Abort()
 
 
+@db.command("reindex")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def db_reindex(workspace: str):
+    """Rebuild the full-text search index.
+
+    The index is kept in sync by triggers; use this after editing the
+    database by hand or restoring it from a backup.
+    """
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        count = ws.db_manager.rebuild_search_index()
+        click.echo(f"Indexed {count} entries.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@db.group("index")
+def db_index():
+    """Manage indexes on JSON values of entries.
+
+    An index on a path such as metrics.loss lets search --where filters
+    on it look rows up instead of scanning every entry.
+    """
+    pass
+
+
+@db_index.command("create")
+@click.argument("path")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def db_index_create(path: str, workspace: str):
+    """Index a JSON value, e.g. metrics.loss or inputs.cfg."""
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        name = ws.db_manager.create_json_index(path)
+        click.echo(f"Created index {name}")
+
+        # Check SQLite actually picks the index for an equality filter
+        plan = ws.db_manager.explain_search({"where": [f"{path} = 0"]})
+        if any(name in step for step in plan):
+            click.echo(f"Used by filters such as: {path} = ...")
+        else:
+            click.echo("Warning: the query planner does not use this index yet:", err=True)
+            for step in plan:
+                click.echo(f"  {step}", err=True)
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@db_index.command("drop")
+@click.argument("path")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def db_index_drop(path: str, workspace: str):
+    """Drop the index on a JSON value."""
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        if ws.db_manager.drop_json_index(path):
+            click.echo(f"Dropped index on {path}")
+        else:
+            click.echo(f"No index on {path}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@db_index.command("list")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def db_index_list(workspace: str):
+    """List indexes on JSON values."""
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        indexes = ws.db_manager.list_json_indexes()
+        if not indexes:
+            click.echo("No JSON indexes.")
+            return
+        for index in indexes:
+            click.echo(f"  {index['name']}: {index['sql']}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@db.command("explain")
+@click.option("--query", "-q", default=None, help="Search query")
+@click.option("--tag", "-T", "tags", multiple=True, help="Require tag (repeatable)")
+@click.option("--where", "-W", "where", multiple=True, help="JSON value filter (repeatable)")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def db_explain(query: str, tags: tuple, where: tuple, workspace: str):
+    """Show SQLite's query plan for a search."""
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        plan = ws.db_manager.explain_search(
+            {"query": query, "tags": list(tags) or None, "where": list(where) or None}
+        )
+        if not plan:
+            click.echo("Nothing can match (unknown tag).")
+        for step in plan:
+            click.echo(f"  {step}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
 @db.command("history")
 @click.option("--workspace", "-w", default=".", help="Workspace path")
 def db_history(workspace: str):
@@ -677,5 +899,265 @@ def db_history(workspace: str):
         raise click.Abort()
 
 
+@cli.group()
+def storage():
+    """Artifact storage management commands."""
+    pass
+
+
+@storage.command("thumbnails")
+@click.option("--rebuild", is_flag=True, help="Re-render thumbnails that already exist")
+@click.option(
+    "--size",
+    "-s",
+    "sizes",
+    type=click.Choice([str(size) for size in THUMBNAIL_SIZES]),
+    multiple=True,
+    help=f"Thumbnail size to render (repeatable, default {DEFAULT_THUMBNAIL_SIZE})",
+)
+@click.option("--workers", "-j", type=click.IntRange(0), default=None, help="Worker processes")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def storage_thumbnails(rebuild: bool, sizes: tuple, workers: int, workspace: str):
+    """Render missing thumbnails for image artifacts in parallel.
+
+    Thumbnails are otherwise rendered in the background when an image is
+    stored, or on first request.
+    """
+    try:
+        ws = Workspace.load(Path(workspace).resolve(), thumbnail_workers=workers)
+        try:
+            hashes = ws.db_manager.list_artifact_hashes("image/")
+            count = ws.storage_manager.rebuild_thumbnails(
+                hashes,
+                sizes=[int(size) for size in sizes] or [DEFAULT_THUMBNAIL_SIZE],
+                force=rebuild,
+            )
+        finally:
+            ws.close()
+        click.echo(f"Rendered {count} thumbnail(s) for {len(hashes)} image(s).")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@storage.command("archive")
+@click.option(
+    "--codec",
+    type=click.Choice(list(ARCHIVE_CODECS)),
+    default=DEFAULT_ARCHIVE_CODEC,
+    show_default=True,
+    help='Codec for notebooks whose archive_strategy is "compress"',
+)
+@click.option(
+    "--older-than",
+    type=click.FloatRange(0),
+    default=None,
+    help="Archive artifacts older than this many days (default: per-notebook auto_archive_days)",
+)
+@click.option("--dry-run", is_flag=True, help="Only report what would be archived")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def storage_archive(codec: str, older_than: float, dry_run: bool, workspace: str):
+    """Compress blobs that are past their notebook's archive threshold.
+
+    Archived artifacts are decompressed transparently when read.
+    """
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        try:
+            report = Archiver(ws, codec).run(older_than_days=older_than, dry_run=dry_run)
+        finally:
+            ws.close()
+        if dry_run:
+            click.echo(
+                f"Would archive {report['archived']} blob(s) ({report['bytes_before']} bytes)."
+            )
+            return
+        click.echo(
+            f"Archived {report['archived']} blob(s): "
+            f"{report['bytes_before']} -> {report['bytes_after']} bytes, "
+            f"reclaimed {report['bytes_reclaimed']} bytes."
+        )
+        if report["incompressible"]:
+            click.echo(f"Left {report['incompressible']} incompressible blob(s) as-is.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@storage.command("gc")
+@click.option(
+    "--grace-period",
+    type=click.FloatRange(0),
+    default=DEFAULT_GC_GRACE_PERIOD / 3600,
+    show_default=True,
+    help="Hours a file must be unmodified before it can be removed",
+)
+@click.option("--workers", "-j", type=click.IntRange(1), default=4, help="Threads listing shards")
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed")
+@click.option(
+    "--full/--released-only",
+    default=True,
+    show_default=True,
+    help="Sweep the whole store, or only remove blobs whose refcount dropped to zero",
+)
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def storage_gc(grace_period: float, workers: int, dry_run: bool, full: bool, workspace: str):
+    """Remove blobs and thumbnails no artifact references.
+
+    Blobs released by their last artifact are removed first. A full run
+    also removes stray files and temp files left behind by interrupted
+    uploads.
+    """
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        try:
+            collector = GarbageCollector(ws, grace_period * 3600, workers)
+            report = collector.run(dry_run=dry_run, full=full)
+        finally:
+            ws.close()
+        verb = "Would remove" if dry_run else "Removed"
+        click.echo(
+            f"{verb} {report['released']} released blob(s), "
+            f"{report['blobs']} stray blob(s), {report['packed']} packed blob(s), "
+            f"{report['chunks']} chunk(s), {report['thumbnails']} thumbnail(s) and {report['temp_files']} temp file(s) "
+            f"of {report['scanned']} scanned; "
+            f"{report['bytes_reclaimed']} bytes."
+        )
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@storage.command("repack")
+@click.option(
+    "--min-waste",
+    type=click.FloatRange(0, 1),
+    default=0.25,
+    show_default=True,
+    help="Rewrite packs once this fraction of them is unreferenced",
+)
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def storage_repack(min_waste: float, workspace: str):
+    """Compact pack files holding deleted small blobs.
+
+    Packed blobs are dropped from the pack index by `codex storage gc`;
+    this rewrites the packs to give the space back.
+    """
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        try:
+            report = ws.storage_manager.packs.repack(min_waste)
+            stats = ws.storage_manager.packs.stats()
+        finally:
+            ws.close()
+        click.echo(
+            f"Rewrote {report['packs_rewritten']} pack(s), moving {report['records_moved']} "
+            f"blob(s); reclaimed {report['bytes_reclaimed']} bytes."
+        )
+        click.echo(
+            f"{stats['blobs']} packed blob(s) in {stats['packs']} pack(s), "
+            f"{stats['disk_bytes']} bytes on disk."
+        )
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@storage.command("stats")
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def storage_stats(workspace: str):
+    """Show pack file usage and chunk deduplication."""
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        try:
+            stats = ws.storage_manager.stats()
+        finally:
+            ws.close()
+        packs, chunks = stats["packs"], stats["chunks"]
+        click.echo(
+            f"Packs: {packs['blobs']} blob(s) in {packs['packs']} pack(s), "
+            f"{packs['live_bytes']} live of {packs['disk_bytes']} bytes on disk."
+        )
+        click.echo(
+            f"Chunks: {chunks['blobs']} chunk(s) in {chunks['packs']} pack(s), "
+            f"{chunks['logical_bytes']} logical bytes stored in {chunks['stored_bytes']}."
+        )
+        if chunks["dedup_ratio"] is not None:
+            click.echo(f"Dedup ratio: {chunks['dedup_ratio']:.2f}x")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+
+@storage.command("verify")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only re-hash blobs written since the last clean run",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="Only re-hash blobs written after this time (local time)",
+)
+@click.option("--workers", "-j", type=click.IntRange(0), help="Processes hashing blobs")
+@click.option("--json", "as_json", is_flag=True, help="Print the full report as JSON")
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Also write the JSON report to this file",
+)
+@click.option("--workspace", "-w", default=".", help="Workspace path")
+def storage_verify(
+    incremental: bool,
+    since: datetime,
+    workers: int,
+    as_json: bool,
+    report_path: Path,
+    workspace: str,
+):
+    """Check blobs against their hashes and artifacts against the store.
+
+    Exits with status 1 if any blob is corrupt, unreadable or missing, so
+    it can run from cron.
+    """
+    import json
+
+    try:
+        ws = Workspace.load(Path(workspace).resolve())
+        try:
+            report = Verifier(ws, workers).run(
+                since=since.timestamp() if since else None, incremental=incremental
+            )
+        finally:
+            ws.close()
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+
+    if report_path:
+        report_path.write_text(json.dumps(report, indent=2))
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    else:
+        click.echo(
+            f"Checked {report['checked']} blob(s), {report['bytes_hashed']} bytes "
+            f"({report['skipped']} skipped as already verified)."
+        )
+        for problem in ("corrupt", "unreadable", "missing_blobs", "missing_thumbnails"):
+            if report[problem]:
+                label = problem.replace("_", " ").capitalize()
+                click.echo(f"{label}: {len(report[problem])}", err=problem != "missing_thumbnails")
+        if report["orphaned"]:
+            click.echo(f"Unreferenced: {report['orphaned']} (see `codex storage gc`)")
+        if "remote_checked" in report:
+            click.echo(f"Found {report['remote_checked']} blob(s) in the backend.")
+            if report["not_uploaded"]:
+                click.echo(f"Only stored locally: {len(report['not_uploaded'])}", err=True)
+    if not report["ok"]:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     cli()
@@ -4,6 +4,6 @@ from codex.core.entry import Entry
 from codex.core.notebook import Notebook
 from codex.core.page import Page
 from codex.core.storage import StorageManager
-from codex.core.workspace import Workspace
+from codex.core.workspace import Workspace, WorkspaceRegistry
 
-__all__ = ["Workspace", "Notebook", "Page", "Entry", "StorageManager"]
+__all__ = ["Workspace", "Notebook", "Page", "Entry", "StorageManager", "WorkspaceRegistry"]
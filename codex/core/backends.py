@@ -0,0 +1,424 @@
+"""Blob backends: where whole blobs live besides the local blob store.
+
+By default blobs only live under ``.lab/storage``. With a backend
+configured, every blob is uploaded to it when stored and the local blob
+directory becomes a read-through cache, so several API nodes can share one
+store::
+
+    file:///mnt/shared/blobs                      LocalBackend
+    s3://bucket/prefix?endpoint=http://minio:9000  S3Backend
+
+S3 credentials are read from ``AWS_ACCESS_KEY_ID`` and
+``AWS_SECRET_ACCESS_KEY``.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import threading
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+import aiohttp
+from multidict import CIMultiDict
+from yarl import URL
+
+# Part size of multipart uploads; blobs up to this size are sent in one PUT
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+# Lifetime of presigned download URLs, in seconds
+DEFAULT_PRESIGN_EXPIRY = 15 * 60
+
+# Read size when downloading blobs
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class BlobBackend:
+    """Store for whole blobs, keyed by hex SHA256 digest."""
+
+    def exists(self, digest: str) -> bool:
+        """Check if a blob exists."""
+        raise NotImplementedError
+
+    def size(self, digest: str) -> Optional[int]:
+        """Get a blob's size, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def upload(self, digest: str, path: Path):
+        """Upload a complete blob from a local file."""
+        raise NotImplementedError
+
+    def download(self, digest: str, dest: Path) -> bool:
+        """Download a blob to a local file.
+
+        Returns:
+            False if the blob doesn't exist
+        """
+        raise NotImplementedError
+
+    def delete(self, digest: str) -> bool:
+        """Delete a blob, returning whether it existed."""
+        raise NotImplementedError
+
+    def presigned_url(
+        self,
+        digest: str,
+        content_type: Optional[str] = None,
+        expires: int = DEFAULT_PRESIGN_EXPIRY,
+    ) -> Optional[str]:
+        """Get a URL clients can download the blob from directly.
+
+        Returns:
+            The URL, or None if the backend can't hand out URLs
+        """
+        return None
+
+    def close(self):
+        """Release connections."""
+
+
+class LocalBackend(BlobBackend):
+    """Blobs in a directory, e.g. a volume shared by several nodes.
+
+    Uses the same ``xx/yy/<digest>`` layout as the local blob store.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        """Get the path of a blob."""
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def size(self, digest: str) -> Optional[int]:
+        try:
+            return self.path(digest).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def upload(self, digest: str, path: Path):
+        dest = self.path(digest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=".upload-")
+        try:
+            with open(path, "rb") as source, os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(source, tmp, _DOWNLOAD_CHUNK_SIZE)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_name, dest)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def download(self, digest: str, dest: Path) -> bool:
+        try:
+            shutil.copyfile(self.path(digest), dest)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, digest: str) -> bool:
+        try:
+            self.path(digest).unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+class S3Backend(BlobBackend):
+    """Blobs in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+    Requests are signed with AWS Signature Version 4 and made with aiohttp
+    on an event loop the backend runs on its own thread, so the synchronous
+    storage API can call it from any thread. Blobs larger than one part
+    are streamed from the spooled file in a multipart upload, a few parts
+    at a time. Buckets are addressed path-style, which every
+    S3-compatible server supports.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: str = "us-east-1",
+        prefix: str = "",
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_concurrency: int = 4,
+    ):
+        """Initialize the backend.
+
+        Args:
+            bucket: Bucket name
+            endpoint_url: Server URL; defaults to AWS S3 in ``region``
+            region: Region used for signing
+            prefix: Prefix of every object key, e.g. ``"workspace-a/"``
+            access_key: Defaults to ``AWS_ACCESS_KEY_ID``
+            secret_key: Defaults to ``AWS_SECRET_ACCESS_KEY``
+            part_size: Bytes per part of multipart uploads
+            max_concurrency: Parts of one upload sent at once
+        """
+        self.bucket = bucket
+        self.endpoint_url = (endpoint_url or f"https://s3.{region}.amazonaws.com").rstrip("/")
+        self.host = urlsplit(self.endpoint_url).netloc
+        self.region = region
+        self.prefix = prefix
+        self.access_key = access_key or os.environ.get("AWS_ACCESS_KEY_ID", "")
+        self.secret_key = secret_key or os.environ.get("AWS_SECRET_ACCESS_KEY", "")
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = threading.Lock()
+
+    # Signing
+
+    def _path(self, digest: str) -> str:
+        return f"/{self.bucket}/{_quote(self.prefix + digest, safe='/-_.~')}"
+
+    def _scope(self, now: datetime) -> str:
+        return f"{now:%Y%m%d}/{self.region}/s3/aws4_request"
+
+    def _signature(self, now: datetime, canonical_request: str) -> str:
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                f"{now:%Y%m%dT%H%M%SZ}",
+                self._scope(now),
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        key = _hmac(f"AWS4{self.secret_key}".encode(), f"{now:%Y%m%d}")
+        for part in (self.region, "s3", "aws4_request"):
+            key = _hmac(key, part)
+        return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    def _signed_request(
+        self, method: str, path: str, query: Optional[dict] = None
+    ) -> tuple[URL, dict]:
+        """Build the URL and signed headers of a request."""
+        now = datetime.now(timezone.utc)
+        query_string = "&".join(
+            f"{_quote(k)}={_quote(str(v))}" for k, v in sorted((query or {}).items())
+        )
+        headers = {
+            "host": self.host,
+            "x-amz-content-sha256": _UNSIGNED_PAYLOAD,
+            "x-amz-date": f"{now:%Y%m%dT%H%M%SZ}",
+        }
+        signed_headers = ";".join(headers)
+        canonical_request = "\n".join(
+            [
+                method,
+                path,
+                query_string,
+                "".join(f"{k}:{v}\n" for k, v in headers.items()),
+                signed_headers,
+                _UNSIGNED_PAYLOAD,
+            ]
+        )
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{self._scope(now)}, "
+            f"SignedHeaders={signed_headers}, "
+            f"Signature={self._signature(now, canonical_request)}"
+        )
+        del headers["host"]
+        url = self.endpoint_url + path + (f"?{query_string}" if query_string else "")
+        return URL(url, encoded=True), headers
+
+    def presigned_url(
+        self,
+        digest: str,
+        content_type: Optional[str] = None,
+        expires: int = DEFAULT_PRESIGN_EXPIRY,
+    ) -> Optional[str]:
+        now = datetime.now(timezone.utc)
+        path = self._path(digest)
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{self._scope(now)}",
+            "X-Amz-Date": f"{now:%Y%m%dT%H%M%SZ}",
+            "X-Amz-Expires": str(expires),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if content_type:
+            query["response-content-type"] = content_type
+        query_string = "&".join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(query.items()))
+        canonical_request = "\n".join(
+            ["GET", path, query_string, f"host:{self.host}\n", "host", _UNSIGNED_PAYLOAD]
+        )
+        signature = self._signature(now, canonical_request)
+        return f"{self.endpoint_url}{path}?{query_string}&X-Amz-Signature={signature}"
+
+    # Event loop
+
+    def _run(self, coro):
+        """Run a coroutine on the backend's event loop and wait for it."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="s3-backend", daemon=True
+                )
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+            )
+        return self._session
+
+    async def _request(
+        self, method: str, digest: str, query: Optional[dict] = None, data=None
+    ) -> tuple[int, CIMultiDict, bytes]:
+        url, headers = self._signed_request(method, self._path(digest), query)
+        async with self._get_session().request(method, url, headers=headers, data=data) as resp:
+            body = await resp.read()
+            if resp.status >= 400 and resp.status != 404:
+                raise OSError(
+                    f"S3 {method} {self.prefix}{digest} failed: {resp.status} {body[:200]!r}"
+                )
+            return resp.status, resp.headers.copy(), body
+
+    # Operations
+
+    def exists(self, digest: str) -> bool:
+        return self.size(digest) is not None
+
+    def size(self, digest: str) -> Optional[int]:
+        status, headers, _ = self._run(self._request("HEAD", digest))
+        return int(headers["Content-Length"]) if status == 200 else None
+
+    def upload(self, digest: str, path: Path):
+        size = path.stat().st_size
+        if size <= self.part_size:
+            self._run(self._request("PUT", digest, data=path.read_bytes()))
+        else:
+            self._run(self._upload_multipart(digest, path, size))
+
+    async def _upload_multipart(self, digest: str, path: Path, size: int):
+        _, _, body = await self._request("POST", digest, {"uploads": ""})
+        upload_id = _xml_text(body, "UploadId")
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def upload_part(fd: int, number: int) -> str:
+            async with slots:
+                data = await loop.run_in_executor(
+                    None, os.pread, fd, self.part_size, (number - 1) * self.part_size
+                )
+                query = {"partNumber": number, "uploadId": upload_id}
+                _, headers, _ = await self._request("PUT", digest, query, data=data)
+                return headers["ETag"]
+
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            parts = range(1, -(-size // self.part_size) + 1)
+            etags = await asyncio.gather(*(upload_part(fd, n) for n in parts))
+            complete = "".join(
+                f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+                for n, etag in zip(parts, etags)
+            )
+            await self._request(
+                "POST",
+                digest,
+                {"uploadId": upload_id},
+                data=f"<CompleteMultipartUpload>{complete}</CompleteMultipartUpload>".encode(),
+            )
+        except BaseException:
+            await self._request("DELETE", digest, {"uploadId": upload_id})
+            raise
+        finally:
+            os.close(fd)
+
+    def download(self, digest: str, dest: Path) -> bool:
+        return self._run(self._download(digest, dest))
+
+    async def _download(self, digest: str, dest: Path) -> bool:
+        url, headers = self._signed_request("GET", self._path(digest))
+        async with self._get_session().get(url, headers=headers) as resp:
+            if resp.status == 404:
+                return False
+            if resp.status >= 400:
+                raise OSError(f"S3 GET {self.prefix}{digest} failed: {resp.status}")
+            with open(dest, "wb") as f:
+                async for chunk in resp.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        return True
+
+    def delete(self, digest: str) -> bool:
+        # S3 doesn't say whether the object existed
+        existed = self.exists(digest)
+        self._run(self._request("DELETE", digest))
+        return existed
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+
+def _xml_text(body: bytes, tag: str) -> str:
+    """Text of the first element named ``tag`` in an S3 XML response."""
+    for element in ElementTree.fromstring(body).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text or ""
+    raise OSError(f"S3 response has no {tag}: {body[:200]!r}")
+
+
+def open_backend(url: str) -> BlobBackend:
+    """Create a backend from a URL.
+
+    ``file:///path`` (or a bare path) is a LocalBackend. ``s3://bucket/prefix``
+    is an S3Backend, with ``endpoint``, ``region`` and ``part_size`` query
+    parameters.
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    parts = urlsplit(url)
+    if parts.scheme in ("", "file"):
+        return LocalBackend(Path(parts.path))
+    if parts.scheme == "s3":
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        prefix = parts.path.lstrip("/")
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+        return S3Backend(
+            parts.netloc,
+            endpoint_url=params.get("endpoint"),
+            region=params.get("region", "us-east-1"),
+            prefix=prefix,
+            part_size=int(params.get("part_size", DEFAULT_PART_SIZE)),
+        )
+    raise ValueError(f"Unsupported blob backend: {url}")
@@ -0,0 +1,96 @@
+"""In-memory caches for hot content."""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class ByteLRUCache:
+    """Thread-safe LRU cache of byte strings bounded by their total size.
+
+    Meant for content-addressed data: a key always maps to the same bytes,
+    so entries never need invalidating, only evicting. Values larger than
+    ``max_item_bytes`` are not cached, so one big value can't flush
+    everything else.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: Optional[int] = None):
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Total size of the cached values; 0 disables caching
+            max_item_bytes: Largest value to cache; defaults to an eighth
+                of ``max_bytes``
+        """
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_bytes // 8 if max_item_bytes is None else max_item_bytes
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a value, marking it most recently used."""
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes) -> bool:
+        """Add a value, evicting the least recently used ones to make room.
+
+        Returns:
+            False if the value is too large to cache
+        """
+        if len(value) > min(self.max_item_bytes, self.max_bytes):
+            return False
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+        return True
+
+    def discard(self, key: str):
+        """Drop a value if it is cached."""
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self.size -= len(value)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def clear(self):
+        """Drop every value; counters are kept."""
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """Get size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,237 @@
+"""Content-defined chunking for deduplicating similar blobs.
+
+Whole-file hashing only deduplicates identical files. Splitting blobs into
+chunks at boundaries chosen by the content itself (FastCDC with a gear
+rolling hash) means an edit only changes the chunks around it; the rest
+are shared with the previous version and stored once.
+
+A chunked blob is stored as a manifest listing its chunks. Chunks live in
+their own pack store with a reference count per chunk, so chunks can be
+collected once no manifest uses them.
+"""
+
+import io
+import random
+import struct
+import time
+from collections.abc import Iterator
+from hashlib import sha256
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from codex.core.packs import PackStore
+
+# Chunk size bounds; boundaries land on average every CHUNK_AVG_SIZE bytes
+CHUNK_MIN_SIZE = 16 * 1024
+CHUNK_AVG_SIZE = 64 * 1024
+CHUNK_MAX_SIZE = 256 * 1024
+
+# Manifest record: chunk digest and length
+MANIFEST_RECORD = struct.Struct(">32sI")
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# Fixed pseudo-random table, so chunk boundaries are stable across runs
+_GEAR = [random.Random(0x636F646578 + i).getrandbits(64) for i in range(256)]
+
+
+def _mask(bits: int) -> int:
+    """Mask with ``bits`` one bits spread over the high end of the hash."""
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def find_boundary(
+    data: bytes,
+    min_size: int = CHUNK_MIN_SIZE,
+    avg_size: int = CHUNK_AVG_SIZE,
+    max_size: int = CHUNK_MAX_SIZE,
+) -> int:
+    """Length of the first chunk of ``data`` (FastCDC).
+
+    The first ``min_size`` bytes are never hashed. Up to ``avg_size`` a
+    stricter mask makes a cut less likely, after it a looser one makes it
+    more likely, which keeps chunk sizes close to the average.
+    """
+    n = len(data)
+    if n <= min_size:
+        return n
+    n = min(n, max_size)
+    bits = avg_size.bit_length() - 1
+    strict, loose = _mask(bits + 2), _mask(bits - 2)
+    gear = _GEAR
+
+    h = 0
+    i = min_size
+    for byte in data[min_size:min(avg_size, n)]:
+        h = ((h << 1) + gear[byte]) & _MASK64
+        i += 1
+        if not h & strict:
+            return i
+    for byte in data[i:n]:
+        h = ((h << 1) + gear[byte]) & _MASK64
+        i += 1
+        if not h & loose:
+            return i
+    return n
+
+
+def iter_chunks(
+    stream: BinaryIO,
+    min_size: int = CHUNK_MIN_SIZE,
+    avg_size: int = CHUNK_AVG_SIZE,
+    max_size: int = CHUNK_MAX_SIZE,
+) -> Iterator[bytes]:
+    """Split a stream into content-defined chunks."""
+    buffer = b""
+    eof = False
+    while buffer or not eof:
+        while not eof and len(buffer) < max_size:
+            data = stream.read(max_size * 4)
+            eof = not data
+            buffer += data
+        cut = find_boundary(buffer, min_size, avg_size, max_size)
+        if cut == 0:
+            return
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+
+
+def pack_manifest(entries: list[tuple[str, int]]) -> bytes:
+    """Encode (chunk digest, length) entries as a manifest."""
+    return b"".join(MANIFEST_RECORD.pack(bytes.fromhex(d), n) for d, n in entries)
+
+
+def unpack_manifest(data: bytes) -> list[tuple[str, int]]:
+    """Decode a manifest into (chunk digest, length) entries."""
+    return [(d.hex(), n) for d, n in MANIFEST_RECORD.iter_unpack(data)]
+
+
+class ChunkReader(io.RawIOBase):
+    """Read the chunks of a manifest back as one stream."""
+
+    def __init__(self, store: "ChunkStore", entries: list[tuple[str, int]]):
+        self._store = store
+        self._entries = iter(entries)
+        self._current = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._current:
+            entry = next(self._entries, None)
+            if entry is None:
+                return 0
+            data = self._store.get(entry[0])
+            if data is None:
+                raise OSError(f"Missing chunk {entry[0]}")
+            self._current = data
+        n = min(len(buffer), len(self._current))
+        buffer[:n] = self._current[:n]
+        self._current = self._current[n:]
+        return n
+
+
+_REFS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    hash BLOB PRIMARY KEY,
+    refs INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class ChunkStore(PackStore):
+    """Pack store for chunks, with a reference count per chunk."""
+
+    def _db(self):
+        if self._conn is None:
+            super()._db().executescript(_REFS_SCHEMA)
+        return self._conn
+
+    def store(self, stream: BinaryIO) -> list[tuple[str, int]]:
+        """Chunk a stream, store new chunks and take a reference on each.
+
+        Returns:
+            Manifest entries: (chunk digest, length) in stream order
+        """
+        entries = []
+        for chunk in iter_chunks(stream):
+            digest = sha256(chunk).hexdigest()
+            self.put(digest, chunk)
+            entries.append((digest, len(chunk)))
+        self._adjust_refs(entries, 1)
+        return entries
+
+    def release(self, entries: list[tuple[str, int]]):
+        """Drop the references a manifest holds on its chunks."""
+        self._adjust_refs(entries, -1)
+
+    def _adjust_refs(self, entries: list[tuple[str, int]], delta: int):
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO refs (hash, refs) VALUES (?, ?) "
+                    "ON CONFLICT (hash) DO UPDATE SET refs = refs + excluded.refs",
+                    [(bytes.fromhex(digest), delta) for digest, _ in entries],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def reader(self, entries: list[tuple[str, int]]) -> BinaryIO:
+        """Open the chunks of a manifest as one buffered stream."""
+        return io.BufferedReader(ChunkReader(self, entries), buffer_size=CHUNK_MAX_SIZE)
+
+    def collect(self, grace_period: float, dry_run: bool = False) -> dict:
+        """Drop chunks no manifest references and repack.
+
+        Chunks stored within the grace period are kept: their manifest may
+        still be being written.
+
+        Returns:
+            Report with the chunks dropped and the bytes reclaimed
+        """
+        cutoff = time.time() - grace_period
+        dead = "stored_at < ? AND hash NOT IN (SELECT hash FROM refs WHERE refs > 0)"
+        with self._lock:
+            conn = self._db()
+            if dry_run:
+                query = f"SELECT count(*) FROM blobs WHERE {dead}"
+                count = conn.execute(query, (cutoff,)).fetchone()[0]
+                return {"chunks": count, "bytes_reclaimed": 0}
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                dropped = conn.execute(f"DELETE FROM blobs WHERE {dead}", (cutoff,)).rowcount
+                conn.execute(
+                    "DELETE FROM refs WHERE refs <= 0 AND hash NOT IN (SELECT hash FROM blobs)"
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        reclaimed = self.repack()["bytes_reclaimed"] if dropped else 0
+        return {"chunks": dropped, "bytes_reclaimed": reclaimed}
+
+    def stats(self) -> dict:
+        """Get chunk counts and the deduplication ratio."""
+        stats = super().stats()
+        with self._lock:
+            stored, logical = self._db().execute(
+                "SELECT coalesce(sum(b.length), 0), coalesce(sum(b.length * r.refs), 0) "
+                "FROM blobs b JOIN refs r ON r.hash = b.hash WHERE r.refs > 0"
+            ).fetchone()
+        stats["stored_bytes"] = stored
+        stats["logical_bytes"] = logical
+        stats["dedup_ratio"] = logical / stored if stored else None
+        return stats
+
+
+def read_manifest(path: Path) -> Optional[list[tuple[str, int]]]:
+    """Read a manifest file, or return None if it doesn't exist."""
+    try:
+        return unpack_manifest(path.read_bytes())
+    except FileNotFoundError:
+        return None
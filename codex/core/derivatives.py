@@ -0,0 +1,248 @@
+"""Resized and re-encoded copies of image artifacts.
+
+Pages rarely need images at full resolution, and a multi-megabyte PNG
+re-encoded as WebP or AVIF at the width it is displayed at is a fraction of
+the size. Derivatives are rendered on request, in the thumbnail worker
+pool, and cached on disk under the blob hash and the rendering parameters.
+The cache is bounded in size; the least recently served derivatives are
+evicted first.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from PIL import Image, ImageOps, features
+
+# Format name -> (Pillow format, media type, file suffix)
+DERIVATIVE_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "png": ("PNG", "image/png", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "avif": ("AVIF", "image/avif", "avif"),
+}
+
+# Formats this Pillow build can encode
+AVAILABLE_FORMATS = tuple(
+    name for name in DERIVATIVE_FORMATS if name not in ("webp", "avif") or features.check(name)
+)
+
+# Formats offered to clients that accept them, best compression first;
+# everyone else gets JPEG
+NEGOTIATED_FORMATS = tuple(name for name in ("avif", "webp") if name in AVAILABLE_FORMATS)
+
+MAX_DERIVATIVE_SIZE = 4096
+DEFAULT_DERIVATIVE_QUALITY = 80
+
+# Disk space for derivatives per workspace
+DEFAULT_DERIVATIVE_CACHE_SIZE = 1024 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    """How to render a derivative.
+
+    With both ``width`` and ``height`` the image is scaled and cropped to
+    cover exactly that box; with one of them it is scaled to fit, keeping
+    its aspect ratio. Images are never enlarged.
+    """
+
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: str = "jpeg"
+    quality: int = DEFAULT_DERIVATIVE_QUALITY
+
+    def __post_init__(self):
+        for name in ("width", "height"):
+            value = getattr(self, name)
+            if value is not None and not 1 <= value <= MAX_DERIVATIVE_SIZE:
+                raise ValueError(f"Invalid {name}: {value} (1 to {MAX_DERIVATIVE_SIZE})")
+        if self.format not in AVAILABLE_FORMATS:
+            raise ValueError(
+                f"Unsupported format: {self.format} (choose from {', '.join(AVAILABLE_FORMATS)})"
+            )
+        if not 1 <= self.quality <= 100:
+            raise ValueError(f"Invalid quality: {self.quality} (1 to 100)")
+
+    @property
+    def media_type(self) -> str:
+        return DERIVATIVE_FORMATS[self.format][1]
+
+    @property
+    def key(self) -> str:
+        """File name suffix identifying these parameters, e.g. "w800-h0-q80.webp"."""
+        suffix = DERIVATIVE_FORMATS[self.format][2]
+        return f"w{self.width or 0}-h{self.height or 0}-q{self.quality}.{suffix}"
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Pick the best derivative format an Accept header allows."""
+    accepted = set()
+    for part in (accept or "").split(","):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        if quality > 0:
+            accepted.add(media_type.strip().lower())
+    for name in NEGOTIATED_FORMATS:
+        if DERIVATIVE_FORMATS[name][1] in accepted:
+            return name
+    return "jpeg"
+
+
+def render_derivative(
+    source: Union[Path, BinaryIO],
+    dest: Path,
+    width: Optional[int],
+    height: Optional[int],
+    format: str,
+    quality: int,
+) -> bool:
+    """Render a derivative of an image file or seekable file object.
+
+    Runs in worker processes, so it must stay a picklable module-level
+    function. Like thumbnails, the file is written under a temporary name
+    and renamed into place.
+
+    Returns:
+        True if the derivative was written, False if the source could not
+        be decoded as an image
+    """
+    pil_format = DERIVATIVE_FORMATS[format][0]
+    tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        with Image.open(source) as img:
+            if img.format == "JPEG" and width and height:
+                img.draft("RGB", (width, height))
+            img = ImageOps.exif_transpose(img)
+
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            if pil_format == "JPEG" or not has_alpha:
+                img = img.convert("L" if img.mode in ("1", "L") else "RGB")
+            else:
+                img = img.convert("RGBA")
+
+            if width and height:
+                if img.width > width or img.height > height:
+                    img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+            elif width or height:
+                img.thumbnail(
+                    (width or MAX_DERIVATIVE_SIZE * 4, height or MAX_DERIVATIVE_SIZE * 4),
+                    Image.Resampling.LANCZOS,
+                )
+
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if pil_format == "PNG":
+                img.save(tmp_path, pil_format, optimize=True)
+            else:
+                img.save(tmp_path, pil_format, quality=quality)
+        os.replace(tmp_path, dest)
+        return True
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        return False
+
+
+class DerivativeCache:
+    """Size-bounded directory of derivatives, evicted least recently used first.
+
+    Files are named ``<hash>.<spec key>`` and sharded like blobs. Serving a
+    derivative refreshes its mtime, which orders eviction.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_DERIVATIVE_CACHE_SIZE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, digest: str, spec: DerivativeSpec) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.{spec.key}"
+
+    def get(self, digest: str, spec: DerivativeSpec) -> Optional[Path]:
+        """Get a cached derivative, or None if it has to be rendered."""
+        path = self.path(digest, spec)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def add(self, path: Path):
+        """Account for a newly rendered derivative, evicting old ones if over budget."""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += size
+            if self._bytes is None or self._bytes > self.max_bytes:
+                self._bytes = self._trim(keep=path)
+
+    def _trim(self, keep: Path) -> int:
+        """Evict the least recently used derivatives down to 90% of the budget.
+
+        Returns:
+            Bytes left in the cache
+        """
+        files = []
+        for path in self.root.glob("??/??/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return total
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            if path == keep:
+                continue  # About to be served
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        return total
+
+    def discard(self, digest: str):
+        """Delete every derivative of a blob."""
+        with self._lock:
+            for path in (self.root / digest[:2] / digest[2:4]).glob(f"{digest}.*"):
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                if self._bytes is not None:
+                    self._bytes -= size
+
+    def stats(self) -> dict:
+        """Get size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -1,22 +1,33 @@
 """Entry operations for Lab Notebook."""
 
-import hashlib
 import json
+import math
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Optional
+from itertools import islice
+from typing import TYPE_CHECKING, BinaryIO, Callable, Optional, Union
 
 from ulid import ULID
 
+from codex.core.timeseries import DOWNSAMPLE_METHODS, SERIES_KEY, downsample, summarize
 from codex.db.models import Artifact as ArtifactModel
 from codex.db.models import Entry as EntryModel
 from codex.db.models import EntryLineage as EntryLineageModel
 from codex.db.models import Page as PageModel
+from codex.db.models import foreign_key_errors
+from codex.db.operations import BULK_CHUNK_SIZE
+from codex.db.serialization import artifact_to_dict, page_to_dict
 
 if TYPE_CHECKING:
     from codex.core.page import Page
     from codex.core.workspace import Workspace
 
+# Blobs stored at once when adding many artifacts
+ARTIFACT_STORE_WORKERS = 4
+
 
 def _now() -> datetime:
     """Get current time without timezone info for SQLite compatibility."""
@@ -102,19 +113,22 @@ class Entry:
                     "archived": False,
                 }),
             )
+            if tags:
+                page.workspace.db_manager.set_entry_tags(session, entry_id, tags)
 
-            # Update lineage if has parent
+            # Update lineage if has parent; both ends were just validated
             if parent_id:
                 EntryLineageModel.create(
                     session,
-                    validate_fk=True,
+                    validate_fk=False,
                     parent_id=parent_id,
                     child_id=entry_id,
                     relationship_type="derives_from",
                     created_at=_now(),
                 )
 
-            session.commit()
+            with foreign_key_errors(session):
+                session.commit()
         finally:
             session.close()
 
@@ -128,6 +142,86 @@ class Entry:
 
         return entry
 
+    @classmethod
+    def bulk_create(
+        cls,
+        workspace: "Workspace",
+        records: Iterable[dict],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        progress: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """Create many entries, e.g. to backfill historical runs.
+
+        Each record has the fields of an entry; ``page_id``, ``entry_type``
+        and ``title`` are required, the rest default as in create(), and a
+        record may carry its own ``id``, ``status``, ``created_at`` and
+        results. Records are written in chunks: each chunk is validated
+        once, inserted in one transaction and its manifests committed to
+        Git in one commit. If a chunk is rejected, the chunks before it
+        stay imported.
+
+        Args:
+            workspace: Workspace to import into
+            records: Entry records, e.g. parsed JSON lines
+            chunk_size: Entries per transaction and Git commit
+            progress: Called with the running report after every chunk
+
+        Returns:
+            Report with the entries imported, chunks, seconds and rows per second
+
+        Raises:
+            ValueError: If a record is incomplete or refers to a page or
+                parent that doesn't exist
+        """
+        report = {"entries": 0, "chunks": 0, "seconds": 0.0, "rows_per_second": 0.0}
+        start = time.perf_counter()
+        records = iter(records)
+        while chunk := list(islice(records, chunk_size)):
+            rows = [cls._from_record(workspace, record).to_dict() for record in chunk]
+            notebooks = workspace.db_manager.bulk_insert_entries(rows)
+            workspace.git_manager.commit_entries(
+                [(notebooks[row["page_id"]], row["page_id"], row) for row in rows],
+                f"Import {len(rows)} entries",
+            )
+            report["entries"] += len(rows)
+            report["chunks"] += 1
+            report["seconds"] = time.perf_counter() - start
+            report["rows_per_second"] = report["entries"] / report["seconds"]
+            if progress is not None:
+                progress(dict(report))
+        return report
+
+    @classmethod
+    def _from_record(cls, workspace: "Workspace", record: dict) -> "Entry":
+        """Build a new entry from an import record, filling in defaults."""
+        missing = [key for key in ("page_id", "entry_type", "title") if not record.get(key)]
+        if missing:
+            raise ValueError(f"Entry record is missing {', '.join(missing)}: {record}")
+        tags = record.get("tags") or []
+        created_at = record.get("created_at") or _now()
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        if created_at.tzinfo is not None:
+            # Stored as naive UTC
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return cls(
+            id=record.get("id") or str(ULID()),
+            page_id=record["page_id"],
+            workspace=workspace,
+            entry_type=record["entry_type"],
+            title=record["title"],
+            created_at=created_at,
+            status=record.get("status") or "created",
+            parent_id=record.get("parent_id"),
+            inputs=record.get("inputs") or {},
+            outputs=record.get("outputs") or {},
+            execution=record.get("execution") or {},
+            metrics=record.get("metrics") or {},
+            metadata=record.get("metadata")
+            or {"tags": tags, "notes": "", "rating": None, "archived": False},
+            tags=tags,
+        )
+
     @classmethod
     def from_dict(cls, workspace: "Workspace", data: dict) -> "Entry":
         """Create an entry from a dictionary."""
@@ -181,6 +275,7 @@ class Entry:
         self.status = "running"
         self.execution["started_at"] = _now().isoformat()
         self._update()
+        artifacts: list[dict] = []
 
         try:
             # Get integration
@@ -198,14 +293,9 @@ class Entry:
             self.execution["status"] = "success"
             self.status = "completed"
 
-            # Store artifacts
+            # Store artifact blobs; their rows are committed with the status
             if "artifacts" in result:
-                for artifact_data in result["artifacts"]:
-                    self.add_artifact(
-                        artifact_type=artifact_data["type"],
-                        data=artifact_data["data"],
-                        metadata=artifact_data.get("metadata", {}),
-                    )
+                artifacts = self._store_artifacts(result["artifacts"])
         except Exception as e:
             self.execution["completed_at"] = _now().isoformat()
             self.execution["status"] = "error"
@@ -213,14 +303,24 @@ class Entry:
             self.status = "failed"
             raise
         finally:
-            self._update()
+            self._update(artifacts)
+
+    def _update(self, artifacts: Iterable[dict] = ()):
+        """Update entry in database and Git.
 
-    def _update(self):
-        """Update entry in database and Git."""
+        Args:
+            artifacts: Rows of newly stored artifacts, inserted in the same
+                transaction as the entry update
+        """
         session = self.workspace.db_manager.get_session()
         try:
             entry = EntryModel.get_by_id(session, self.id)
             if entry:
+                # Series summaries are maintained by log_metrics; keep the stored ones
+                stored = json.loads(entry.metrics or "{}")
+                if SERIES_KEY in stored:
+                    self.metrics = {**self.metrics, SERIES_KEY: stored[SERIES_KEY]}
+                self.workspace.db_manager.insert_artifacts(session, list(artifacts))
                 entry.update(
                     session,
                     validate_fk=False,
@@ -231,6 +331,7 @@ class Entry:
                     metrics=json.dumps(self.metrics),
                     metadata_=json.dumps(self.metadata),
                 )
+                self.workspace.db_manager.set_entry_tags(session, self.id, self.tags)
                 session.commit()
         finally:
             session.close()
@@ -255,15 +356,94 @@ class Entry:
         """Add artifact to this entry."""
         # Store in content-addressable storage
         artifact_hash = self.workspace.storage_manager.store(data, artifact_type)
+        return self._record_artifact(artifact_type, artifact_hash, len(data), metadata)
 
-        artifact_id = f"art-{hashlib.sha256(artifact_hash.encode()).hexdigest()[:12]}"
+    def add_artifact_stream(
+        self,
+        artifact_type: str,
+        stream: Union[BinaryIO, Iterable[bytes]],
+        metadata: Optional[dict] = None,
+    ) -> dict:
+        """Add artifact to this entry from a file object or chunk iterable.
+
+        The content is hashed and written incrementally, so large outputs
+        never have to fit in memory.
+        """
+        artifact_hash, size = self.workspace.storage_manager.store_stream(
+            stream, artifact_type
+        )
+        return self._record_artifact(artifact_type, artifact_hash, size, metadata)
+
+    def add_artifacts(self, artifacts: list[dict]) -> list[dict]:
+        """Add many artifacts to this entry at once.
 
-        artifact_data = {
-            "id": artifact_id,
+        Each item has a "type", the content as "data" bytes or a "stream",
+        and optional "metadata", as returned by integrations. Blobs are
+        stored concurrently, then all rows are inserted in one transaction.
+        Streams are closed once stored.
+        """
+        records = self._store_artifacts(artifacts)
+        session = self.workspace.db_manager.get_session()
+        try:
+            self.workspace.db_manager.insert_artifacts(session, records)
+            session.commit()
+        finally:
+            session.close()
+        return records
+
+    def _store_artifacts(self, artifacts: list[dict]) -> list[dict]:
+        """Store the blobs of many artifacts and build their rows, in order."""
+        storage = self.workspace.storage_manager
+
+        def store(item: dict) -> dict:
+            artifact_type = item["type"]
+            stream = item.get("stream")
+            if stream is None:
+                artifact_hash = storage.store(item["data"], artifact_type)
+                size = len(item["data"])
+            else:
+                try:
+                    artifact_hash, size = storage.store_stream(stream, artifact_type)
+                finally:
+                    if hasattr(stream, "close"):
+                        stream.close()
+            return self._artifact_row(artifact_type, artifact_hash, size, item.get("metadata"))
+
+        if len(artifacts) <= 1:
+            return [store(item) for item in artifacts]
+        with ThreadPoolExecutor(min(ARTIFACT_STORE_WORKERS, len(artifacts))) as pool:
+            return list(pool.map(store, artifacts))
+
+    def _record_artifact(
+        self,
+        artifact_type: str,
+        artifact_hash: str,
+        size_bytes: int,
+        metadata: Optional[dict],
+    ) -> dict:
+        """Insert the database row attaching a stored blob to this entry.
+
+        The same blob may be attached to any number of entries; the blobs
+        table counts its references.
+        """
+        artifact_data = self._artifact_row(artifact_type, artifact_hash, size_bytes, metadata)
+        self.workspace.db_manager.insert_artifact(artifact_data)
+        return artifact_data
+
+    def _artifact_row(
+        self,
+        artifact_type: str,
+        artifact_hash: str,
+        size_bytes: int,
+        metadata: Optional[dict],
+    ) -> dict:
+        """Build the row for an artifact of this entry."""
+        return {
+            "id": f"art-{ULID()}",
             "entry_id": self.id,
             "type": artifact_type,
             "hash": artifact_hash,
-            "size_bytes": len(data),
+            "size_bytes": size_bytes,
             "path": str(self.workspace.storage_manager.get_blob_path(artifact_hash)),
             "thumbnail_path": str(
                 self.workspace.storage_manager.get_thumbnail_path(artifact_hash)
@@ -271,122 +451,111 @@ class Entry:
             "metadata": metadata or {},
         }
 
-        self.workspace.db_manager.insert_artifact(artifact_data)
-
-        return artifact_data
-
     def get_artifacts(self) -> list[dict]:
         """Get all artifacts for this entry."""
         session = self.workspace.db_manager.get_session()
         try:
             artifacts = ArtifactModel.find_by(session, entry_id=self.id)
             return [
-                {
-                    "id": a.id,
-                    "entry_id": a.entry_id,
-                    "type": a.type,
-                    "hash": a.hash,
-                    "size_bytes": a.size_bytes,
-                    "path": a.path,
-                    "thumbnail_path": a.thumbnail_path,
-                    "created_at": a.created_at.isoformat() if a.created_at else None,
-                    "archived": a.archived,
-                    "archive_strategy": a.archive_strategy,
-                    "original_size_bytes": a.original_size_bytes,
-                    "metadata": json.loads(a.metadata_) if a.metadata_ else {},
-                }
+                artifact_to_dict(a)
                 for a in artifacts
             ]
         finally:
             session.close()
 
-    def get_lineage(self, depth: int = 3) -> dict:
-        """Get lineage graph for this entry."""
-        # Get ancestors
+    def log_metrics(self, points: list[dict]) -> dict:
+        """Append values to the entry's metric series, e.g. a loss curve.
+
+        Points are rows of the metric_points table rather than part of the
+        metrics JSON, so logging cost depends only on the batch size. The
+        summary of each series (count, min, max, mean, last value and its
+        step) is kept up to date in ``metrics["series"]``, in the same
+        transaction. Unlike other updates this doesn't commit to Git; the
+        summaries reach the manifest with the entry's next update.
+
+        Args:
+            points: Dicts with key, step and value, and optionally a
+                timestamp
+
+        Returns:
+            The updated series summaries
+
+        Raises:
+            ValueError: If a value is NaN or infinite, or the entry no
+                longer exists
+        """
+        by_key: dict[str, tuple[list, list]] = {}
+        for point in points:
+            value = float(point["value"])
+            # SQLite stores NaN as NULL, and neither can be summarized
+            if not math.isfinite(value):
+                raise ValueError(f"Metric values must be finite: {point['key']}={value}")
+            steps, values = by_key.setdefault(point["key"], ([], []))
+            steps.append(point["step"])
+            values.append(value)
+
         session = self.workspace.db_manager.get_session()
         try:
-            ancestors = []
-            current_ids = [self.id]
-
-            for _ in range(depth):
-                if not current_ids:
-                    break
-
-                lineages = []
-                for cid in current_ids:
-                    lineages.extend(EntryLineageModel.find_by(session, child_id=cid))
-
-                parent_ids = [lineage.parent_id for lineage in lineages]
-                if parent_ids:
-                    entries = []
-                    for pid in parent_ids:
-                        e = EntryModel.get_by_id(session, pid)
-                        if e:
-                            entries.append({
-                                "id": e.id,
-                                "page_id": e.page_id,
-                                "entry_type": e.entry_type,
-                                "title": e.title,
-                                "created_at": e.created_at.isoformat() if e.created_at else None,
-                                "status": e.status,
-                                "parent_id": e.parent_id,
-                                "inputs": json.loads(e.inputs) if e.inputs else {},
-                                "outputs": json.loads(e.outputs) if e.outputs else {},
-                                "execution": json.loads(e.execution) if e.execution else {},
-                                "metrics": json.loads(e.metrics) if e.metrics else {},
-                                "metadata": json.loads(e.metadata_) if e.metadata_ else {},
-                                "tags": [et.tag.name for et in e.tags] if e.tags else [],
-                            })
-                    ancestors.extend(entries)
-                    current_ids = parent_ids
-                else:
-                    break
-
-            # Get descendants
-            descendants = []
-            current_ids = [self.id]
-
-            for _ in range(depth):
-                if not current_ids:
-                    break
-
-                lineages = []
-                for cid in current_ids:
-                    lineages.extend(EntryLineageModel.find_by(session, parent_id=cid))
-
-                child_ids = [lineage.child_id for lineage in lineages]
-                if child_ids:
-                    entries = []
-                    for cid in child_ids:
-                        e = EntryModel.get_by_id(session, cid)
-                        if e:
-                            entries.append({
-                                "id": e.id,
-                                "page_id": e.page_id,
-                                "entry_type": e.entry_type,
-                                "title": e.title,
-                                "created_at": e.created_at.isoformat() if e.created_at else None,
-                                "status": e.status,
-                                "parent_id": e.parent_id,
-                                "inputs": json.loads(e.inputs) if e.inputs else {},
-                                "outputs": json.loads(e.outputs) if e.outputs else {},
-                                "execution": json.loads(e.execution) if e.execution else {},
-                                "metrics": json.loads(e.metrics) if e.metrics else {},
-                                "metadata": json.loads(e.metadata_) if e.metadata_ else {},
-                                "tags": [et.tag.name for et in e.tags] if e.tags else [],
-                            })
-                    descendants.extend(entries)
-                    current_ids = child_ids
-                else:
-                    break
+            # Insert first: it takes the write lock before the summaries are read
+            self.workspace.db_manager.insert_metric_points(session, self.id, points)
+            entry = EntryModel.get_by_id(session, self.id)
+            if entry is None:
+                session.rollback()
+                raise ValueError(f"Entry not found: {self.id}")
+            metrics = json.loads(entry.metrics or "{}")
+            series = metrics.setdefault(SERIES_KEY, {})
+            for key, (steps, values) in by_key.items():
+                series[key] = summarize(steps, values, series.get(key))
+            entry.update(session, validate_fk=False, metrics=json.dumps(metrics))
+            session.commit()
         finally:
             session.close()
 
-        return {
-            "ancestors": ancestors,
-            "descendants": descendants,
-            "entry": self.to_dict(),
-        }
+        self.metrics = metrics
+        return series
+
+    def get_metric_series(
+        self,
+        keys: Optional[list[str]] = None,
+        step_from: Optional[int] = None,
+        step_to: Optional[int] = None,
+        max_points: Optional[int] = None,
+        method: str = "lttb",
+    ) -> dict[str, dict]:
+        """Get metric series as columns, optionally downsampled for charts.
+
+        Args:
+            keys: Series to get; all by default
+            step_from: First step to include
+            step_to: Last step to include
+            max_points: Downsample each series to about this many points
+            method: "lttb" to keep the shape of the line, "minmax" to keep
+                the extremes of each bucket
+
+        Returns:
+            Key -> {"step": [...], "value": [...], "timestamp": [...],
+            "count": points before downsampling}; the columns convert
+            directly with numpy.asarray
+        """
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unknown downsampling method: {method} (choose from lttb, minmax)")
+        series = self.workspace.db_manager.get_metric_series(self.id, keys, step_from, step_to)
+        for columns in series.values():
+            columns["count"] = len(columns["step"])
+            if max_points is not None:
+                kept = downsample(columns["step"], columns["value"], max_points, method)
+                if len(kept) < columns["count"]:
+                    for name in ("step", "value", "timestamp"):
+                        columns[name] = [columns[name][i] for i in kept]
+        return series
+
+    def get_lineage(self, depth: int = 3) -> dict:
+        """Get lineage graph for this entry.
+
+        See DatabaseManager.get_lineage for the shape of the result.
+        """
+        lineage = self.workspace.db_manager.get_lineage(self.id, depth)
+        return {**lineage, "entry": self.to_dict()}
 
     def create_variation(
         self,
@@ -413,17 +582,7 @@ class Entry:
         session = self.workspace.db_manager.get_session()
         try:
             page_model = PageModel.get_by_id(session, self.page_id)
-            page_data = {
-                "id": page_model.id,
-                "notebook_id": page_model.notebook_id,
-                "title": page_model.title,
-                "date": page_model.date.isoformat() if page_model.date else None,
-                "created_at": page_model.created_at.isoformat() if page_model.created_at else None,
-                "updated_at": page_model.updated_at.isoformat() if page_model.updated_at else None,
-                "narrative": json.loads(page_model.narrative) if page_model.narrative else {},
-                "tags": [pt.tag.name for pt in page_model.tags] if page_model.tags else [],
-                "metadata": json.loads(page_model.metadata_) if page_model.metadata_ else {},
-            }
+            page_data = page_to_dict(page_model)
         finally:
             session.close()
 
@@ -448,13 +607,14 @@ class Entry:
         try:
             EntryLineageModel.create(
                 session,
-                validate_fk=True,
+                validate_fk=False,
                 parent_id=self.id,
                 child_id=variation.id,
                 relationship_type="variation_of",
                 created_at=_now(),
             )
-            session.commit()
+            with foreign_key_errors(session):
+                session.commit()
         finally:
             session.close()
 
@@ -508,17 +668,7 @@ class Entry:
         try:
             page = PageModel.get_by_id(session, self.page_id)
             if page:
-                return Page.from_dict(self.workspace, {
-                    "id": page.id,
-                    "notebook_id": page.notebook_id,
-                    "title": page.title,
-                    "date": page.date.isoformat() if page.date else None,
-                    "created_at": page.created_at.isoformat() if page.created_at else None,
-                    "updated_at": page.updated_at.isoformat() if page.updated_at else None,
-                    "narrative": json.loads(page.narrative) if page.narrative else {},
-                    "tags": [pt.tag.name for pt in page.tags] if page.tags else [],
-                    "metadata": json.loads(page.metadata_) if page.metadata_ else {},
-                })
+                return Page.from_dict(self.workspace, page_to_dict(page))
             raise ValueError(f"Page {self.page_id} not found")
         finally:
             session.close()
@@ -1,6 +1,7 @@
 """Git operations manager for Lab Notebook."""
 
 import json
+import threading
 from pathlib import Path
 from typing import Optional
 
@@ -12,22 +13,56 @@ try:
 except ImportError:
     GIT_AVAILABLE = False
 
+# Paths per `git add` invocation when committing many files
+GIT_ADD_BATCH_SIZE = 1000
+
 
 class GitManager:
     """Manager for Git operations on notebook structure."""
 
-    def __init__(self, git_path: Path):
-        """Initialize the Git manager."""
+    def __init__(
+        self,
+        git_path: Path,
+        commit_window: Optional[float] = None,
+        max_batch_size: int = 100,
+    ):
+        """Initialize the Git manager.
+
+        Args:
+            git_path: Path to the Git repository.
+            commit_window: Seconds to coalesce changes before committing them
+                in a background thread. None or 0 commits every change
+                synchronously.
+            max_batch_size: Number of pending changed paths that triggers an
+                immediate commit in batched mode.
+        """
         self.git_path = git_path
         self.repo: Optional[Repo] = None
+        self.commit_window = commit_window
+        self.max_batch_size = max_batch_size
+
+        self._lock = threading.RLock()
+        self._pending: dict[str, bool] = {}  # relative path -> add (True) / remove (False)
+        self._pending_messages: list[str] = []
+        self._timer: Optional[threading.Timer] = None
+
+        # Counters
+        self.queued_changes = 0
+        self.committed_changes = 0
+        self.commits = 0
 
     @classmethod
-    def initialize(cls, git_path: Path) -> "GitManager":
+    def initialize(cls, git_path: Path, **options) -> "GitManager":
         """Initialize a new Git repository."""
-        manager = cls(git_path)
+        manager = cls(git_path, **options)
         manager._init_repo()
         return manager
 
+    @property
+    def batched(self) -> bool:
+        """Whether changes are coalesced into background commits."""
+        return bool(self.commit_window)
+
     def _init_repo(self):
         """Initialize or load the Git repository."""
         if not GIT_AVAILABLE:
@@ -63,127 +98,211 @@ class GitManager:
             except InvalidGitRepositoryError:
                 self._init_repo()
 
+    def close(self):
+        """Commit pending changes and release the Git repository handle."""
+        self.flush()
+        if self.repo is not None:
+            self.repo.close()
+            self.repo = None
+
+    def flush(self) -> int:
+        """Commit all pending changes now.
+
+        Returns:
+            Number of changed paths committed.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            return self._commit_pending()
+
+    def stats(self) -> dict:
+        """Get commit pipeline counters."""
+        with self._lock:
+            return {
+                "batched": self.batched,
+                "pending_changes": len(self._pending),
+                "queued_changes": self.queued_changes,
+                "committed_changes": self.committed_changes,
+                "commits": self.commits,
+            }
+
+    def _stage(
+        self,
+        message: str,
+        add: Optional[list[Path]] = None,
+        remove: Optional[list[Path]] = None,
+    ):
+        """Queue changed paths for commit.
+
+        In synchronous mode the change is committed immediately. In batched
+        mode it is committed when the commit window elapses or the batch
+        fills up, whichever comes first. Callers hold the lock while writing
+        files so a background commit never sees a partially written file.
+        """
+        with self._lock:
+            for path in add or []:
+                self._pending[str(path.relative_to(self.git_path))] = True
+            for path in remove or []:
+                self._pending[str(path.relative_to(self.git_path))] = False
+            self._pending_messages.append(message)
+            self.queued_changes += len(add or []) + len(remove or [])
+
+            if not self.batched or len(self._pending) >= self.max_batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.commit_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _commit_pending(self) -> int:
+        """Write pending changes to the index and commit. Caller holds the lock."""
+        if not self._pending_messages or not self.repo:
+            self._pending.clear()
+            self._pending_messages.clear()
+            return 0
+
+        to_add = [path for path, added in self._pending.items() if added]
+        # Paths created and deleted within one batch were never indexed
+        to_remove = [
+            path
+            for path, added in self._pending.items()
+            if not added and (path, 0) in self.repo.index.entries
+        ]
+
+        # IndexFile.add runs a subprocess per path; `git add` hashes a whole
+        # batch of paths in one go
+        for i in range(0, len(to_add), GIT_ADD_BATCH_SIZE):
+            self.repo.git.add("--", *to_add[i : i + GIT_ADD_BATCH_SIZE])
+        # Reread the index `git add` wrote
+        index = self.repo.index
+        if to_remove:
+            index.remove(to_remove)
+
+        if len(self._pending_messages) == 1:
+            message = self._pending_messages[0]
+        else:
+            summary = "\n".join(f"- {msg}" for msg in self._pending_messages)
+            message = f"Batch commit: {len(self._pending_messages)} changes\n\n{summary}"
+        index.commit(message)
+
+        committed = len(self._pending)
+        self.committed_changes += committed
+        self.commits += 1
+        self._pending.clear()
+        self._pending_messages.clear()
+        return committed
+
     def create_notebook(self, notebook_id: str, notebook_data: dict):
         """Create a notebook in Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        notebook_dir = self.git_path / "notebooks" / notebook_id
-        notebook_dir.mkdir(parents=True, exist_ok=True)
-
-        # Write meta.json
-        meta_path = notebook_dir / "meta.json"
-        with open(meta_path, "w") as f:
-            json.dump(notebook_data, f, indent=2, default=str)
-
-        # Create pages directory
-        pages_dir = notebook_dir / "pages"
-        pages_dir.mkdir(exist_ok=True)
-        (pages_dir / ".gitkeep").touch()
-
-        # Commit
-        self.repo.index.add(
-            [
-                str(meta_path.relative_to(self.git_path)),
-                str((pages_dir / ".gitkeep").relative_to(self.git_path)),
-            ]
-        )
-        self.repo.index.commit(
-            f"Create notebook: {notebook_data.get('title', notebook_id)}"
-        )
+        with self._lock:
+            notebook_dir = self.git_path / "notebooks" / notebook_id
+            notebook_dir.mkdir(parents=True, exist_ok=True)
+
+            # Write meta.json
+            meta_path = notebook_dir / "meta.json"
+            with open(meta_path, "w") as f:
+                json.dump(notebook_data, f, indent=2, default=str)
+
+            # Create pages directory
+            pages_dir = notebook_dir / "pages"
+            pages_dir.mkdir(exist_ok=True)
+            (pages_dir / ".gitkeep").touch()
+
+            # Commit
+            self._stage(
+                f"Create notebook: {notebook_data.get('title', notebook_id)}",
+                add=[meta_path, pages_dir / ".gitkeep"],
+            )
 
     def update_notebook(self, notebook_id: str, notebook_data: dict):
         """Update a notebook in Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        meta_path = self.git_path / "notebooks" / notebook_id / "meta.json"
-        if meta_path.exists():
-            with open(meta_path, "w") as f:
-                json.dump(notebook_data, f, indent=2, default=str)
+        with self._lock:
+            meta_path = self.git_path / "notebooks" / notebook_id / "meta.json"
+            if meta_path.exists():
+                with open(meta_path, "w") as f:
+                    json.dump(notebook_data, f, indent=2, default=str)
 
-            self.repo.index.add([str(meta_path.relative_to(self.git_path))])
-            self.repo.index.commit(
-                f"Update notebook: {notebook_data.get('title', notebook_id)}"
-            )
+                self._stage(
+                    f"Update notebook: {notebook_data.get('title', notebook_id)}",
+                    add=[meta_path],
+                )
 
     def delete_notebook(self, notebook_id: str):
         """Delete a notebook from Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        notebook_dir = self.git_path / "notebooks" / notebook_id
-        if notebook_dir.exists():
-            # Remove all files in the directory
-            for item in notebook_dir.rglob("*"):
-                if item.is_file():
-                    self.repo.index.remove([str(item.relative_to(self.git_path))])
-
-            self.repo.index.commit(f"Delete notebook: {notebook_id}")
+        with self._lock:
+            notebook_dir = self.git_path / "notebooks" / notebook_id
+            if notebook_dir.exists():
+                # Remove all files in the directory
+                files = [item for item in notebook_dir.rglob("*") if item.is_file()]
+                self._stage(f"Delete notebook: {notebook_id}", remove=files)
 
     def create_page(self, notebook_id: str, page_id: str, page_data: dict):
         """Create a page in Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        page_dir = self.git_path / "notebooks" / notebook_id / "pages" / page_id
-        page_dir.mkdir(parents=True, exist_ok=True)
-
-        # Write meta.json
-        meta_path = page_dir / "meta.json"
-        with open(meta_path, "w") as f:
-            json.dump(page_data, f, indent=2, default=str)
-
-        # Create entries directory
-        entries_dir = page_dir / "entries"
-        entries_dir.mkdir(exist_ok=True)
-        (entries_dir / ".gitkeep").touch()
-
-        # Commit
-        self.repo.index.add(
-            [
-                str(meta_path.relative_to(self.git_path)),
-                str((entries_dir / ".gitkeep").relative_to(self.git_path)),
-            ]
-        )
-        self.repo.index.commit(f"Create page: {page_data.get('title', page_id)}")
+        with self._lock:
+            page_dir = self.git_path / "notebooks" / notebook_id / "pages" / page_id
+            page_dir.mkdir(parents=True, exist_ok=True)
+
+            # Write meta.json
+            meta_path = page_dir / "meta.json"
+            with open(meta_path, "w") as f:
+                json.dump(page_data, f, indent=2, default=str)
+
+            # Create entries directory
+            entries_dir = page_dir / "entries"
+            entries_dir.mkdir(exist_ok=True)
+            (entries_dir / ".gitkeep").touch()
+
+            # Commit
+            self._stage(
+                f"Create page: {page_data.get('title', page_id)}",
+                add=[meta_path, entries_dir / ".gitkeep"],
+            )
 
     def update_page(self, notebook_id: str, page_id: str, page_data: dict):
         """Update a page in Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        meta_path = (
-            self.git_path / "notebooks" / notebook_id / "pages" / page_id / "meta.json"
-        )
-        if meta_path.exists():
-            with open(meta_path, "w") as f:
-                json.dump(page_data, f, indent=2, default=str)
+        with self._lock:
+            meta_path = (
+                self.git_path / "notebooks" / notebook_id / "pages" / page_id / "meta.json"
+            )
+            if meta_path.exists():
+                with open(meta_path, "w") as f:
+                    json.dump(page_data, f, indent=2, default=str)
 
-            self.repo.index.add([str(meta_path.relative_to(self.git_path))])
-            self.repo.index.commit(f"Update page: {page_data.get('title', page_id)}")
+                self._stage(
+                    f"Update page: {page_data.get('title', page_id)}", add=[meta_path]
+                )
 
     def delete_page(self, notebook_id: str, page_id: str):
         """Delete a page from Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        page_dir = self.git_path / "notebooks" / notebook_id / "pages" / page_id
-        if page_dir.exists():
-            for item in page_dir.rglob("*"):
-                if item.is_file():
-                    self.repo.index.remove([str(item.relative_to(self.git_path))])
-
-            self.repo.index.commit(f"Delete page: {page_id}")
-
-    def commit_entry(
-        self, notebook_id: str, page_id: str, entry_id: str, entry_data: dict
-    ):
-        """Commit an entry to Git."""
-        if not GIT_AVAILABLE or not self.repo:
-            return
+        with self._lock:
+            page_dir = self.git_path / "notebooks" / notebook_id / "pages" / page_id
+            if page_dir.exists():
+                files = [item for item in page_dir.rglob("*") if item.is_file()]
+                self._stage(f"Delete page: {page_id}", remove=files)
 
-        entry_path = (
+    def _entry_path(self, notebook_id: str, page_id: str, entry_id: str) -> Path:
+        """Get the path of an entry manifest."""
+        return (
             self.git_path
             / "notebooks"
             / notebook_id
@@ -192,13 +311,46 @@ class GitManager:
             / "entries"
             / f"{entry_id}.json"
         )
-        entry_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(entry_path, "w") as f:
-            json.dump(entry_data, f, indent=2, default=str)
+    def commit_entry(
+        self, notebook_id: str, page_id: str, entry_id: str, entry_data: dict
+    ):
+        """Commit an entry to Git."""
+        if not GIT_AVAILABLE or not self.repo:
+            return
+
+        with self._lock:
+            entry_path = self._entry_path(notebook_id, page_id, entry_id)
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(entry_path, "w") as f:
+                json.dump(entry_data, f, indent=2, default=str)
+
+            self._stage(
+                f"Add entry: {entry_data.get('title', entry_id)}", add=[entry_path]
+            )
+
+    def commit_entries(self, entries: list[tuple[str, str, dict]], message: str):
+        """Commit many entries to Git in a single commit.
+
+        Args:
+            entries: (notebook ID, page ID, entry data) tuples
+            message: Commit message
+        """
+        if not GIT_AVAILABLE or not self.repo or not entries:
+            return
+
+        with self._lock:
+            paths = []
+            for notebook_id, page_id, entry_data in entries:
+                entry_path = self._entry_path(notebook_id, page_id, entry_data["id"])
+                entry_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(entry_path, "w") as f:
+                    json.dump(entry_data, f, indent=2, default=str)
+                paths.append(entry_path)
 
-        self.repo.index.add([str(entry_path.relative_to(self.git_path))])
-        self.repo.index.commit(f"Add entry: {entry_data.get('title', entry_id)}")
+            self._stage(message, add=paths)
+            self.flush()
 
     def update_entry(
         self, notebook_id: str, page_id: str, entry_id: str, entry_data: dict
@@ -207,38 +359,25 @@ class GitManager:
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        entry_path = (
-            self.git_path
-            / "notebooks"
-            / notebook_id
-            / "pages"
-            / page_id
-            / "entries"
-            / f"{entry_id}.json"
-        )
+        with self._lock:
+            entry_path = self._entry_path(notebook_id, page_id, entry_id)
 
-        if entry_path.exists():
-            with open(entry_path, "w") as f:
-                json.dump(entry_data, f, indent=2, default=str)
+            if entry_path.exists():
+                with open(entry_path, "w") as f:
+                    json.dump(entry_data, f, indent=2, default=str)
 
-            self.repo.index.add([str(entry_path.relative_to(self.git_path))])
-            self.repo.index.commit(f"Update entry: {entry_data.get('title', entry_id)}")
+                self._stage(
+                    f"Update entry: {entry_data.get('title', entry_id)}",
+                    add=[entry_path],
+                )
 
     def delete_entry(self, notebook_id: str, page_id: str, entry_id: str):
         """Delete an entry from Git."""
         if not GIT_AVAILABLE or not self.repo:
             return
 
-        entry_path = (
-            self.git_path
-            / "notebooks"
-            / notebook_id
-            / "pages"
-            / page_id
-            / "entries"
-            / f"{entry_id}.json"
-        )
+        with self._lock:
+            entry_path = self._entry_path(notebook_id, page_id, entry_id)
 
-        if entry_path.exists():
-            self.repo.index.remove([str(entry_path.relative_to(self.git_path))])
-            self.repo.index.commit(f"Delete entry: {entry_id}")
+            if entry_path.exists():
+                self._stage(f"Delete entry: {entry_id}", remove=[entry_path])
@@ -0,0 +1,784 @@
+"""Background maintenance of the artifact store."""
+
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional, Union
+
+from sqlalchemy import func, update
+
+from codex.core.chunking import ChunkStore, read_manifest
+from codex.core.storage import (
+    ARCHIVE_CODECS,
+    DEFAULT_ARCHIVE_CODEC,
+    UPLOAD_PREFIX,
+    _open_decompressed,
+)
+from codex.db.models import Artifact, Blob, Entry, Notebook, Page
+
+if TYPE_CHECKING:
+    from codex.core.workspace import Workspace
+
+logger = logging.getLogger(__name__)
+
+# Artifact rows read per round trip, and archived blobs per UPDATE commit
+BATCH_SIZE = 500
+
+# Files younger than this are never collected, so blobs written by uploads
+# whose artifact row isn't committed yet survive
+DEFAULT_GC_GRACE_PERIOD = 24 * 60 * 60
+
+# Read buffer for re-hashing blobs; large reads keep big stores disk bound
+VERIFY_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Verifier state, kept next to the blob store
+VERIFY_STATE_FILE = "verify-state.json"
+
+# Concurrent size lookups against a remote blob backend
+REMOTE_CHECK_THREADS = 16
+
+_HEX_CHARS = set("0123456789abcdef")
+_CODEC_SUFFIXES = {suffix: codec for codec, suffix in ARCHIVE_CODECS.items()}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class PeriodicTask:
+    """Run a function every ``interval`` seconds on a daemon thread."""
+
+    def __init__(self, interval: float, func: Callable[[], object], name: str = "maintenance"):
+        self.interval = interval
+        self.func = func
+        self.name = name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start running; the first run happens after one interval."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop running, waiting for a run in progress to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+
+
+class Archiver:
+    """Compress blobs that have outlived their notebook's archive threshold.
+
+    Each notebook's settings decide what happens to its artifacts:
+    ``auto_archive_days`` is the age after which they are archived, and
+    ``archive_strategy`` is ``"compress"`` (the archiver's codec), the name
+    of a codec in ARCHIVE_CODECS, or ``"none"``.
+    """
+
+    def __init__(self, workspace: "Workspace", codec: str = DEFAULT_ARCHIVE_CODEC):
+        self.workspace = workspace
+        self.codec = codec
+
+    def _notebook_policies(self, session, older_than_days: Optional[float], now: datetime):
+        """Map notebook ID to (cutoff, codec) for notebooks that archive."""
+        policies = {}
+        for notebook_id, settings in session.query(Notebook.id, Notebook.settings):
+            settings = json.loads(settings) if settings else {}
+            strategy = settings.get("archive_strategy")
+            codec = self.codec if strategy == "compress" else strategy
+            days = settings.get("auto_archive_days")
+            if older_than_days is not None:
+                days = older_than_days
+            if codec in ARCHIVE_CODECS and days is not None:
+                policies[notebook_id] = (now - timedelta(days=days), codec)
+        return policies
+
+    def run(self, older_than_days: Optional[float] = None, dry_run: bool = False) -> dict:
+        """Archive every blob that is due.
+
+        Args:
+            older_than_days: Override every notebook's ``auto_archive_days``
+            dry_run: Only count the blobs that would be archived
+
+        Returns:
+            Report with the number of blobs archived, left uncompressed
+            because they didn't shrink, and the bytes reclaimed
+        """
+        storage = self.workspace.storage_manager
+        db = self.workspace.db_manager
+        report = {
+            "archived": 0,
+            "incompressible": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "dry_run": dry_run,
+        }
+
+        read_session = db.get_session()
+        write_session = db.get_session()
+        try:
+            policies = self._notebook_policies(read_session, older_than_days, _now())
+            rows = (
+                read_session.query(Artifact.hash, Artifact.created_at, Page.notebook_id)
+                .join(Entry, Artifact.entry_id == Entry.id)
+                .join(Page, Entry.page_id == Page.id)
+                .filter(Artifact.archived.is_not(True))
+                .yield_per(BATCH_SIZE)
+            )
+
+            pending = 0
+            for hash_value, created_at, notebook_id in rows:
+                policy = policies.get(notebook_id)
+                if policy is None or created_at >= policy[0]:
+                    continue
+
+                codec = policy[1]
+                already = storage.get_archived_path(hash_value)
+                if dry_run:
+                    if not already:
+                        report["archived"] += 1
+                        report["bytes_before"] += storage.get_size(hash_value) or 0
+                    continue
+
+                if already:
+                    # Compressed by an earlier run; only the rows are behind
+                    codec = already[1]
+                    archived_size = already[0].stat().st_size
+                else:
+                    if not storage.get_blob_path(hash_value).is_file():
+                        continue  # Missing, or packed and too small to bother
+                    size = storage.get_size(hash_value)
+                    archived_size = storage.archive(hash_value, codec)
+                    if archived_size is not None:
+                        report["archived"] += 1
+                        report["bytes_before"] += size
+                        report["bytes_after"] += archived_size
+
+                if archived_size is None:
+                    # Kept as-is, but marked so it isn't recompressed every run
+                    report["incompressible"] += 1
+                    values = {"archived": True, "archive_strategy": None}
+                else:
+                    values = {
+                        "archived": True,
+                        "archive_strategy": codec,
+                        "size_bytes": archived_size,
+                    }
+                write_session.execute(
+                    update(Artifact)
+                    .where(Artifact.hash == hash_value)
+                    .values(
+                        original_size_bytes=func.coalesce(
+                            Artifact.original_size_bytes, Artifact.size_bytes
+                        ),
+                        **values,
+                    )
+                )
+                pending += 1
+                if pending >= BATCH_SIZE:
+                    write_session.commit()
+                    pending = 0
+            write_session.commit()
+        finally:
+            write_session.close()
+            read_session.close()
+
+        # A dry run can't know the compressed sizes
+        report["bytes_reclaimed"] = (
+            None if dry_run else report["bytes_before"] - report["bytes_after"]
+        )
+        if not dry_run:
+            logger.info(
+                "Archived %d blob(s), reclaimed %d bytes",
+                report["archived"],
+                report["bytes_reclaimed"],
+            )
+        return report
+
+
+class _SortedKeys:
+    """Membership tests against a sorted stream, for keys checked in ascending order."""
+
+    def __init__(self, keys: Iterator[str]):
+        self._keys = keys
+        self._current = next(keys, None)
+
+    def __contains__(self, key: str) -> bool:
+        while self._current is not None and self._current < key:
+            self._current = next(self._keys, None)
+        return self._current == key
+
+
+class _ShardWalker:
+    """Walk the blob and thumbnail trees shard by shard in hash order.
+
+    The trees are sharded by the first two hex digits of the hash. Shards
+    are listed in parallel, a few ahead of the consumer, so memory stays
+    bounded by a handful of shard listings however many blobs there are.
+    Subclasses set ``workspace`` and ``workers``.
+    """
+
+    workspace: "Workspace"
+    workers: int
+
+    def _shards(self) -> list[str]:
+        storage = self.workspace.storage_manager
+        names = set()
+        for root in (storage.blobs_path, storage.thumbnails_path):
+            if root.is_dir():
+                names.update(
+                    entry.name
+                    for entry in os.scandir(root)
+                    if entry.is_dir() and len(entry.name) == 2 and set(entry.name) <= _HEX_CHARS
+                )
+        return sorted(names)
+
+    def _list_shard(self, shard: str) -> list[tuple[str, Path, os.stat_result]]:
+        """List blobs, thumbnails and temp files in a shard, sorted by hash."""
+        storage = self.workspace.storage_manager
+        files = []
+        for root in (storage.blobs_path / shard, storage.thumbnails_path / shard):
+            if not root.is_dir():
+                continue
+            for subdir in os.scandir(root):
+                if not subdir.is_dir():
+                    continue
+                for entry in os.scandir(subdir.path):
+                    if entry.is_file(follow_symlinks=False):
+                        files.append((entry.name[:64], Path(entry.path), entry.stat()))
+        files.sort(key=lambda file: file[0])
+        return files
+
+    def _iter_listings(self):
+        """Yield shard listings in order, listing a few shards ahead."""
+        shards = iter(self._shards())
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            ahead = deque(pool.submit(self._list_shard, s) for s in islice(shards, self.workers * 2))
+            while ahead:
+                listing = ahead.popleft().result()
+                for shard in islice(shards, 1):
+                    ahead.append(pool.submit(self._list_shard, shard))
+                yield listing
+
+
+class GarbageCollector(_ShardWalker):
+    """Collection of blobs no artifact references.
+
+    Blobs whose reference count dropped to zero more than the grace period
+    ago are deleted first, straight from the blobs table. A full run then
+    sweeps the store for anything else: shard listings are merged in hash
+    order against a single query streaming ``blobs.hash`` in key order,
+    and the pack index is swept the same way.
+    """
+
+    def __init__(
+        self,
+        workspace: "Workspace",
+        grace_period: float = DEFAULT_GC_GRACE_PERIOD,
+        workers: int = 4,
+    ):
+        """Initialize the collector.
+
+        Args:
+            workspace: Workspace to collect
+            grace_period: Seconds a file must be unmodified before it can
+                be removed
+            workers: Threads listing shards
+        """
+        self.workspace = workspace
+        self.grace_period = grace_period
+        self.workers = workers
+
+    def _live_hashes(self, session) -> Iterator[str]:
+        """Stream the hex digests of all known blobs in sorted order.
+
+        Blobs released within the grace period are still listed.
+        """
+        query = session.query(Blob.hash).order_by(Blob.hash).yield_per(BATCH_SIZE)
+        return (row.hash[7:] for row in query)
+
+    def _release_unreferenced(self, session, cutoff: float, dry_run: bool, report: dict):
+        """Delete blobs whose last reference went away before the cutoff."""
+        storage = self.workspace.storage_manager
+        released_before = datetime.fromtimestamp(cutoff, timezone.utc).replace(tzinfo=None)
+        rows = (
+            session.query(Blob.hash, Blob.size_bytes)
+            .filter(Blob.refcount <= 0, Blob.released_at < released_before)
+            .all()
+        )
+        for hash_value, size_bytes in rows:
+            # Storing the same content again refreshes the stored time, so a
+            # blob about to be re-attached is left for the next run
+            stored_at = storage.stored_at(hash_value)
+            if stored_at is not None and stored_at >= cutoff:
+                continue
+            report["released"] += 1
+            if dry_run:
+                report["bytes_reclaimed"] += size_bytes
+                continue
+            deleted = session.query(Blob).filter(
+                Blob.hash == hash_value, Blob.refcount <= 0
+            ).delete(synchronize_session=False)
+            session.commit()
+            if deleted:
+                storage.delete(hash_value)
+                report["bytes_reclaimed"] += size_bytes
+
+    def run(self, dry_run: bool = False, full: bool = True) -> dict:
+        """Remove unreferenced blobs, their thumbnails and stale temp files.
+
+        Args:
+            dry_run: Only count what would be removed
+            full: Also sweep the store for files no blob row accounts for,
+                such as leftovers of interrupted uploads; otherwise only
+                released blobs are removed
+
+        Returns:
+            Report with the files scanned and removed, and the bytes reclaimed
+        """
+        storage = self.workspace.storage_manager
+        cutoff = time.time() - self.grace_period
+        report = {
+            "scanned": 0,
+            "blobs": 0,
+            "thumbnails": 0,
+            "temp_files": 0,
+            "packed": 0,
+            "chunks": 0,
+            "released": 0,
+            "bytes_reclaimed": 0,
+            "dry_run": dry_run,
+        }
+
+        def remove(path: Path, st: os.stat_result, kind: str):
+            if not dry_run:
+                # Chunk manifests also hold references on their chunks
+                if path.name.endswith(".chunks"):
+                    storage.release_manifest(path)
+                path.unlink(missing_ok=True)
+            report[kind] += 1
+            report["bytes_reclaimed"] += st.st_size
+
+        session = self.workspace.db_manager.get_session()
+        try:
+            self._release_unreferenced(session, cutoff, dry_run, report)
+        finally:
+            session.close()
+
+        if not full:
+            chunks = storage.chunks.collect(self.grace_period, dry_run=dry_run)
+            report["chunks"] = chunks["chunks"]
+            report["bytes_reclaimed"] += chunks["bytes_reclaimed"]
+            self._log(report)
+            return report
+
+        # Interrupted uploads are spooled at the root of the blob store
+        if storage.blobs_path.is_dir():
+            for entry in os.scandir(storage.blobs_path):
+                if entry.name.startswith(UPLOAD_PREFIX) and entry.is_file():
+                    st = entry.stat()
+                    report["scanned"] += 1
+                    if st.st_mtime < cutoff:
+                        remove(Path(entry.path), st, "temp_files")
+
+        session = self.workspace.db_manager.get_session()
+        try:
+            live = _SortedKeys(self._live_hashes(session))
+            for listing in self._iter_listings():
+                for key, path, st in listing:
+                    report["scanned"] += 1
+                    if st.st_mtime >= cutoff:
+                        continue
+                    if path.name.startswith(UPLOAD_PREFIX) or path.suffix == ".tmp":
+                        remove(path, st, "temp_files")
+                        continue
+                    if len(key) != 64 or not set(key) <= _HEX_CHARS:
+                        continue  # Not ours; leave it alone
+                    if key in live:
+                        continue
+                    in_thumbnails = path.is_relative_to(storage.thumbnails_path)
+                    remove(path, st, "thumbnails" if in_thumbnails else "blobs")
+
+            # Packed blobs are dropped from the pack index, then packs that
+            # are mostly dead space are rewritten
+            live = _SortedKeys(self._live_hashes(session))
+            for key, length, stored_at in storage.packs.iter_entries():
+                report["scanned"] += 1
+                if stored_at >= cutoff or key in live:
+                    continue
+                if not dry_run:
+                    storage.packs.remove(key)
+                report["packed"] += 1
+        finally:
+            session.close()
+
+        # Chunks no manifest references any more, including those released above
+        chunks = storage.chunks.collect(self.grace_period, dry_run=dry_run)
+        report["chunks"] = chunks["chunks"]
+        report["bytes_reclaimed"] += chunks["bytes_reclaimed"]
+        if not dry_run:
+            report["bytes_reclaimed"] += storage.packs.repack()["bytes_reclaimed"]
+
+        self._log(report)
+        return report
+
+    def _log(self, report: dict):
+        if not report["dry_run"]:
+            logger.info(
+                "Collected %d released blob(s), %d stray blob(s), %d packed blob(s), "
+                "%d thumbnail(s) and %d temp file(s), reclaimed %d bytes",
+                report["released"],
+                report["blobs"],
+                report["packed"],
+                report["thumbnails"],
+                report["temp_files"],
+                report["bytes_reclaimed"],
+            )
+
+
+# Chunk stores opened by hashing workers, one per store
+_chunk_stores: dict[Path, ChunkStore] = {}
+
+
+def hash_blob_file(path: Path, chunks_root: Optional[Path] = None) -> tuple[str, int]:
+    """Hash the original bytes of a stored blob file.
+
+    Archived blobs are decompressed and chunk manifests are reassembled
+    from ``chunks_root`` as they are read. Runs in worker processes, so it
+    must stay a picklable module-level function.
+
+    Returns:
+        The hex SHA256 digest and the number of bytes hashed
+    """
+    if path.suffix == ".chunks":
+        entries = read_manifest(path)
+        if entries is None:
+            raise FileNotFoundError(path)
+        store = _chunk_stores.get(chunks_root)
+        if store is None:
+            store = _chunk_stores[chunks_root] = ChunkStore(chunks_root)
+        stream = store.reader(entries)
+    elif path.suffix in _CODEC_SUFFIXES:
+        stream = _open_decompressed(path, _CODEC_SUFFIXES[path.suffix])
+    else:
+        stream = open(path, "rb", buffering=0)
+
+    digest = sha256()
+    total = 0
+    buffer = bytearray(VERIFY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with stream:
+        while n := stream.readinto(buffer):
+            digest.update(view[:n])
+            total += n
+    return digest.hexdigest(), total
+
+
+def _iso_timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value, timezone.utc).isoformat() if value else None
+
+
+class Verifier(_ShardWalker):
+    """Check that stored blobs still match their hashes and the database.
+
+    Blob files are re-hashed in a process pool, fed in hash order a few
+    jobs per worker ahead; packed blobs are small and hashed in process.
+    A second, listing-only pass merges the blob tree and the pack index
+    against ``artifacts.hash`` to find rows without a blob, image
+    artifacts without a thumbnail and blobs no row references.
+
+    Incremental runs only re-hash blobs written since the last clean run,
+    recorded in a state file next to the blob store. The cross-check is
+    cheap and always covers everything; with a blob backend it also looks
+    up the size of every blob there.
+    """
+
+    def __init__(self, workspace: "Workspace", workers: Optional[int] = None):
+        """Initialize the verifier.
+
+        Args:
+            workspace: Workspace to verify
+            workers: Processes hashing blobs; None uses one per CPU, 0
+                hashes inline
+        """
+        self.workspace = workspace
+        self.hash_workers = (os.cpu_count() or 1) if workers is None else workers
+        self.workers = max(1, min(self.hash_workers, 4))
+
+    @property
+    def state_path(self) -> Path:
+        """Path of the file recording the last clean run."""
+        return self.workspace.storage_manager.storage_path / VERIFY_STATE_FILE
+
+    def load_state(self) -> dict:
+        """Read the state left by the last clean run, if any."""
+        try:
+            return json.loads(self.state_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state: dict):
+        tmp_path = self.state_path.with_name(f"{VERIFY_STATE_FILE}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state, indent=2))
+        os.replace(tmp_path, self.state_path)
+
+    def _iter_blob_files(self, since: Optional[float], report: dict):
+        """Yield (hash, path) for blob files to re-hash, in hash order."""
+        storage = self.workspace.storage_manager
+        suffixes = ("", ".chunks", *_CODEC_SUFFIXES)
+        for listing in self._iter_listings():
+            for key, path, st in listing:
+                if path.is_relative_to(storage.thumbnails_path):
+                    continue
+                if len(key) != 64 or not set(key) <= _HEX_CHARS or path.name[64:] not in suffixes:
+                    continue  # Temp files and anything else that isn't a blob
+                if since is not None and st.st_mtime < since:
+                    report["skipped"] += 1
+                    continue
+                yield key, path
+
+    def _hash_all(self, jobs) -> Iterator[tuple[str, Path, Union[tuple[str, int], Exception]]]:
+        """Hash blob files, yielding (hash, path, result or error) in job order."""
+        chunks_root = self.workspace.storage_manager.chunks.root
+        if self.hash_workers == 0:
+            for key, path in jobs:
+                try:
+                    yield key, path, hash_blob_file(path, chunks_root)
+                except Exception as e:
+                    yield key, path, e
+            return
+
+        def result(job: tuple[str, Path, Future]):
+            key, path, future = job
+            try:
+                return key, path, future.result()
+            except Exception as e:
+                return key, path, e
+
+        # Spawned workers don't inherit the server's threads, locks or
+        # open database connections
+        with ProcessPoolExecutor(
+            max_workers=self.hash_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            pending = deque()
+            for key, path in jobs:
+                pending.append((key, path, pool.submit(hash_blob_file, path, chunks_root)))
+                if len(pending) >= self.hash_workers * 4:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+
+    def _iter_stored(self) -> Iterator[tuple[str, bool, bool]]:
+        """Yield (hash, has blob, has thumbnail) for everything stored, in hash order."""
+        storage = self.workspace.storage_manager
+
+        def files():
+            for listing in self._iter_listings():
+                for key, path, _ in listing:
+                    if len(key) != 64 or path.name.startswith(UPLOAD_PREFIX):
+                        continue
+                    if path.suffix == ".tmp":
+                        continue
+                    yield key, not path.is_relative_to(storage.thumbnails_path)
+
+        packed = ((key, True) for key, _, _ in storage.packs.iter_entries())
+        current = None
+        for key, is_blob in heapq.merge(files(), packed):
+            if current is not None and current[0] != key:
+                yield tuple(current)
+                current = None
+            if current is None:
+                current = [key, False, False]
+            current[1 if is_blob else 2] = True
+        if current is not None:
+            yield tuple(current)
+
+    def _iter_rows(self, session) -> Iterator[tuple[str, int, bool]]:
+        """Yield (hex digest, original size, is an image) for every artifact hash, in order."""
+        query = (
+            session.query(
+                Artifact.hash,
+                func.max(func.coalesce(Artifact.original_size_bytes, Artifact.size_bytes)),
+                func.max(Artifact.type.startswith("image/")),
+            )
+            .group_by(Artifact.hash)
+            .order_by(Artifact.hash)
+            .yield_per(BATCH_SIZE)
+        )
+        return (
+            (hash_value[7:], size, bool(is_image)) for hash_value, size, is_image in query
+        )
+
+    def _join(self, session, report: dict) -> Iterator[tuple[str, int, bool, bool, bool]]:
+        """Merge-join artifact rows against what is stored locally.
+
+        Yields (hash, size, is an image, has blob, has thumbnail) per row
+        and counts stored blobs no row references as orphaned.
+        """
+        rows = self._iter_rows(session)
+        stored = self._iter_stored()
+        row, item = next(rows, None), next(stored, None)
+        while row is not None or item is not None:
+            if item is None or (row is not None and row[0] < item[0]):
+                yield (*row, False, False)
+                row = next(rows, None)
+            elif row is None or item[0] < row[0]:
+                report["orphaned"] += 1
+                item = next(stored, None)
+            else:
+                yield (*row, item[1], item[2])
+                row, item = next(rows, None), next(stored, None)
+
+    def _with_remote_sizes(self, joined: Iterator[tuple]) -> Iterator[tuple]:
+        """Append each row's size in the blob backend (None if absent, or the error)."""
+        backend = self.workspace.storage_manager.backend
+
+        def result(pending_item):
+            item, future = pending_item
+            try:
+                return (*item, future.result())
+            except Exception as e:
+                return (*item, e)
+
+        with ThreadPoolExecutor(max_workers=REMOTE_CHECK_THREADS) as pool:
+            pending = deque()
+            for item in joined:
+                pending.append((item, pool.submit(backend.size, item[0])))
+                if len(pending) >= REMOTE_CHECK_THREADS * 4:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+
+    def run(self, since: Optional[float] = None, incremental: bool = False) -> dict:
+        """Verify the store.
+
+        Args:
+            since: Only re-hash blobs written after this Unix time
+            incremental: Only re-hash blobs written since the last clean
+                run; ignored when ``since`` is given
+
+        With a blob backend, the local blob directory is only a cache, so
+        every row is also looked up in the backend: blobs there with the
+        wrong size are corrupt, blobs neither there nor local are missing,
+        and local blobs never uploaded are listed as not uploaded.
+
+        Returns:
+            Report listing corrupt and unreadable blobs, artifacts whose
+            blob or thumbnail is missing, and counts of what was checked.
+            ``ok`` is False if any blob is corrupt, unreadable or missing.
+        """
+        storage = self.workspace.storage_manager
+        started = time.time()
+        if since is None and incremental:
+            since = self.load_state().get("verified_at")
+        report = {
+            "started_at": _iso_timestamp(started),
+            "since": _iso_timestamp(since),
+            "checked": 0,
+            "skipped": 0,
+            "bytes_hashed": 0,
+            "corrupt": [],
+            "unreadable": [],
+            "missing_blobs": [],
+            "missing_thumbnails": [],
+            "orphaned": 0,
+        }
+        if storage.backend is not None:
+            report["remote_checked"] = 0
+            report["not_uploaded"] = []
+
+        def check(key: str, location: str, result):
+            if isinstance(result, Exception):
+                report["unreadable"].append({"hash": key, "path": location, "error": str(result)})
+                return
+            digest, size = result
+            report["checked"] += 1
+            report["bytes_hashed"] += size
+            if digest != key:
+                report["corrupt"].append({"hash": key, "path": location, "actual": digest})
+
+        for key, path, result in self._hash_all(self._iter_blob_files(since, report)):
+            check(key, str(path), result)
+
+        for key, length, stored_at in storage.packs.iter_entries():
+            if since is not None and stored_at < since:
+                report["skipped"] += 1
+                continue
+            location = storage.packs.locate(key)
+            data = storage.packs.get(key)
+            if location is None or data is None:
+                continue  # Collected since it was listed
+            check(key, str(storage.packs.pack_path(location[0])), (sha256(data).hexdigest(), length))
+
+        # Merge-join artifact rows against what is stored
+        session = self.workspace.db_manager.get_session()
+        try:
+            joined = self._join(session, report)
+            if storage.backend is not None:
+                joined = self._with_remote_sizes(joined)
+            for key, size, is_image, has_blob, has_thumbnail, *remote in joined:
+                if remote:
+                    remote_size = remote[0]
+                    if isinstance(remote_size, Exception):
+                        report["unreadable"].append(
+                            {"hash": key, "path": "backend", "error": str(remote_size)}
+                        )
+                        continue
+                    if remote_size is None:
+                        if has_blob:
+                            report["not_uploaded"].append(key)
+                    elif remote_size != size:
+                        report["corrupt"].append(
+                            {"hash": key, "path": "backend", "actual": f"{remote_size} bytes"}
+                        )
+                        continue
+                    else:
+                        report["remote_checked"] += 1
+                        has_blob = True
+                if not has_blob:
+                    report["missing_blobs"].append(key)
+                elif is_image and not has_thumbnail:
+                    report["missing_thumbnails"].append(key)
+        finally:
+            session.close()
+
+        finished = time.time()
+        report["finished_at"] = _iso_timestamp(finished)
+        report["duration_seconds"] = round(finished - started, 3)
+        report["ok"] = not (report["corrupt"] or report["unreadable"] or report["missing_blobs"])
+        # Problems are reported again by the next incremental run until fixed
+        if report["ok"]:
+            self._save_state(
+                {"verified_at": started, "finished_at": finished, "checked": report["checked"]}
+            )
+
+        log = logger.info if report["ok"] else logger.error
+        log(
+            "Verified %d blob(s): %d corrupt, %d unreadable, %d missing",
+            report["checked"],
+            len(report["corrupt"]),
+            len(report["unreadable"]),
+            len(report["missing_blobs"]),
+        )
+        return report
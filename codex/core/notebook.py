@@ -10,6 +10,8 @@ from typing import TYPE_CHECKING, Optional
 from codex.core.utils import slugify
 from codex.db.models import Notebook as NotebookModel
 from codex.db.models import Page as PageModel
+from codex.db.pagination import paginate
+from codex.db.serialization import PAGE_TAGS, page_to_dict
 
 if TYPE_CHECKING:
     from codex.core.page import Page
@@ -184,25 +186,22 @@ class Notebook:
 
         return Page.create(self, title, date, narrative or {})
 
-    def list_pages(self) -> list["Page"]:
-        """List all pages in this notebook."""
+    def list_pages(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list["Page"]:
+        """List pages in this notebook, newest first."""
         from codex.core.page import Page
 
         session = self.workspace.db_manager.get_session()
         try:
-            pages = PageModel.find_by(session, notebook_id=self.id)
+            query = (
+                session.query(PageModel)
+                .options(PAGE_TAGS)
+                .filter(PageModel.notebook_id == self.id)
+            )
+            pages = paginate(query, PageModel, limit, cursor).all()
             return [
-                Page.from_dict(self.workspace, {
-                    "id": p.id,
-                    "notebook_id": p.notebook_id,
-                    "title": p.title,
-                    "date": p.date.isoformat() if p.date else None,
-                    "created_at": p.created_at.isoformat() if p.created_at else None,
-                    "updated_at": p.updated_at.isoformat() if p.updated_at else None,
-                    "narrative": json.loads(p.narrative) if p.narrative else {},
-                    "tags": [pt.tag.name for pt in p.tags] if p.tags else [],
-                    "metadata": json.loads(p.metadata_) if p.metadata_ else {},
-                })
+                Page.from_dict(self.workspace, page_to_dict(p))
                 for p in pages
             ]
         finally:
@@ -216,17 +215,7 @@ class Notebook:
         try:
             page = PageModel.get_by_id(session, page_id)
             if page:
-                return Page.from_dict(self.workspace, {
-                    "id": page.id,
-                    "notebook_id": page.notebook_id,
-                    "title": page.title,
-                    "date": page.date.isoformat() if page.date else None,
-                    "created_at": page.created_at.isoformat() if page.created_at else None,
-                    "updated_at": page.updated_at.isoformat() if page.updated_at else None,
-                    "narrative": json.loads(page.narrative) if page.narrative else {},
-                    "tags": [pt.tag.name for pt in page.tags] if page.tags else [],
-                    "metadata": json.loads(page.metadata_) if page.metadata_ else {},
-                })
+                return Page.from_dict(self.workspace, page_to_dict(page))
             return None
         finally:
             session.close()
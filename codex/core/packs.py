@@ -0,0 +1,291 @@
+"""Pack files for small blobs.
+
+Storing every small blob in its own file costs an inode and a directory
+entry per blob, which slows down the filesystem and backups once there are
+millions of them. Small blobs are instead appended to rolling pack files::
+
+    packs/
+        index.db            hash -> (pack, offset, length)
+        pack-000001.pack
+        pack-000002.pack
+
+Each record in a pack is the 32-byte SHA256 digest, the data length as a
+4-byte big-endian integer, and the data, so the index can be rebuilt from
+the packs alone. Records are never modified in place: dropping a blob only
+removes its index row, and repack() copies the remaining records out of
+mostly-dead packs.
+
+Appends take SQLite's write lock (BEGIN IMMEDIATE) before touching the
+pack, so several processes can share a store.
+"""
+
+import os
+import sqlite3
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+
+# Record header: digest and data length
+_HEADER = struct.Struct(">32sI")
+
+# A new pack is started once the current one would grow past this size
+DEFAULT_MAX_PACK_SIZE = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash BLOB PRIMARY KEY,
+    pack INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_blobs_pack ON blobs (pack);
+"""
+
+
+class PackStore:
+    """Append-only pack files with an index, keyed by hex SHA256 digest."""
+
+    def __init__(self, root: Path, max_pack_size: int = DEFAULT_MAX_PACK_SIZE):
+        self.root = root
+        self.max_pack_size = max_pack_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.root / "index.db", check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def pack_path(self, pack: int) -> Path:
+        """Get the path of a pack file."""
+        return self.root / f"pack-{pack:06d}.pack"
+
+    def _active_pack(self, record_size: int) -> int:
+        """Pack to append a record to."""
+        last = max(self.list_packs(), default=0)
+        if last == 0:
+            return 1
+        if self.pack_path(last).stat().st_size + record_size > self.max_pack_size:
+            return last + 1
+        return last
+
+    def list_packs(self) -> list[int]:
+        """IDs of the pack files on disk, in order."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            int(path.stem[5:])
+            for path in self.root.glob("pack-*.pack")
+            if path.stem[5:].isdigit()
+        )
+
+    def _append(
+        self, digest: bytes, data: bytes, pack: Optional[int] = None
+    ) -> tuple[int, int]:
+        """Append a record and return its (pack, data offset).
+
+        Appends to the active pack unless ``pack`` is given. Call with the
+        index's write lock held.
+        """
+        record = _HEADER.pack(digest, len(data)) + data
+        if pack is None:
+            pack = self._active_pack(len(record))
+        with open(self.pack_path(pack), "ab") as f:
+            start = f.tell()
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        return pack, start + _HEADER.size
+
+    def put(self, hash_value: str, data: bytes) -> bool:
+        """Add a blob.
+
+        Returns:
+            False if the blob was already packed; its stored_at time is
+            refreshed instead
+        """
+        digest = bytes.fromhex(hash_value)
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute(
+                    "UPDATE blobs SET stored_at = ? WHERE hash = ?", (time.time(), digest)
+                )
+                if cursor.rowcount:
+                    conn.execute("COMMIT")
+                    return False
+                pack, offset = self._append(digest, data)
+                conn.execute(
+                    "INSERT INTO blobs (hash, pack, offset, length, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, pack, offset, len(data), time.time()),
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def locate(self, hash_value: str) -> Optional[tuple[int, int, int]]:
+        """Get the (pack, offset, length) of a blob, or None if not packed."""
+        with self._lock:
+            return self._db().execute(
+                "SELECT pack, offset, length FROM blobs WHERE hash = ?",
+                (bytes.fromhex(hash_value),),
+            ).fetchone()
+
+    def get(self, hash_value: str) -> Optional[bytes]:
+        """Read a blob, or return None if not packed."""
+        # A concurrent repack may move the record and delete its pack
+        # between the lookup and the read; look it up again in that case
+        for _ in range(3):
+            location = self.locate(hash_value)
+            if location is None:
+                return None
+            pack, offset, length = location
+            try:
+                fd = os.open(self.pack_path(pack), os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                return os.pread(fd, length, offset)
+            finally:
+                os.close(fd)
+        return None
+
+    def size(self, hash_value: str) -> Optional[int]:
+        """Get a blob's size, or None if not packed."""
+        location = self.locate(hash_value)
+        return location[2] if location else None
+
+    def stored_at(self, hash_value: str) -> Optional[float]:
+        """Get when a blob was last stored, or None if not packed."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT stored_at FROM blobs WHERE hash = ?", (bytes.fromhex(hash_value),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def remove(self, hash_value: str) -> bool:
+        """Drop a blob from the index; repack() reclaims its space."""
+        with self._lock:
+            cursor = self._db().execute(
+                "DELETE FROM blobs WHERE hash = ?", (bytes.fromhex(hash_value),)
+            )
+            return cursor.rowcount > 0
+
+    def iter_entries(self, batch_size: int = 1000) -> Iterator[tuple[str, int, float]]:
+        """Yield (hash, length, stored_at) for every packed blob in hash order.
+
+        Reads in keyset batches so the index isn't locked while the caller
+        works through the results.
+        """
+        after = b""
+        while True:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT hash, length, stored_at FROM blobs WHERE hash > ? "
+                    "ORDER BY hash LIMIT ?",
+                    (after, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for digest, length, stored_at in rows:
+                yield digest.hex(), length, stored_at
+            after = rows[-1][0]
+
+    def stats(self) -> dict:
+        """Get blob counts and live versus on-disk bytes."""
+        with self._lock:
+            count, live = self._db().execute(
+                "SELECT count(*), coalesce(sum(length), 0) FROM blobs"
+            ).fetchone()
+        packs = self.list_packs()
+        return {
+            "blobs": count,
+            "packs": len(packs),
+            "live_bytes": live + count * _HEADER.size,
+            "disk_bytes": sum(self.pack_path(pack).stat().st_size for pack in packs),
+        }
+
+    def repack(self, min_waste: float = 0.25) -> dict:
+        """Copy live records out of packs that are mostly dead space.
+
+        A pack is rewritten once at least ``min_waste`` of it is no longer
+        referenced by the index. Its live records are appended to new packs
+        started for this run, which are never rewritten by it, and the old
+        pack is deleted.
+
+        Returns:
+            Report with the packs rewritten and the bytes reclaimed
+        """
+        report = {"packs_rewritten": 0, "records_moved": 0, "bytes_reclaimed": 0}
+        with self._lock:
+            conn = self._db()
+            live = dict(
+                conn.execute(
+                    "SELECT pack, sum(length) + count(*) * ? FROM blobs GROUP BY pack",
+                    (_HEADER.size,),
+                ).fetchall()
+            )
+            packs = self.list_packs()
+            target, target_size = None, 0
+            for pack in packs:
+                path = self.pack_path(pack)
+                disk = path.stat().st_size
+                if disk == 0 or 1 - live.get(pack, 0) / disk < min_waste:
+                    continue
+
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Sizes read before may be stale: appends, including
+                    # this run's, land in the last pack
+                    disk = path.stat().st_size
+                    rows = conn.execute(
+                        "SELECT hash, offset, length FROM blobs WHERE pack = ?", (pack,)
+                    ).fetchall()
+                    live_bytes = sum(row[2] for row in rows) + len(rows) * _HEADER.size
+                    last = pack == max(self.list_packs())
+                    if (last and live_bytes) or 1 - live_bytes / disk < min_waste:
+                        conn.execute("COMMIT")
+                        continue
+                    with open(path, "rb") as source:
+                        for digest, offset, length in rows:
+                            source.seek(offset)
+                            record_size = _HEADER.size + length
+                            if target is None or target_size + record_size > self.max_pack_size:
+                                target, target_size = max(self.list_packs()) + 1, 0
+                            _, new_offset = self._append(digest, source.read(length), target)
+                            target_size += record_size
+                            conn.execute(
+                                "UPDATE blobs SET pack = ?, offset = ? WHERE hash = ?",
+                                (target, new_offset, digest),
+                            )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                path.unlink()
+                report["packs_rewritten"] += 1
+                report["records_moved"] += len(rows)
+                report["bytes_reclaimed"] += disk - live_bytes
+        return report
+
+    def close(self):
+        """Close the index connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -11,6 +11,8 @@ from codex.core.utils import slugify
 from codex.db.models import Entry as EntryModel
 from codex.db.models import Notebook as NotebookModel
 from codex.db.models import Page as PageModel
+from codex.db.pagination import paginate
+from codex.db.serialization import ENTRY_TAGS, entry_to_dict, notebook_to_dict
 
 if TYPE_CHECKING:
     from codex.core.entry import Entry
@@ -227,29 +229,22 @@ class Page:
             tags or [],
         )
 
-    def list_entries(self) -> list["Entry"]:
-        """List all entries on this page."""
+    def list_entries(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list["Entry"]:
+        """List entries on this page, newest first."""
         from codex.core.entry import Entry
 
         session = self.workspace.db_manager.get_session()
         try:
-            entries = EntryModel.find_by(session, page_id=self.id)
+            query = (
+                session.query(EntryModel)
+                .options(ENTRY_TAGS)
+                .filter(EntryModel.page_id == self.id)
+            )
+            entries = paginate(query, EntryModel, limit, cursor).all()
             return [
-                Entry.from_dict(self.workspace, {
-                    "id": e.id,
-                    "page_id": e.page_id,
-                    "entry_type": e.entry_type,
-                    "title": e.title,
-                    "created_at": e.created_at.isoformat() if e.created_at else None,
-                    "status": e.status,
-                    "parent_id": e.parent_id,
-                    "inputs": json.loads(e.inputs) if e.inputs else {},
-                    "outputs": json.loads(e.outputs) if e.outputs else {},
-                    "execution": json.loads(e.execution) if e.execution else {},
-                    "metrics": json.loads(e.metrics) if e.metrics else {},
-                    "metadata": json.loads(e.metadata_) if e.metadata_ else {},
-                    "tags": [et.tag.name for et in e.tags] if e.tags else [],
-                })
+                Entry.from_dict(self.workspace, entry_to_dict(e))
                 for e in entries
             ]
         finally:
@@ -263,21 +258,7 @@ class Page:
         try:
             entry = EntryModel.get_by_id(session, entry_id)
             if entry:
-                return Entry.from_dict(self.workspace, {
-                    "id": entry.id,
-                    "page_id": entry.page_id,
-                    "entry_type": entry.entry_type,
-                    "title": entry.title,
-                    "created_at": entry.created_at.isoformat() if entry.created_at else None,
-                    "status": entry.status,
-                    "parent_id": entry.parent_id,
-                    "inputs": json.loads(entry.inputs) if entry.inputs else {},
-                    "outputs": json.loads(entry.outputs) if entry.outputs else {},
-                    "execution": json.loads(entry.execution) if entry.execution else {},
-                    "metrics": json.loads(entry.metrics) if entry.metrics else {},
-                    "metadata": json.loads(entry.metadata_) if entry.metadata_ else {},
-                    "tags": [et.tag.name for et in entry.tags] if entry.tags else [],
-                })
+                return Entry.from_dict(self.workspace, entry_to_dict(entry))
             return None
         finally:
             session.close()
@@ -383,16 +364,7 @@ class Page:
         try:
             notebook = NotebookModel.get_by_id(session, self.notebook_id)
             if notebook:
-                return Notebook.from_dict(self.workspace, {
-                    "id": notebook.id,
-                    "title": notebook.title,
-                    "description": notebook.description,
-                    "created_at": notebook.created_at.isoformat() if notebook.created_at else None,
-                    "updated_at": notebook.updated_at.isoformat() if notebook.updated_at else None,
-                    "settings": json.loads(notebook.settings) if notebook.settings else {},
-                    "metadata": json.loads(notebook.metadata_) if notebook.metadata_ else {},
-                    "tags": [nt.tag.name for nt in notebook.tags] if notebook.tags else [],
-                })
+                return Notebook.from_dict(self.workspace, notebook_to_dict(notebook))
             raise ValueError(f"Notebook {self.notebook_id} not found")
         finally:
             session.close()
@@ -1,21 +1,169 @@
 """Content-addressable storage manager for Lab Notebook."""
 
+import bz2
+import gzip
 import hashlib
 import io
+import lzma
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections.abc import Iterable
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 
-from PIL import Image
+from codex.core.backends import BlobBackend
+from codex.core.cache import ByteLRUCache
+from codex.core.chunking import ChunkStore, pack_manifest, read_manifest
+from codex.core.derivatives import (
+    DEFAULT_DERIVATIVE_CACHE_SIZE,
+    DerivativeCache,
+    DerivativeSpec,
+    render_derivative,
+)
+from codex.core.packs import PackStore
+from codex.core.thumbnails import (
+    DEFAULT_THUMBNAIL_SIZE,
+    THUMBNAIL_SIZES,
+    ThumbnailPool,
+    render_thumbnail,
+)
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+_HEX_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+# Read size when spooling streams into the blob store
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Prefix of in-progress uploads in the blobs directory
+UPLOAD_PREFIX = ".upload-"
+
+# Blobs smaller than this are appended to pack files instead of getting a
+# file of their own
+DEFAULT_PACK_THRESHOLD = 64 * 1024
+
+# Memory budgets for thumbnails and small blobs served over and over, e.g.
+# by the gallery; blobs larger than MEMORY_CACHE_MAX_BLOB are never cached
+DEFAULT_THUMBNAIL_MEMORY_CACHE = 32 * 1024 * 1024
+DEFAULT_BLOB_MEMORY_CACHE = 64 * 1024 * 1024
+MEMORY_CACHE_MAX_BLOB = 256 * 1024
+
+# Archive codecs and the suffix of blobs compressed with them. zstd needs the
+# optional zstandard package.
+ARCHIVE_CODECS = {
+    "zstd": ".zst",
+    "gzip": ".gz",
+    "bz2": ".bz2",
+    "lzma": ".xz",
+}
+DEFAULT_ARCHIVE_CODEC = "zstd" if ZSTD_AVAILABLE else "gzip"
+
+
+def _check_codec(codec: str):
+    if codec not in ARCHIVE_CODECS:
+        raise ValueError(
+            f"Unknown archive codec: {codec} (choose from {', '.join(ARCHIVE_CODECS)})"
+        )
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        raise ValueError("The zstd codec requires the zstandard package")
+
+
+def _open_decompressed(path: Path, codec: str) -> BinaryIO:
+    """Open a compressed blob as a stream of its original bytes."""
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    opener = {"gzip": gzip.open, "bz2": bz2.open, "lzma": lzma.open}[codec]
+    return opener(path, "rb")
+
+
+def _compress(source: BinaryIO, dest: BinaryIO, codec: str):
+    """Stream-compress one file object into another."""
+    if codec == "zstd":
+        zstandard.ZstdCompressor(level=10).copy_stream(source, dest)
+        return
+    if codec == "gzip":
+        out = gzip.GzipFile(fileobj=dest, mode="wb", mtime=0)
+    else:
+        out = {"bz2": bz2.BZ2File, "lzma": lzma.LZMAFile}[codec](dest, "wb")
+    with out:
+        shutil.copyfileobj(source, out, STREAM_CHUNK_SIZE)
+
+
+def parse_hash(hash_value: str) -> str:
+    """Return the hex digest of a bare or "sha256:"-prefixed hash.
+
+    Raises:
+        ValueError: If the value is not a SHA256 digest. Callers that build
+            paths from untrusted input must validate with this first.
+    """
+    digest = hash_value[7:] if hash_value.startswith("sha256:") else hash_value
+    if not _HEX_DIGEST.fullmatch(digest):
+        raise ValueError(f"Invalid artifact hash: {hash_value}")
+    return digest
 
 
 class StorageManager:
     """Manager for content-addressable storage of artifacts."""
 
-    def __init__(self, storage_path: Path):
-        """Initialize the storage manager."""
+    def __init__(
+        self,
+        storage_path: Path,
+        thumbnail_workers: Optional[int] = None,
+        pack_threshold: int = DEFAULT_PACK_THRESHOLD,
+        chunking: bool = False,
+        backend: Optional[BlobBackend] = None,
+        cache_size: Optional[int] = None,
+        thumbnail_memory_cache: int = DEFAULT_THUMBNAIL_MEMORY_CACHE,
+        blob_memory_cache: int = DEFAULT_BLOB_MEMORY_CACHE,
+        derivative_cache_size: int = DEFAULT_DERIVATIVE_CACHE_SIZE,
+    ):
+        """Initialize the storage manager.
+
+        Args:
+            storage_path: Root of the blob and thumbnail stores.
+            thumbnail_workers: Processes rendering image thumbnails. None
+                picks a default from the CPU count; 0 renders inline.
+            pack_threshold: Blobs smaller than this many bytes are stored
+                in pack files; 0 gives every blob its own file.
+            chunking: Store larger blobs, other than images, as
+                content-defined chunks so similar blobs share storage.
+            backend: Remote store every new blob is uploaded to. The local
+                blob directory then caches blobs read from it, and packing,
+                chunking and archiving are left to the backend.
+            cache_size: Bytes of blobs to keep in the local cache when a
+                backend is set; None keeps everything.
+            thumbnail_memory_cache: Bytes of thumbnails kept in memory; 0
+                disables the cache.
+            blob_memory_cache: Bytes of small blobs kept in memory; 0
+                disables the cache.
+            derivative_cache_size: Bytes of resized and re-encoded images
+                kept on disk.
+        """
         self.storage_path = storage_path
         self.blobs_path = storage_path / "blobs"
         self.thumbnails_path = storage_path / "thumbnails"
+        self.thumbnails = ThumbnailPool(thumbnail_workers)
+        self.pack_threshold = pack_threshold
+        self.packs = PackStore(storage_path / "packs")
+        self.chunking = chunking
+        self.chunks = ChunkStore(storage_path / "chunks")
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache_bytes: Optional[int] = None
+        self._cache_lock = threading.Lock()
+        # Keyed by content hash, so entries never go stale
+        self.thumbnail_cache = ByteLRUCache(thumbnail_memory_cache)
+        self.blob_cache = ByteLRUCache(blob_memory_cache, MEMORY_CACHE_MAX_BLOB)
+        self.derivatives = DerivativeCache(storage_path / "derivatives", derivative_cache_size)
 
     def initialize(self):
         """Initialize storage directories."""
@@ -28,126 +176,566 @@ class StorageManager:
 
         Returns the SHA256 hash of the data.
         """
-        # Calculate hash
-        hash_value = hashlib.sha256(data).hexdigest()
+        return self.store_stream([data], artifact_type)[0]
+
+    def store_stream(
+        self, stream: Union[BinaryIO, Iterable[bytes]], artifact_type: str
+    ) -> tuple[str, int]:
+        """
+        Store a stream in content-addressable storage without buffering it.
 
-        # Create subdirectories based on hash prefix for better distribution
-        subdir = self.blobs_path / hash_value[:2] / hash_value[2:4]
-        subdir.mkdir(parents=True, exist_ok=True)
+        The stream (a binary file object or an iterable of byte chunks) is
+        hashed while it is spooled to a temporary file in the blobs
+        directory. The file is then renamed into place, appended to a pack
+        if it is small, split into chunks in chunking mode, or discarded if
+        the blob already exists.
 
-        # Store the blob
-        blob_path = subdir / hash_value
-        if not blob_path.exists():
-            blob_path.write_bytes(data)
+        Returns the SHA256 hash and the size in bytes.
+        """
+        self.blobs_path.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.blobs_path, prefix=UPLOAD_PREFIX)
+        tmp_path = Path(tmp_name)
+        try:
+            hasher = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in _iter_chunks(stream):
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+                tmp.flush()
+                os.fsync(tmp.fileno())
 
-        # Generate thumbnail for images
-        if artifact_type.startswith("image/"):
-            self._generate_thumbnail(data, hash_value)
+            hash_value = hasher.hexdigest()
+            blob_path = self.get_blob_path(hash_value)
+            existing = self._find_blob_file(hash_value)
+            packed_data = None
+            if existing:
+                tmp_path.unlink()
+                # Refresh the mtime so garbage collection's grace period
+                # covers the artifact row about to reference this blob
+                os.utime(existing)
+            elif self.backend is not None:
+                if not self.backend.exists(hash_value):
+                    self.backend.upload(hash_value, tmp_path)
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, blob_path)
+                self._add_to_cache(size)
+            elif size < self.pack_threshold:
+                packed_data = tmp_path.read_bytes()
+                self.packs.put(hash_value, packed_data)
+                tmp_path.unlink()
+            elif self.chunking and not artifact_type.startswith("image/"):
+                with open(tmp_path, "rb") as f:
+                    entries = self.chunks.store(f)
+                self._write_manifest(hash_value, entries)
+                tmp_path.unlink()
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, blob_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
-        return f"sha256:{hash_value}"
+        # Queue the default thumbnail for images; other sizes, and jobs
+        # dropped from a full queue, are rendered on first request
+        if artifact_type.startswith("image/") and (packed_data or blob_path.exists()):
+            self.thumbnails.submit(
+                io.BytesIO(packed_data) if packed_data else blob_path,
+                self.get_thumbnail_path(hash_value),
+                DEFAULT_THUMBNAIL_SIZE,
+            )
+
+        return f"sha256:{hash_value}", size
 
     def retrieve(self, hash_value: str) -> Optional[bytes]:
-        """Retrieve data by hash."""
-        # Handle full hash format (sha256:...)
-        if hash_value.startswith("sha256:"):
-            hash_value = hash_value[7:]
+        """Retrieve data by hash, decompressing archived blobs.
+
+        Small blobs are served from memory after the first read.
+        """
+        key = self.get_blob_path(hash_value).name
+        data = self.blob_cache.get(key)
+        if data is not None:
+            return data
+        stream = self._open_blob(hash_value)
+        if stream is None:
+            return None
+        with stream:
+            data = stream.read()
+        self.blob_cache.put(key, data)
+        return data
+
+    def open_blob(self, hash_value: str) -> Optional[BinaryIO]:
+        """Open a blob for reading, or return None if it doesn't exist.
+
+        Archived blobs are decompressed as they are read, so callers always
+        see the original bytes. Packed blobs are served from memory after
+        the first read. The caller must close the stream.
+        """
+        key = self.get_blob_path(hash_value).name
+        data = self.blob_cache.get(key)
+        if data is not None:
+            return io.BytesIO(data)
+        stream = self._open_blob(hash_value)
+        if isinstance(stream, io.BytesIO):
+            self.blob_cache.put(key, stream.getvalue())
+        return stream
+
+    def _open_blob(self, hash_value: str) -> Optional[BinaryIO]:
+        try:
+            return open(self.get_blob_path(hash_value), "rb")
+        except FileNotFoundError:
+            pass
+        # Not found as-is: it may have been archived, possibly just now
+        archived = self.get_archived_path(hash_value)
+        if archived is not None:
+            path, codec = archived
+            try:
+                return _open_decompressed(path, codec)
+            except FileNotFoundError:
+                pass
+        entries = read_manifest(self.get_manifest_path(hash_value))
+        if entries is not None:
+            return self.chunks.reader(entries)
+        data = self._get_packed(hash_value)
+        if data is not None:
+            return io.BytesIO(data)
+        if self.fetch(hash_value):
+            try:
+                return open(self.get_blob_path(hash_value), "rb")
+            except FileNotFoundError:
+                pass  # Evicted already
+        return None
+
+    def fetch(self, hash_value: str) -> bool:
+        """Make sure a blob backed by the remote store is in the local cache.
+
+        Returns:
+            True if the blob is now a local file, False if there is no
+            backend or it doesn't have the blob
+        """
+        blob_path = self.get_blob_path(hash_value)
+        if self.backend is None:
+            return blob_path.is_file()
+        try:
+            # Cache hits refresh the mtime, which orders eviction
+            os.utime(blob_path)
+            return True
+        except FileNotFoundError:
+            pass
+
+        self.blobs_path.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.blobs_path, prefix=UPLOAD_PREFIX)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            if not self.backend.download(blob_path.name, tmp_path):
+                tmp_path.unlink()
+                return False
+            size = tmp_path.stat().st_size
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, blob_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._add_to_cache(size)
+        return True
+
+    def presigned_url(self, hash_value: str, content_type: Optional[str] = None) -> Optional[str]:
+        """Get a URL to download a blob straight from the remote store.
+
+        Returns:
+            The URL, or None if there is no backend, it can't presign or
+            it doesn't have the blob
+        """
+        if self.backend is None:
+            return None
+        digest = parse_hash(hash_value)
+        url = self.backend.presigned_url(digest, content_type)
+        # Blobs stored before the backend was configured were never uploaded
+        if url is None or not self.backend.exists(digest):
+            return None
+        return url
+
+    def _add_to_cache(self, size: int):
+        if self.cache_size is None:
+            return
+        with self._cache_lock:
+            if self._cache_bytes is not None:
+                self._cache_bytes += size
+            if self._cache_bytes is None or self._cache_bytes > self.cache_size:
+                self._cache_bytes = self._trim_cache()
+
+    def _trim_cache(self) -> int:
+        """Evict the least recently used cached blobs down to 90% of the cache size.
+
+        Every plain blob file is also in the backend, so any of them can go.
+
+        Returns:
+            Bytes left in the cache
+        """
+        files = []
+        for path in self.blobs_path.glob("??/??/*"):
+            if _HEX_DIGEST.fullmatch(path.name):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total <= self.cache_size:
+            return total
+        target = self.cache_size * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        return total
+
+    def _packed_digest(self, hash_value: str) -> Optional[str]:
+        """Hex digest to look up in the packs, or None if it can't be there."""
+        digest = hash_value[7:] if hash_value.startswith("sha256:") else hash_value
+        return digest if _HEX_DIGEST.fullmatch(digest) else None
+
+    def _get_packed(self, hash_value: str) -> Optional[bytes]:
+        digest = self._packed_digest(hash_value)
+        return self.packs.get(digest) if digest else None
+
+    def is_packed(self, hash_value: str) -> bool:
+        """Check if a blob is stored in a pack file."""
+        digest = self._packed_digest(hash_value)
+        return bool(digest) and self.packs.locate(digest) is not None
 
-        blob_path = self.blobs_path / hash_value[:2] / hash_value[2:4] / hash_value
+    def get_manifest_path(self, hash_value: str) -> Path:
+        """Get the path to the chunk manifest of a blob stored in chunks."""
+        blob_path = self.get_blob_path(hash_value)
+        return blob_path.with_name(blob_path.name + ".chunks")
+
+    def _write_manifest(self, hash_value: str, entries: list[tuple[str, int]]):
+        manifest_path = self.get_manifest_path(hash_value)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=manifest_path.parent, prefix=UPLOAD_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(pack_manifest(entries))
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_name, manifest_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            self.chunks.release(entries)
+            raise
+
+    def release_manifest(self, manifest_path: Path) -> bool:
+        """Delete a chunk manifest and drop its references on its chunks."""
+        entries = read_manifest(manifest_path)
+        if entries is None:
+            return False
+        manifest_path.unlink(missing_ok=True)
+        self.chunks.release(entries)
+        return True
+
+    def _find_blob_file(self, hash_value: str) -> Optional[Path]:
+        """The file holding a blob as-is, archived or as a manifest, if any."""
+        blob_path = self.get_blob_path(hash_value)
         if blob_path.exists():
-            return blob_path.read_bytes()
+            return blob_path
+        archived = self.get_archived_path(hash_value)
+        if archived:
+            return archived[0]
+        manifest_path = self.get_manifest_path(hash_value)
+        return manifest_path if manifest_path.exists() else None
+
+    def get_archived_path(self, hash_value: str) -> Optional[tuple[Path, str]]:
+        """Get the path and codec of an archived blob, or None if not archived."""
+        blob_path = self.get_blob_path(hash_value)
+        for codec, suffix in ARCHIVE_CODECS.items():
+            path = blob_path.with_name(blob_path.name + suffix)
+            if path.exists():
+                return path, codec
         return None
 
+    def archive(self, hash_value: str, codec: str = DEFAULT_ARCHIVE_CODEC) -> Optional[int]:
+        """Compress a blob in place.
+
+        The compressed copy is written next to the blob and renamed into
+        place before the original is removed, so readers always find one of
+        them. Blobs that don't shrink (already-compressed formats) are left
+        alone.
+
+        Returns:
+            Size of the compressed blob, or None if the blob is missing,
+            already archived, packed, only cached from a backend or didn't
+            compress
+        """
+        _check_codec(codec)
+        blob_path = self.get_blob_path(hash_value)
+        if self.backend is not None or not blob_path.is_file():
+            return None
+
+        fd, tmp_name = tempfile.mkstemp(dir=blob_path.parent, prefix=UPLOAD_PREFIX)
+        tmp_path = Path(tmp_name)
+        try:
+            with open(blob_path, "rb") as source, os.fdopen(fd, "wb") as dest:
+                _compress(source, dest, codec)
+                dest.flush()
+                os.fsync(dest.fileno())
+            archived_size = tmp_path.stat().st_size
+            if archived_size >= blob_path.stat().st_size:
+                tmp_path.unlink()
+                return None
+            os.replace(tmp_path, blob_path.with_name(blob_path.name + ARCHIVE_CODECS[codec]))
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        blob_path.unlink()
+        return archived_size
+
     def get_blob_path(self, hash_value: str) -> Path:
         """Get the path to a blob."""
         if hash_value.startswith("sha256:"):
             hash_value = hash_value[7:]
         return self.blobs_path / hash_value[:2] / hash_value[2:4] / hash_value
 
-    def get_thumbnail(self, hash_value: str) -> Optional[bytes]:
-        """Get thumbnail for an artifact."""
-        if hash_value.startswith("sha256:"):
-            hash_value = hash_value[7:]
+    def get_thumbnail(
+        self, hash_value: str, size: int = DEFAULT_THUMBNAIL_SIZE
+    ) -> Optional[bytes]:
+        """Get thumbnail for an artifact, from memory if it was read recently."""
+        thumb_path = self.get_thumbnail_path(hash_value, size)
+        data = self.thumbnail_cache.get(thumb_path.name)
+        if data is None:
+            try:
+                data = thumb_path.read_bytes()
+            except FileNotFoundError:
+                return None
+            self.thumbnail_cache.put(thumb_path.name, data)
+        return data
 
-        thumb_path = (
-            self.thumbnails_path
-            / hash_value[:2]
-            / hash_value[2:4]
-            / f"{hash_value}.thumb.jpg"
-        )
-        if thumb_path.exists():
-            return thumb_path.read_bytes()
-        return None
+    def get_thumbnail_path(self, hash_value: str, size: int = DEFAULT_THUMBNAIL_SIZE) -> Path:
+        """Get the path to a thumbnail.
 
-    def get_thumbnail_path(self, hash_value: str) -> Path:
-        """Get the path to a thumbnail."""
+        The default size keeps the original ``<hash>.thumb.jpg`` name so
+        existing thumbnails and recorded paths stay valid.
+        """
         if hash_value.startswith("sha256:"):
             hash_value = hash_value[7:]
-        return (
-            self.thumbnails_path
-            / hash_value[:2]
-            / hash_value[2:4]
-            / f"{hash_value}.thumb.jpg"
+        name = (
+            f"{hash_value}.thumb.jpg"
+            if size == DEFAULT_THUMBNAIL_SIZE
+            else f"{hash_value}.thumb-{size}.jpg"
         )
+        return self.thumbnails_path / hash_value[:2] / hash_value[2:4] / name
 
-    def _generate_thumbnail(
-        self, data: bytes, hash_value: str, max_size: tuple = (256, 256)
-    ):
-        """Generate a thumbnail for an image."""
-        try:
-            # Create subdirectories
-            subdir = self.thumbnails_path / hash_value[:2] / hash_value[2:4]
-            subdir.mkdir(parents=True, exist_ok=True)
-
-            thumb_path = subdir / f"{hash_value}.thumb.jpg"
-            if not thumb_path.exists():
-                with Image.open(io.BytesIO(data)) as img:
-                    # Convert to RGB if necessary (for PNG with transparency)
-                    if img.mode in ("RGBA", "P"):
-                        img = img.convert("RGB")
-
-                    # Create thumbnail
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    img.save(thumb_path, "JPEG", quality=85)
-        except Exception:
-            # Silently ignore thumbnail generation failures
-            pass
+    def ensure_thumbnail(
+        self, hash_value: str, size: int = DEFAULT_THUMBNAIL_SIZE
+    ) -> Optional[Path]:
+        """Get the path to a thumbnail, rendering it first if it is missing.
+
+        Blocks until the thumbnail is written.
+
+        Returns:
+            The thumbnail path, or None if the blob is missing or is not a
+            decodable image
+        """
+        thumb_path = self.get_thumbnail_path(hash_value, size)
+        if thumb_path.is_file():
+            return thumb_path
+        blob_path = self.get_blob_path(hash_value)
+        if self.fetch(hash_value):
+            rendered = self.thumbnails.render(blob_path, thumb_path, size)
+        else:
+            # Archived blobs are decompressed here; workers only take paths
+            data = self.retrieve(hash_value)
+            rendered = data is not None and render_thumbnail(io.BytesIO(data), thumb_path, size)
+        return thumb_path if rendered else None
+
+    def ensure_derivative(self, hash_value: str, spec: DerivativeSpec) -> Optional[Path]:
+        """Get the path to a derivative of an image, rendering it if needed.
+
+        Blocks until the derivative is written.
+
+        Returns:
+            The derivative path, or None if the blob is missing or is not a
+            decodable image
+        """
+        digest = parse_hash(hash_value)
+        path = self.derivatives.get(digest, spec)
+        if path is not None:
+            return path
+        path = self.derivatives.path(digest, spec)
+        args = (path, spec.width, spec.height, spec.format, spec.quality)
+        if self.fetch(digest):
+            rendered = self.thumbnails.run(
+                render_derivative, path, self.get_blob_path(digest), *args
+            )
+        else:
+            # Packed, archived and chunked blobs are spooled to a file, as
+            # workers only take paths
+            stream = self.open_blob(digest)
+            if stream is None:
+                return None
+            self.blobs_path.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.blobs_path, prefix=UPLOAD_PREFIX)
+            tmp_path = Path(tmp_name)
+            try:
+                with stream, os.fdopen(fd, "wb") as tmp:
+                    shutil.copyfileobj(stream, tmp)
+                rendered = self.thumbnails.run(render_derivative, path, tmp_path, *args)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+        if not rendered:
+            return None
+        self.derivatives.add(path)
+        return path
+
+    def rebuild_thumbnails(
+        self,
+        hashes: Iterable[str],
+        sizes: Iterable[int] = (DEFAULT_THUMBNAIL_SIZE,),
+        force: bool = False,
+    ) -> int:
+        """Render thumbnails for many blobs in parallel.
+
+        Args:
+            hashes: Blob hashes, e.g. of every image artifact
+            sizes: Thumbnail sizes to render for each blob
+            force: Re-render thumbnails that already exist
+
+        Returns:
+            Number of thumbnails written
+        """
+        sizes = list(sizes)
+
+        def jobs():
+            for hash_value in hashes:
+                missing = [
+                    (self.get_thumbnail_path(hash_value, size), size)
+                    for size in sizes
+                    if force or not self.get_thumbnail_path(hash_value, size).exists()
+                ]
+                if not missing:
+                    continue
+                if self.fetch(hash_value):
+                    source = self.get_blob_path(hash_value)
+                else:
+                    # Packed, archived or chunked: workers read it themselves
+                    source = partial(_open_stored_blob, self.storage_path, hash_value)
+                for thumb_path, size in missing:
+                    self.thumbnail_cache.discard(thumb_path.name)
+                    yield source, thumb_path, size
+
+        return self.thumbnails.render_all(jobs())
 
     def exists(self, hash_value: str) -> bool:
-        """Check if a blob exists."""
-        if hash_value.startswith("sha256:"):
-            hash_value = hash_value[7:]
-        blob_path = self.blobs_path / hash_value[:2] / hash_value[2:4] / hash_value
-        return blob_path.exists()
+        """Check if a blob exists, however it is stored."""
+        if self._find_blob_file(hash_value) is not None or self.is_packed(hash_value):
+            return True
+        return self.backend is not None and self.backend.exists(parse_hash(hash_value))
+
+    def stored_at(self, hash_value: str) -> Optional[float]:
+        """Get when a blob was last stored, or None if it isn't stored locally.
+
+        Storing content that already exists refreshes this time.
+        """
+        path = self._find_blob_file(hash_value)
+        if path is not None:
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                pass
+        digest = self._packed_digest(hash_value)
+        return self.packs.stored_at(digest) if digest else None
 
     def delete(self, hash_value: str) -> bool:
-        """Delete a blob and its thumbnail."""
+        """Delete a blob, wherever it is stored, and its thumbnails."""
         if hash_value.startswith("sha256:"):
             hash_value = hash_value[7:]
 
         deleted = False
 
-        blob_path = self.blobs_path / hash_value[:2] / hash_value[2:4] / hash_value
-        if blob_path.exists():
-            blob_path.unlink()
+        blob_path = self.get_blob_path(hash_value)
+        for path in [blob_path] + [
+            blob_path.with_name(blob_path.name + suffix) for suffix in ARCHIVE_CODECS.values()
+        ]:
+            if path.exists():
+                path.unlink()
+                deleted = True
+        if self.release_manifest(self.get_manifest_path(hash_value)):
+            deleted = True
+        if self._packed_digest(hash_value) and self.packs.remove(hash_value):
             deleted = True
 
-        thumb_path = (
-            self.thumbnails_path
-            / hash_value[:2]
-            / hash_value[2:4]
-            / f"{hash_value}.thumb.jpg"
-        )
-        if thumb_path.exists():
-            thumb_path.unlink()
+        if self.backend is not None and self.backend.delete(hash_value):
+            deleted = True
+
+        self.blob_cache.discard(hash_value)
+        self.derivatives.discard(hash_value)
+        for size in THUMBNAIL_SIZES:
+            thumb_path = self.get_thumbnail_path(hash_value, size)
+            thumb_path.unlink(missing_ok=True)
+            self.thumbnail_cache.discard(thumb_path.name)
 
         return deleted
 
     def get_size(self, hash_value: str) -> Optional[int]:
-        """Get the size of a blob in bytes."""
-        if hash_value.startswith("sha256:"):
-            hash_value = hash_value[7:]
+        """Get the size of a blob in bytes.
 
-        blob_path = self.blobs_path / hash_value[:2] / hash_value[2:4] / hash_value
+        This is the size on disk for archived blobs (compressed) and the
+        original size for chunked blobs, whose chunks may be shared.
+        """
+        blob_path = self.get_blob_path(hash_value)
         if blob_path.exists():
             return blob_path.stat().st_size
-        return None
+        archived = self.get_archived_path(hash_value)
+        if archived:
+            return archived[0].stat().st_size
+        entries = read_manifest(self.get_manifest_path(hash_value))
+        if entries is not None:
+            return sum(length for _, length in entries)
+        digest = self._packed_digest(hash_value)
+        size = self.packs.size(digest) if digest else None
+        if size is None and digest and self.backend is not None:
+            size = self.backend.size(digest)
+        return size
+
+    def stats(self) -> dict:
+        """Get pack and chunk store statistics, including the dedup ratio."""
+        return {"packs": self.packs.stats(), "chunks": self.chunks.stats()}
+
+    def memory_cache_stats(self) -> dict:
+        """Get counters of the in-memory thumbnail and blob caches."""
+        return {"thumbnails": self.thumbnail_cache.stats(), "blobs": self.blob_cache.stats()}
+
+    def close(self):
+        """Stop the thumbnail worker processes and close the pack indexes and backend."""
+        self.thumbnails.shutdown()
+        self.packs.close()
+        self.chunks.close()
+        if self.backend is not None:
+            self.backend.close()
+
+
+def _iter_chunks(stream: Union[BinaryIO, Iterable[bytes]]) -> Iterable[bytes]:
+    """Yield byte chunks from a file object or an iterable of chunks."""
+    if hasattr(stream, "read"):
+        while chunk := stream.read(STREAM_CHUNK_SIZE):
+            yield chunk
+    else:
+        for chunk in stream:
+            if chunk:
+                yield chunk
+
+
+# Stores opened in thumbnail worker processes, by storage path
+_worker_stores: dict[Path, StorageManager] = {}
+
+
+def _open_stored_blob(storage_path: Path, hash_value: str) -> Optional[BinaryIO]:
+    """Open a blob of the store at ``storage_path`` in a worker process."""
+    storage = _worker_stores.get(storage_path)
+    if storage is None:
+        storage = _worker_stores[storage_path] = StorageManager(
+            storage_path, thumbnail_workers=0, blob_memory_cache=0
+        )
+    return storage.open_blob(hash_value)
@@ -0,0 +1,224 @@
+"""Thumbnail generation for image artifacts.
+
+Decoding and resizing images is CPU bound, so thumbnails are rendered in a
+small process pool instead of on the thread that stored the artifact. Jobs
+queued at store time are best effort: when the queue is full they are
+dropped, and the thumbnail is rendered on demand the first time it is
+requested.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional, Union
+
+from PIL import Image
+
+# Longest edge, in pixels, of each thumbnail size that can be requested
+THUMBNAIL_SIZES = (128, 256, 512)
+DEFAULT_THUMBNAIL_SIZE = 256
+
+# Thumbnail jobs queued or running at once before new store-time jobs are dropped
+MAX_PENDING_THUMBNAILS = 256
+
+
+def default_thumbnail_workers() -> int:
+    """Worker processes used when no count is configured."""
+    return min(4, os.cpu_count() or 1)
+
+
+def render_thumbnail(source: Union[Path, BinaryIO], dest: Path, size: int) -> bool:
+    """Render a JPEG thumbnail of an image file or seekable file object.
+
+    Runs in worker processes, so it must stay a picklable module-level
+    function. The thumbnail is written to a temporary file and renamed into
+    place so readers never see a partial image.
+
+    Returns:
+        True if the thumbnail was written, False if the source could not be
+        decoded as an image
+    """
+    tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        with Image.open(source) as img:
+            # JPEG can decode at 1/2, 1/4 or 1/8 scale; asking for the
+            # smallest scale still larger than the thumbnail skips most of
+            # the decoding work for camera-sized images
+            if img.format == "JPEG":
+                img.draft("RGB", (size, size))
+
+            # Convert to RGB if necessary (for PNG with transparency)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            img.save(tmp_path, "JPEG", quality=85)
+        os.replace(tmp_path, dest)
+        return True
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        return False
+
+
+def _render_job(job: tuple[Union[Path, Callable[[], Optional[BinaryIO]]], Path, int]) -> bool:
+    source, dest, size = job
+    if not callable(source):
+        return render_thumbnail(source, dest, size)
+    # Opened by the worker, so the bytes never pass through the caller
+    stream = source()
+    if stream is None:
+        return False
+    with stream:
+        return render_thumbnail(stream, dest, size)
+
+
+class ThumbnailPool:
+    """Bounded process pool rendering thumbnails.
+
+    The pool is started on first use. Jobs are keyed by destination path,
+    so a thumbnail already queued is never rendered twice. With zero
+    workers every job is rendered inline by the caller.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: int = MAX_PENDING_THUMBNAILS,
+    ):
+        """Initialize the pool.
+
+        Args:
+            max_workers: Worker processes; None picks a default from the CPU
+                count, 0 renders inline
+            max_pending: Queued or running jobs before submit() drops new
+                jobs
+        """
+        self.max_workers = default_thumbnail_workers() if max_workers is None else max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: dict[Path, Future] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.rendered = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers don't inherit the server's threads, locks or
+            # open database connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.rendered += 1
+            else:
+                self.failed += 1
+
+    def _enqueue(self, dest: Path, force: bool, func: Callable, *args) -> Optional[Future]:
+        with self._lock:
+            future = self._pending.get(dest)
+            if future is not None:
+                return future
+            if not force and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return None
+            future = self._get_executor().submit(func, *args)
+            self._pending[dest] = future
+            self.submitted += 1
+
+        def _done(f: Future):
+            with self._lock:
+                self._pending.pop(dest, None)
+            self._record(not f.cancelled() and f.exception() is None and f.result())
+
+        future.add_done_callback(_done)
+        return future
+
+    def submit(self, source: Path, dest: Path, size: int) -> Optional[Future]:
+        """Queue a thumbnail in the background.
+
+        Returns:
+            The job's future, or None if it was rendered inline or dropped
+            because the queue is full
+        """
+        if self.max_workers == 0:
+            self._record(render_thumbnail(source, dest, size))
+            return None
+        return self._enqueue(dest, False, render_thumbnail, source, dest, size)
+
+    def render(self, source: Path, dest: Path, size: int) -> bool:
+        """Render a thumbnail and wait for it, joining a queued job if any.
+
+        Returns:
+            True if the thumbnail exists afterwards
+        """
+        return self.run(render_thumbnail, dest, source, dest, size)
+
+    def run(self, func: Callable[..., bool], dest: Path, *args) -> bool:
+        """Run another image job writing ``dest`` and wait for it.
+
+        ``func`` must be a picklable module-level function returning
+        whether it wrote ``dest``; ``args`` are passed to it. Requests for
+        the same ``dest`` share one job.
+        """
+        if self.max_workers == 0:
+            ok = func(*args)
+            self._record(ok)
+            return ok
+        return self._enqueue(dest, True, func, *args).result()
+
+    def render_all(self, jobs: Iterable[tuple]) -> int:
+        """Render many thumbnails in parallel and wait for them all.
+
+        Jobs are taken from ``jobs`` at most ``max_pending`` at a time, so
+        a generator can stream them.
+
+        Args:
+            jobs: (source, dest, size) tuples; the source is an image path
+                or a picklable function opening the image, called in the
+                worker
+
+        Returns:
+            Number of thumbnails written
+        """
+        jobs = iter(jobs)
+        written = 0
+        while batch := list(islice(jobs, self.max_pending)):
+            if self.max_workers == 0:
+                results = [_render_job(job) for job in batch]
+            else:
+                results = list(self._get_executor().map(_render_job, batch, chunksize=16))
+            for ok in results:
+                self._record(ok)
+            written += sum(results)
+        return written
+
+    def shutdown(self):
+        """Stop the worker processes, dropping jobs that haven't started."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Get job counters."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "rendered": self.rendered,
+                "failed": self.failed,
+            }
@@ -0,0 +1,124 @@
+"""Downsampling and summaries of step-wise metric series.
+
+A training run logs a value per step for each metric; a chart a few
+hundred pixels wide needs a few hundred points. Both downsamplers pick
+points out of the series (they never invent values) and return their
+indexes, so every column of the series can be sliced the same way.
+
+- LTTB (Largest-Triangle-Three-Buckets) keeps the points that preserve
+  the visual shape of a line.
+- Min-max keeps the lowest and highest point of each bucket, so spikes
+  survive however hard the series is reduced.
+"""
+
+from collections.abc import Sequence
+from typing import Optional
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+# Where the series summaries live in Entry.metrics
+SERIES_KEY = "series"
+
+
+def lttb(steps: Sequence[float], values: Sequence[float], threshold: int) -> list[int]:
+    """Pick ``threshold`` points with Largest-Triangle-Three-Buckets.
+
+    Args:
+        steps: X values, ascending
+        values: Y values
+        threshold: Number of points to keep; at least 3
+
+    Returns:
+        Indexes of the kept points, ascending; all of them if the series
+        is not longer than ``threshold``
+    """
+    n = len(steps)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    kept = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        count = next_end - next_start
+        avg_x = sum(steps[next_start:next_end]) / count
+        avg_y = sum(values[next_start:next_end]) / count
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = steps[a], values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (values[j] - ay) - (ax - steps[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def min_max(steps: Sequence[float], values: Sequence[float], buckets: int) -> list[int]:
+    """Keep the minimum and maximum of each of ``buckets`` equal-width step ranges.
+
+    Returns:
+        Indexes of the kept points, ascending; at most ``2 * buckets``
+    """
+    n = len(steps)
+    if n <= 2 * buckets or buckets < 1:
+        return list(range(n))
+
+    first, last = steps[0], steps[-1]
+    width = (last - first) / buckets or 1
+    lows: dict[int, int] = {}
+    highs: dict[int, int] = {}
+    for i in range(n):
+        bucket = min(int((steps[i] - first) / width), buckets - 1)
+        if bucket not in lows or values[i] < values[lows[bucket]]:
+            lows[bucket] = i
+        if bucket not in highs or values[i] > values[highs[bucket]]:
+            highs[bucket] = i
+    return sorted(set(lows.values()) | set(highs.values()))
+
+
+def downsample(
+    steps: Sequence[float], values: Sequence[float], max_points: int, method: str = "lttb"
+) -> list[int]:
+    """Indexes of at most ``max_points`` points of a series.
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method == "lttb":
+        return lttb(steps, values, max_points)
+    if method == "minmax":
+        return min_max(steps, values, max_points // 2)
+    raise ValueError(f"Unknown downsampling method: {method} (choose from lttb, minmax)")
+
+
+def summarize(
+    steps: Sequence[int], values: Sequence[float], previous: Optional[dict] = None
+) -> dict:
+    """Summary of a series, updated with newly appended points.
+
+    The summary holds count, min, max, mean and the last value with its
+    step. ``previous`` is the summary of the points appended before, so
+    the cost depends only on the new points.
+    """
+    summary = dict(previous or {"count": 0})
+    count = summary["count"] + len(values)
+    if not values:
+        return summary
+    summary["mean"] = (summary.get("mean", 0.0) * summary["count"] + sum(values)) / count
+    summary["min"] = min(values) if "min" not in summary else min(summary["min"], min(values))
+    summary["max"] = max(values) if "max" not in summary else max(summary["max"], max(values))
+    # Last value at the highest step; later appends win ties
+    last = max(range(len(steps)), key=lambda i: (steps[i], i))
+    if "step" not in summary or steps[last] >= summary["step"]:
+        summary["step"] = steps[last]
+        summary["last"] = values[last]
+    summary["count"] = count
+    return summary
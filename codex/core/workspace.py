@@ -1,16 +1,24 @@
 """Workspace management for Lab Notebook."""
 
 import json
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
+from codex.core.backends import open_backend
+from codex.core.derivatives import DEFAULT_DERIVATIVE_CACHE_SIZE
 from codex.core.git_manager import GitManager
-from codex.core.storage import StorageManager
-from codex.db.models import Entry as EntryModel
+from codex.core.storage import (
+    DEFAULT_BLOB_MEMORY_CACHE,
+    DEFAULT_PACK_THRESHOLD,
+    DEFAULT_THUMBNAIL_MEMORY_CACHE,
+    StorageManager,
+)
 from codex.db.models import Notebook as NotebookModel
-from codex.db.models import Page as PageModel
 from codex.db.operations import DatabaseManager
+from codex.db.pagination import paginate
+from codex.db.serialization import NOTEBOOK_TAGS, notebook_to_dict
 
 if TYPE_CHECKING:
     from codex.core.notebook import Notebook
@@ -24,9 +32,52 @@ def _now() -> datetime:
 class Workspace:
     """Root workspace containing notebooks."""
 
-    def __init__(self, path: Path):
-        """Initialize a workspace instance."""
+    def __init__(
+        self,
+        path: Path,
+        git_commit_window: Optional[float] = None,
+        thumbnail_workers: Optional[int] = None,
+        pack_threshold: int = DEFAULT_PACK_THRESHOLD,
+        chunked_storage: bool = False,
+        blob_backend: Optional[str] = None,
+        blob_cache_size: Optional[int] = None,
+        thumbnail_memory_cache: int = DEFAULT_THUMBNAIL_MEMORY_CACHE,
+        blob_memory_cache: int = DEFAULT_BLOB_MEMORY_CACHE,
+        derivative_cache_size: int = DEFAULT_DERIVATIVE_CACHE_SIZE,
+    ):
+        """Initialize a workspace instance.
+
+        Args:
+            path: Root directory of the workspace.
+            git_commit_window: Seconds to coalesce Git manifest writes into a
+                single background commit. None commits synchronously.
+            thumbnail_workers: Processes rendering image thumbnails. None
+                picks a default from the CPU count; 0 renders inline.
+            pack_threshold: Blobs smaller than this many bytes are stored in
+                pack files; 0 gives every blob its own file.
+            chunked_storage: Store new blobs as content-defined chunks so
+                near-identical files share storage.
+            blob_backend: URL of a remote blob store shared with other
+                nodes, e.g. ``s3://bucket/prefix?endpoint=...`` (see
+                codex.core.backends). None uses ``blob_backend`` from the
+                workspace config, if set.
+            blob_cache_size: Bytes of remote blobs cached locally. None uses
+                ``blob_cache_size`` from the workspace config, if set.
+            thumbnail_memory_cache: Bytes of thumbnails kept in memory.
+            blob_memory_cache: Bytes of small blobs kept in memory.
+            derivative_cache_size: Bytes of resized and re-encoded images
+                kept on disk.
+        """
         self.path = Path(path).resolve()
+        self.git_commit_window = git_commit_window
+        self.thumbnail_workers = thumbnail_workers
+        self.pack_threshold = pack_threshold
+        self.chunked_storage = chunked_storage
+        self.blob_backend = blob_backend
+        self.blob_cache_size = blob_cache_size
+        self.thumbnail_memory_cache = thumbnail_memory_cache
+        self.blob_memory_cache = blob_memory_cache
+        self.derivative_cache_size = derivative_cache_size
         self.lab_path = self.path / ".lab"
         self.notebooks_path = self.path / "notebooks"
         self.artifacts_path = self.path / "artifacts"
@@ -47,21 +98,39 @@ class Workspace:
     def storage_manager(self) -> StorageManager:
         """Get the storage manager."""
         if self._storage_manager is None:
-            self._storage_manager = StorageManager(self.lab_path / "storage")
+            self._storage_manager = self._new_storage_manager()
         return self._storage_manager
 
+    def _new_storage_manager(self) -> StorageManager:
+        config = self.get_config()
+        backend_url = self.blob_backend or config.get("blob_backend")
+        cache_size = self.blob_cache_size or config.get("blob_cache_size")
+        return StorageManager(
+            self.lab_path / "storage",
+            thumbnail_workers=self.thumbnail_workers,
+            pack_threshold=self.pack_threshold,
+            chunking=self.chunked_storage,
+            backend=open_backend(backend_url) if backend_url else None,
+            cache_size=cache_size,
+            thumbnail_memory_cache=self.thumbnail_memory_cache,
+            blob_memory_cache=self.blob_memory_cache,
+            derivative_cache_size=self.derivative_cache_size,
+        )
+
     @property
     def git_manager(self) -> GitManager:
         """Get the Git manager."""
         if self._git_manager is None:
-            self._git_manager = GitManager(self.lab_path / "git")
+            self._git_manager = GitManager(
+                self.lab_path / "git", commit_window=self.git_commit_window
+            )
             self._git_manager.load()
         return self._git_manager
 
     @classmethod
-    def initialize(cls, path: Path, name: str) -> "Workspace":
+    def initialize(cls, path: Path, name: str, **options) -> "Workspace":
         """Initialize a new workspace."""
-        ws = cls(path)
+        ws = cls(path, **options)
 
         # Create directory structure
         ws.lab_path.mkdir(parents=True, exist_ok=True)
@@ -72,14 +141,16 @@ class Workspace:
         ws.artifacts_path.mkdir(parents=True, exist_ok=True)
 
         # Initialize Git
-        ws._git_manager = GitManager.initialize(ws.lab_path / "git")
+        ws._git_manager = GitManager.initialize(
+            ws.lab_path / "git", commit_window=ws.git_commit_window
+        )
 
         # Initialize database
         ws._db_manager = DatabaseManager(ws.lab_path / "db" / "index.db")
         ws._db_manager.initialize()
 
         # Initialize storage
-        ws._storage_manager = StorageManager(ws.lab_path / "storage")
+        ws._storage_manager = ws._new_storage_manager()
         ws._storage_manager.initialize()
 
         # Create config
@@ -88,6 +159,11 @@ class Workspace:
             "version": "1.0.0",
             "created_at": _now().isoformat(),
         }
+        # Recorded so every process opening the workspace shares the store
+        if ws.blob_backend:
+            config["blob_backend"] = ws.blob_backend
+        if ws.blob_cache_size:
+            config["blob_cache_size"] = ws.blob_cache_size
 
         with open(ws.lab_path / "config.json", "w") as f:
             json.dump(config, f, indent=2)
@@ -95,15 +171,35 @@ class Workspace:
         return ws
 
     @classmethod
-    def load(cls, path: Path) -> "Workspace":
+    def load(cls, path: Path, **options) -> "Workspace":
         """Load an existing workspace."""
-        ws = cls(path)
+        ws = cls(path, **options)
 
         if not ws.is_initialized():
             raise ValueError(f"No workspace found at {path}")
 
         return ws
 
+    def close(self):
+        """Release database connections, worker processes and the Git handle."""
+        if self._db_manager is not None:
+            self._db_manager.close()
+        if self._storage_manager is not None:
+            self._storage_manager.close()
+        if self._git_manager is not None:
+            self._git_manager.close()
+
+    def stats(self) -> dict:
+        """Get runtime statistics for the managers that have been loaded."""
+        stats = {}
+        if self._git_manager is not None:
+            stats["git"] = self._git_manager.stats()
+        if self._storage_manager is not None:
+            stats["thumbnails"] = self._storage_manager.thumbnails.stats()
+            stats["memory_cache"] = self._storage_manager.memory_cache_stats()
+            stats["derivatives"] = self._storage_manager.derivatives.stats()
+        return stats
+
     def is_initialized(self) -> bool:
         """Check if workspace is initialized."""
         return (self.lab_path / "config.json").exists()
@@ -127,24 +223,18 @@ class Workspace:
 
         return Notebook.create(self, title, description, tags or [])
 
-    def list_notebooks(self) -> list["Notebook"]:
-        """List all notebooks."""
+    def list_notebooks(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> list["Notebook"]:
+        """List notebooks, newest first, optionally one page at a time."""
         from codex.core.notebook import Notebook
 
         session = self.db_manager.get_session()
         try:
-            notebooks = NotebookModel.get_all(session)
+            query = session.query(NotebookModel).options(NOTEBOOK_TAGS)
+            notebooks = paginate(query, NotebookModel, limit, cursor).all()
             return [
-                Notebook.from_dict(self, {
-                    "id": nb.id,
-                    "title": nb.title,
-                    "description": nb.description,
-                    "created_at": nb.created_at.isoformat() if nb.created_at else None,
-                    "updated_at": nb.updated_at.isoformat() if nb.updated_at else None,
-                    "settings": json.loads(nb.settings) if nb.settings else {},
-                    "metadata": json.loads(nb.metadata_) if nb.metadata_ else {},
-                    "tags": [nt.tag.name for nt in nb.tags] if nb.tags else [],
-                })
+                Notebook.from_dict(self, notebook_to_dict(nb))
                 for nb in notebooks
             ]
         finally:
@@ -158,16 +248,7 @@ class Workspace:
         try:
             notebook = NotebookModel.get_by_id(session, notebook_id)
             if notebook:
-                return Notebook.from_dict(self, {
-                    "id": notebook.id,
-                    "title": notebook.title,
-                    "description": notebook.description,
-                    "created_at": notebook.created_at.isoformat() if notebook.created_at else None,
-                    "updated_at": notebook.updated_at.isoformat() if notebook.updated_at else None,
-                    "settings": json.loads(notebook.settings) if notebook.settings else {},
-                    "metadata": json.loads(notebook.metadata_) if notebook.metadata_ else {},
-                    "tags": [nt.tag.name for nt in notebook.tags] if notebook.tags else [],
-                })
+                return Notebook.from_dict(self, notebook_to_dict(notebook))
             return None
         finally:
             session.close()
@@ -181,50 +262,24 @@ class Workspace:
         date_to: Optional[datetime] = None,
         notebook_id: Optional[str] = None,
         page_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        where: Optional[list[str]] = None,
     ) -> list[dict]:
-        """Search entries across the workspace."""
-        session = self.db_manager.get_session()
-        try:
-            query_obj = session.query(EntryModel)
-
-            if notebook_id:
-                query_obj = query_obj.join(PageModel).filter(
-                    PageModel.notebook_id == notebook_id
-                )
-
-            if page_id:
-                query_obj = query_obj.filter(EntryModel.page_id == page_id)
-
-            if entry_type:
-                query_obj = query_obj.filter(EntryModel.entry_type == entry_type)
-
-            if date_from:
-                query_obj = query_obj.filter(EntryModel.created_at >= date_from)
-
-            if date_to:
-                query_obj = query_obj.filter(EntryModel.created_at <= date_to)
+        """Search entries across the workspace.
 
-            entries = query_obj.order_by(EntryModel.created_at.desc()).all()
-            return [
-                {
-                    "id": e.id,
-                    "page_id": e.page_id,
-                    "entry_type": e.entry_type,
-                    "title": e.title,
-                    "created_at": e.created_at.isoformat() if e.created_at else None,
-                    "status": e.status,
-                    "parent_id": e.parent_id,
-                    "inputs": json.loads(e.inputs) if e.inputs else {},
-                    "outputs": json.loads(e.outputs) if e.outputs else {},
-                    "execution": json.loads(e.execution) if e.execution else {},
-                    "metrics": json.loads(e.metrics) if e.metrics else {},
-                    "metadata": json.loads(e.metadata_) if e.metadata_ else {},
-                    "tags": [et.tag.name for et in e.tags] if e.tags else [],
-                }
-                for e in entries
-            ]
-        finally:
-            session.close()
+        See DatabaseManager.search_entries for the matching semantics.
+        """
+        return self.db_manager.search_entries({
+            "query": query,
+            "entry_type": entry_type,
+            "tags": tags,
+            "where": where,
+            "date_from": date_from,
+            "date_to": date_to,
+            "notebook_id": notebook_id,
+            "page_id": page_id,
+        }, limit=limit, cursor=cursor)
 
     def _read_sidecar(self, file_path: Path) -> Optional[dict]:
         """
@@ -326,3 +381,85 @@ class Workspace:
             return []
 
         return self._scan_directory(self.artifacts_path, self.artifacts_path)
+
+
+class WorkspaceRegistry:
+    """Thread-safe cache of loaded workspaces, keyed by resolved path.
+
+    Long-running processes (the API server) keep one Workspace per path so
+    the database engine, storage manager and Git repository handle are
+    created once instead of on every request.
+    """
+
+    def __init__(self, **workspace_options):
+        """Initialize an empty registry.
+
+        Args:
+            **workspace_options: Passed to every Workspace the registry loads
+                or initializes (e.g. git_commit_window).
+        """
+        self.workspace_options = workspace_options
+        self._workspaces: dict[Path, Workspace] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, path: Path) -> Workspace:
+        """Get the cached workspace for a path, loading it on first use."""
+        key = Path(path).resolve()
+        with self._lock:
+            ws = self._workspaces.get(key)
+            if ws is not None:
+                self.hits += 1
+                return ws
+
+            self.misses += 1
+            ws = Workspace.load(key, **self.workspace_options)
+            self._workspaces[key] = ws
+            return ws
+
+    def initialize(self, path: Path, name: str) -> Workspace:
+        """Initialize a workspace and replace any cached instance for its path."""
+        key = Path(path).resolve()
+        with self._lock:
+            self._evict(key)
+            ws = Workspace.initialize(key, name, **self.workspace_options)
+            self._workspaces[key] = ws
+            return ws
+
+    def invalidate(self, path: Path) -> bool:
+        """Drop the cached workspace for a path, closing its managers."""
+        key = Path(path).resolve()
+        with self._lock:
+            return self._evict(key)
+
+    def close(self):
+        """Close and drop every cached workspace."""
+        with self._lock:
+            for key in list(self._workspaces):
+                self._evict(key)
+
+    def stats(self) -> dict:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                "workspaces": len(self._workspaces),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+    def loaded(self) -> list[Workspace]:
+        """Get a snapshot of the cached workspaces."""
+        with self._lock:
+            return list(self._workspaces.values())
+
+    def _evict(self, key: Path) -> bool:
+        """Remove a workspace from the cache. Caller must hold the lock."""
+        ws = self._workspaces.pop(key, None)
+        if ws is None:
+            return False
+        ws.close()
+        self.invalidations += 1
+        return True
@@ -11,7 +11,7 @@ from codex.db.migrate import (
     run_migrations,
     stamp_revision,
 )
-from codex.db.models import Base, get_engine, get_session, init_db
+from codex.db.models import Base, get_engine, get_session, get_session_factory, init_db
 from codex.db.operations import DatabaseManager
 
 __all__ = [
@@ -23,6 +23,7 @@ __all__ = [
     "get_migration_history",
     "get_pending_migrations",
     "get_session",
+    "get_session_factory",
     "init_db",
     "initialize_migrations",
     "is_up_to_date",
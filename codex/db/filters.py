@@ -0,0 +1,150 @@
+"""Filters on values inside the JSON columns of entries.
+
+Inputs, outputs, metrics, execution details and metadata are stored as
+JSON text. A filter such as ``metrics.loss < 0.05`` compiles to a
+``json_extract()`` predicate, so SQLite evaluates it without the rows
+being decoded in Python, and an expression index on the same path (see
+``DatabaseManager.create_json_index``) turns it into an index search.
+
+Syntax: ``<column>.<path> <op> <value>``, where the column is one of
+JSON_COLUMNS, the path is a chain of ``.key`` and ``[index]`` steps, the
+operator is one of ``= == != < <= > >=`` and the value is a JSON literal
+(``0.05``, ``"sdxl"``, ``true``, ``null``) or a bare word, taken as a
+string.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+from codex.db.models import Entry
+
+# Filterable columns of entries: name in filters -> mapped attribute
+JSON_COLUMNS = {
+    "inputs": "inputs",
+    "outputs": "outputs",
+    "metrics": "metrics",
+    "execution": "execution",
+    "metadata": "metadata_",
+}
+
+# Paths are written into the SQL (an expression index only matches a
+# query with the same literal path), so they are restricted to plain keys
+# and array indexes
+_PATH = re.compile(r"^(?P<column>[a-z]+)(?P<path>(?:\.[A-Za-z_][A-Za-z0-9_]*|\[\d+\])+)$")
+_FILTER = re.compile(r"^\s*(?P<target>[^\s=!<>]+)\s*(?P<op>==|!=|<=|>=|=|<|>)\s*(?P<value>.*?)\s*$")
+
+_OPERATORS = {
+    "=": lambda expr, value: expr == value,
+    "==": lambda expr, value: expr == value,
+    "!=": lambda expr, value: expr != value,
+    "<": lambda expr, value: expr < value,
+    "<=": lambda expr, value: expr <= value,
+    ">": lambda expr, value: expr > value,
+    ">=": lambda expr, value: expr >= value,
+}
+
+
+@dataclass(frozen=True)
+class JsonPath:
+    """A value inside a JSON column, e.g. ``metrics.loss``."""
+
+    column: str
+    path: str  # JSON path, e.g. "$.loss"
+
+    @classmethod
+    def parse(cls, text: str) -> "JsonPath":
+        """Parse ``<column>.<path>``.
+
+        Raises:
+            ValueError: If the column isn't filterable or the path is malformed
+        """
+        match = _PATH.match(text.strip())
+        if not match:
+            raise ValueError(f"Invalid JSON path: {text!r} (e.g. metrics.loss or inputs.sizes[0])")
+        if match["column"] not in JSON_COLUMNS:
+            raise ValueError(
+                f"Unknown column: {match['column']} (choose from {', '.join(JSON_COLUMNS)})"
+            )
+        return cls(match["column"], "$" + match["path"])
+
+    def __str__(self) -> str:
+        return self.column + self.path[1:]
+
+    @property
+    def expression(self) -> ColumnElement:
+        """``json_extract()`` of this path on the entries table."""
+        column = getattr(Entry, JSON_COLUMNS[self.column])
+        return func.json_extract(column, literal_column(f"'{self.path}'"))
+
+    @property
+    def index_name(self) -> str:
+        """Name of the expression index on this path.
+
+        The readable part maps ``metrics.a.b`` and ``metrics.a_b`` alike, so
+        a short hash of the path keeps names of different paths apart.
+        """
+        readable = re.sub(r"\W+", "_", str(self)).strip("_")
+        digest = hashlib.sha256(str(self).encode()).hexdigest()[:8]
+        return f"idx_entries_json_{readable}_{digest}"
+
+    @property
+    def index_ddl(self) -> str:
+        """CREATE INDEX statement for this path."""
+        return (
+            f"CREATE INDEX IF NOT EXISTS {self.index_name} "
+            f"ON entries (json_extract({self.column}, '{self.path}'))"
+        )
+
+
+@dataclass(frozen=True)
+class JsonFilter:
+    """A comparison of a JSON value, e.g. ``metrics.loss < 0.05``."""
+
+    target: JsonPath
+    op: str
+    value: Any
+
+    @classmethod
+    def parse(cls, text: str) -> "JsonFilter":
+        """Parse ``<column>.<path> <op> <value>``.
+
+        Raises:
+            ValueError: If the filter is malformed
+        """
+        match = _FILTER.match(text)
+        if not match or not match["value"]:
+            raise ValueError(f"Invalid filter: {text!r} (e.g. metrics.loss < 0.05)")
+        try:
+            value = json.loads(match["value"])
+        except json.JSONDecodeError:
+            value = match["value"]
+        if isinstance(value, (list, dict)):
+            raise ValueError(f"Invalid filter: {text!r} (values must be scalars)")
+        if value is None and match["op"] not in ("=", "==", "!="):
+            raise ValueError(f"Invalid filter: {text!r} (null only compares with = and !=)")
+        return cls(JsonPath.parse(match["target"]), match["op"], value)
+
+    def clause(self) -> ColumnElement:
+        """SQL predicate for this filter.
+
+        Missing keys extract as NULL, so they only match ``= null``.
+        """
+        expr = self.target.expression
+        if self.value is None:
+            return expr.is_(None) if self.op != "!=" else expr.is_not(None)
+        return _OPERATORS[self.op](expr, self.value)
+
+
+def parse_filters(filters: list[str]) -> list[JsonFilter]:
+    """Parse a list of filters, which must all match.
+
+    Raises:
+        ValueError: If a filter is malformed
+    """
+    return [JsonFilter.parse(text) for text in filters]
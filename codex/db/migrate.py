@@ -209,7 +209,7 @@ def _is_revision_applied(revision: str, current: str | None, script: ScriptDirec
         return True
 
     # Walk from current back to base to see if revision is in ancestry
-    for rev in script.walk_revisions(current, "base"):
+    for rev in script.walk_revisions("base", current):
         if rev.revision == revision:
             return True
 
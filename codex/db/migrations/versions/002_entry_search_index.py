@@ -0,0 +1,98 @@
+"""Full-text search index for entries
+
+Revision ID: 002_entry_search_index
+Revises: 001_initial_schema
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "002_entry_search_index"
+down_revision = "001_initial_schema"
+branch_labels = None
+depends_on = None
+
+# Narrative text for an entry's page, indexed by value so JSON keys don't match
+_NARRATIVE = """
+    (SELECT group_concat(value, ' ') FROM pages, json_each(pages.narrative)
+        WHERE pages.id = {entry}.page_id AND json_valid(pages.narrative))
+"""
+
+_NOTES = """
+    CASE WHEN json_valid({entry}.metadata)
+        THEN json_extract({entry}.metadata, '$.notes') END
+"""
+
+
+def _index_row(entry: str) -> str:
+    """SELECT list producing an entries_fts row for the given entry alias."""
+    return (
+        f"{entry}.rowid, {entry}.title, {entry}.inputs, {entry}.outputs, "
+        f"{_NOTES.format(entry=entry)}, {_NARRATIVE.format(entry=entry)}"
+    )
+
+
+def upgrade() -> None:
+    """Create the entries_fts table, its sync triggers, and backfill it."""
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE entries_fts USING fts5(
+            title, inputs, outputs, notes, narrative,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER entries_fts_insert AFTER INSERT ON entries BEGIN
+            INSERT INTO entries_fts (rowid, title, inputs, outputs, notes, narrative)
+            SELECT {_index_row("new")};
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER entries_fts_update
+        AFTER UPDATE OF title, inputs, outputs, metadata, page_id ON entries BEGIN
+            DELETE FROM entries_fts WHERE rowid = old.rowid;
+            INSERT INTO entries_fts (rowid, title, inputs, outputs, notes, narrative)
+            SELECT {_index_row("new")};
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER entries_fts_delete AFTER DELETE ON entries BEGIN
+            DELETE FROM entries_fts WHERE rowid = old.rowid;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER pages_fts_narrative
+        AFTER UPDATE OF narrative ON pages BEGIN
+            UPDATE entries_fts SET narrative = (
+                SELECT group_concat(value, ' ') FROM json_each(new.narrative)
+                WHERE json_valid(new.narrative)
+            )
+            WHERE rowid IN (SELECT rowid FROM entries WHERE page_id = new.id);
+        END
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO entries_fts (rowid, title, inputs, outputs, notes, narrative)
+        SELECT {_index_row("entries")} FROM entries
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the search index and its triggers."""
+    op.execute("DROP TRIGGER IF EXISTS pages_fts_narrative")
+    op.execute("DROP TRIGGER IF EXISTS entries_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS entries_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS entries_fts_insert")
+    op.execute("DROP TABLE IF EXISTS entries_fts")
@@ -0,0 +1,25 @@
+"""Index entry lineage by child
+
+Revision ID: 003_lineage_child_index
+Revises: 002_entry_search_index
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "003_lineage_child_index"
+down_revision = "002_entry_search_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index entry_lineage.child_id for ancestor traversal."""
+    op.create_index("idx_lineage_child", "entry_lineage", ["child_id"])
+
+
+def downgrade() -> None:
+    """Drop the child index."""
+    op.drop_index("idx_lineage_child", table_name="entry_lineage")
@@ -0,0 +1,130 @@
+"""Reference-counted blobs shared between artifacts
+
+Revision ID: 004_blob_refcounts
+Revises: 003_lineage_child_index
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "004_blob_refcounts"
+down_revision = "003_lineage_child_index"
+branch_labels = None
+depends_on = None
+
+# Release a reference on old.hash; released_at marks when it dropped to zero
+_DETACH = """
+        UPDATE blobs SET
+            refcount = refcount - 1,
+            released_at = CASE WHEN refcount <= 1 THEN CURRENT_TIMESTAMP END
+        WHERE hash = old.hash;
+"""
+
+_ATTACH = """
+        INSERT INTO blobs (hash, size_bytes, type, refcount, created_at)
+        VALUES (new.hash, new.size_bytes, new.type, 1, {created_at})
+        ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1, released_at = NULL;
+"""
+
+
+def _artifacts_table(unique_hash: bool) -> sa.Table:
+    """Definition of the artifacts table, for rebuilding it in batch mode."""
+    hash_constraints = (
+        [sa.UniqueConstraint("hash")]
+        if unique_hash
+        else [sa.ForeignKeyConstraint(["hash"], ["blobs.hash"])]
+    )
+    return sa.Table(
+        "artifacts",
+        sa.MetaData(),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("entry_id", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("hash", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("thumbnail_path", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archived", sa.Boolean(), nullable=True),
+        sa.Column("archive_strategy", sa.String(), nullable=True),
+        sa.Column("original_size_bytes", sa.Integer(), nullable=True),
+        sa.Column("metadata", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["entry_id"], ["entries.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        *hash_constraints,
+        sa.Index("idx_artifacts_entry", "entry_id"),
+        sa.Index("idx_artifacts_hash", "hash"),
+    )
+
+
+def upgrade() -> None:
+    """Create the blobs table, backfill it and let artifacts share blobs."""
+    op.create_table(
+        "blobs",
+        sa.Column("hash", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("refcount", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("released_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("hash"),
+    )
+    op.create_index(
+        "idx_blobs_unreferenced",
+        "blobs",
+        ["released_at"],
+        sqlite_where=sa.text("refcount <= 0"),
+    )
+    op.execute(
+        """
+        INSERT INTO blobs (hash, size_bytes, type, refcount, created_at)
+        SELECT hash, max(size_bytes), min(type), count(*), min(created_at)
+        FROM artifacts GROUP BY hash
+        """
+    )
+
+    # Rebuild artifacts without the UNIQUE(hash) constraint
+    with op.batch_alter_table(
+        "artifacts", recreate="always", copy_from=_artifacts_table(unique_hash=False)
+    ):
+        pass
+
+    op.execute(
+        f"""
+        CREATE TRIGGER artifacts_blob_attach AFTER INSERT ON artifacts BEGIN
+            {_ATTACH.format(created_at="new.created_at")}
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER artifacts_blob_detach AFTER DELETE ON artifacts BEGIN
+            {_DETACH}
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER artifacts_blob_move
+        AFTER UPDATE OF hash ON artifacts WHEN new.hash != old.hash BEGIN
+            {_DETACH}
+            {_ATTACH.format(created_at="CURRENT_TIMESTAMP")}
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the blobs table; fails if a blob is shared by several artifacts."""
+    op.execute("DROP TRIGGER IF EXISTS artifacts_blob_attach")
+    op.execute("DROP TRIGGER IF EXISTS artifacts_blob_detach")
+    op.execute("DROP TRIGGER IF EXISTS artifacts_blob_move")
+    with op.batch_alter_table(
+        "artifacts", recreate="always", copy_from=_artifacts_table(unique_hash=True)
+    ):
+        pass
+    op.drop_index("idx_blobs_unreferenced", table_name="blobs")
+    op.drop_table("blobs")
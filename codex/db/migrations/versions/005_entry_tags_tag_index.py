@@ -0,0 +1,25 @@
+"""Index entry tags by tag
+
+Revision ID: 005_entry_tags_tag_index
+Revises: 004_blob_refcounts
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "005_entry_tags_tag_index"
+down_revision = "004_blob_refcounts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index entry_tags by (tag_id, entry_id) for tag filters."""
+    op.create_index("idx_entry_tags_tag", "entry_tags", ["tag_id", "entry_id"])
+
+
+def downgrade() -> None:
+    """Drop the tag index."""
+    op.drop_index("idx_entry_tags_tag", table_name="entry_tags")
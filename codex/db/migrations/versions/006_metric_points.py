@@ -0,0 +1,40 @@
+"""Append-only table of step-wise metric values
+
+Revision ID: 006_metric_points
+Revises: 005_entry_tags_tag_index
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "006_metric_points"
+down_revision = "005_entry_tags_tag_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the metric_points table."""
+    op.create_table(
+        "metric_points",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("entry_id", sa.String(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("step", sa.Integer(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["entry_id"], ["entries.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_metric_points_series", "metric_points", ["entry_id", "key", "step"]
+    )
+
+
+def downgrade() -> None:
+    """Drop the metric_points table."""
+    op.drop_index("idx_metric_points_series", table_name="metric_points")
+    op.drop_table("metric_points")
@@ -1,5 +1,7 @@
 """SQLAlchemy models for Lab Notebook."""
 
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Any, ClassVar, Optional, TypeVar
 
@@ -7,14 +9,21 @@ from sqlalchemy import (
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
     String,
     Text,
     create_engine,
+    event,
+    exists,
     inspect,
+    select,
+    text,
 )
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import DeclarativeBase, Session, relationship, sessionmaker
 
 T = TypeVar("T", bound="Base")
@@ -26,6 +35,20 @@ class Base(DeclarativeBase):
     # Class-level cache for foreign key info
     _fk_cache: ClassVar[dict[str, dict[str, tuple[str, str]]]] = {}
 
+    # Table name -> model class, built on first use
+    _models_by_table: ClassVar[dict[str, type["Base"]]] = {}
+
+    @classmethod
+    def model_for_table(cls, table_name: str) -> Optional[type["Base"]]:
+        """Get the model class mapped to a table, or None."""
+        if table_name not in Base._models_by_table:
+            Base._models_by_table = {
+                mapper.class_.__tablename__: mapper.class_
+                for mapper in Base.registry.mappers
+                if hasattr(mapper.class_, "__tablename__")
+            }
+        return Base._models_by_table.get(table_name)
+
     @classmethod
     def get_foreign_keys(cls) -> dict[str, tuple[str, str]]:
         """Get foreign key information for this model.
@@ -44,10 +67,22 @@ class Base(DeclarativeBase):
             cls._fk_cache[table_name] = fk_info
         return cls._fk_cache[table_name]
 
+    @classmethod
+    def _in_session(cls, session: Session, target_cls: type["Base"], column: str, value) -> bool:
+        """Whether the session holds the row with this primary key, flushed and not deleted."""
+        pk_columns = inspect(target_cls).primary_key
+        if len(pk_columns) != 1 or pk_columns[0].name != column:
+            return False
+        instance = session.identity_map.get(session.identity_key(target_cls, value))
+        return instance is not None and instance not in session.deleted
+
     @classmethod
     def validate_foreign_keys(cls, session: Session, data: dict[str, Any]) -> dict[str, Any]:
         """Validate that foreign key references exist.
 
+        References to rows the session already holds are taken on trust;
+        the others are checked together in one query.
+
         Args:
             session: SQLAlchemy session
             data: Dictionary of column values to validate
@@ -58,40 +93,68 @@ class Base(DeclarativeBase):
         Raises:
             ValueError: If a foreign key reference doesn't exist
         """
-        fk_info = cls.get_foreign_keys()
         fk_status = {}
-
-        for col_name, (target_table, target_column) in fk_info.items():
-            if col_name in data and data[col_name] is not None:
-                # Find the target model class
-                target_cls = None
-                for mapper in Base.registry.mappers:
-                    if hasattr(mapper.class_, "__tablename__"):
-                        if mapper.class_.__tablename__ == target_table:
-                            target_cls = mapper.class_
-                            break
-
-                if target_cls is not None:
-                    # Check if referenced record exists
-                    ref_value = data[col_name]
-                    exists = (
-                        session.query(target_cls)
-                        .filter(getattr(target_cls, target_column) == ref_value)
-                        .first()
-                    )
-                    if exists is None:
-                        raise ValueError(
-                            f"Foreign key constraint failed: {col_name}='{ref_value}' "
-                            f"references non-existent {target_table}.{target_column}"
-                        )
-                    fk_status[col_name] = {"exists": True, "table": target_table}
+        checks = {}
+        for col_name, (target_table, target_column) in cls.get_foreign_keys().items():
+            ref_value = data.get(col_name)
+            target_cls = cls.model_for_table(target_table)
+            if ref_value is None or target_cls is None:
+                continue
+            fk_status[col_name] = {"exists": True, "table": target_table}
+            if cls._in_session(session, target_cls, target_column, ref_value):
+                continue
+            checks[col_name] = exists().where(getattr(target_cls, target_column) == ref_value)
+
+        if checks:
+            row = session.execute(
+                select(*(check.label(col_name) for col_name, check in checks.items()))
+            ).one()
+            for col_name, found in row._mapping.items():
+                if not found:
+                    raise _foreign_key_error(cls, col_name, data[col_name])
 
         return fk_status
 
+    @classmethod
+    def missing_references(
+        cls, session: Session, rows: list[dict[str, Any]], batch_size: int = 500
+    ) -> dict[str, set[Any]]:
+        """Find the foreign key values of many rows that reference nothing.
+
+        For bulk paths: one ``IN`` query per foreign key column (and per
+        ``batch_size`` distinct values) instead of one query per row.
+
+        Args:
+            session: SQLAlchemy session
+            rows: Dictionaries of column values
+            batch_size: Most values per query
+
+        Returns:
+            Column name -> dangling values, for the columns that have any
+        """
+        missing = {}
+        for col_name, (target_table, target_column) in cls.get_foreign_keys().items():
+            target_cls = cls.model_for_table(target_table)
+            values = list({row[col_name] for row in rows if row.get(col_name) is not None})
+            if target_cls is None or not values:
+                continue
+            column = getattr(target_cls, target_column)
+            found = set()
+            for i in range(0, len(values), batch_size):
+                batch = values[i : i + batch_size]
+                found.update(session.execute(select(column).where(column.in_(batch))).scalars())
+            if len(found) < len(values):
+                missing[col_name] = set(values) - found
+        return missing
+
     @classmethod
     def create(cls: type[T], session: Session, validate_fk: bool = True, **kwargs: Any) -> T:
         """Create a new instance and add it to the session.
 
+        SQLite enforces foreign keys at commit; callers that skip
+        validation can wrap the commit in ``foreign_key_errors()`` to get
+        the same ValueError.
+
         Args:
             session: SQLAlchemy session
             validate_fk: Whether to validate foreign key references
@@ -99,13 +162,17 @@ class Base(DeclarativeBase):
 
         Returns:
             The created instance of the model type
+
+        Raises:
+            ValueError: If a foreign key reference doesn't exist
         """
         if validate_fk:
             cls.validate_foreign_keys(session, kwargs)
 
         instance = cls(**kwargs)
         session.add(instance)
-        session.flush()
+        with foreign_key_errors(session):
+            session.flush()
         return instance
 
     @classmethod
@@ -208,7 +275,8 @@ class Base(DeclarativeBase):
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
-        session.flush()
+        with foreign_key_errors(session):
+            session.flush()
         return self
 
     def delete(self: T, session: Session) -> bool:
@@ -246,6 +314,32 @@ class Base(DeclarativeBase):
         return False
 
 
+def _foreign_key_error(model: type[Base], col_name: str, value: Any) -> ValueError:
+    target_table, target_column = model.get_foreign_keys()[col_name]
+    return ValueError(
+        f"Foreign key constraint failed: {col_name}='{value}' "
+        f"references non-existent {target_table}.{target_column}"
+    )
+
+
+@contextmanager
+def foreign_key_errors(session: Session):
+    """Turn foreign key violations reported by SQLite into ValueError.
+
+    Connections defer foreign key checks to COMMIT, so violations surface
+    there (or at flush when checks aren't deferred). SQLite doesn't say
+    which reference failed, so the message is less specific than the one
+    from ``Base.validate_foreign_keys``. The session is rolled back.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        if "FOREIGN KEY constraint failed" not in str(e.orig):
+            raise
+        session.rollback()
+        raise ValueError(f"Foreign key constraint failed: {e.orig}") from e
+
+
 class Notebook(Base):
     """Notebook model - a collection of related work."""
 
@@ -335,8 +429,36 @@ Index("idx_entries_created", Entry.created_at.desc())
 Index("idx_entries_type", Entry.entry_type)
 
 
+class Blob(Base):
+    """Blob model - one row per stored content hash.
+
+    ``refcount`` is the number of artifacts attached to the blob. It is
+    maintained by triggers on the artifacts table (see BLOB_REFCOUNT_DDL),
+    so every write path keeps it in step. ``released_at`` is when the last
+    artifact was detached; the garbage collector removes blobs that have
+    stayed unreferenced since.
+    """
+
+    __tablename__ = "blobs"
+
+    hash = Column(String, primary_key=True)
+    size_bytes = Column(Integer, nullable=False)
+    type = Column(String, nullable=False)  # Type of the first artifact stored
+    refcount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    released_at = Column(DateTime, nullable=True)
+
+
+# Blobs the garbage collector may remove
+Index("idx_blobs_unreferenced", Blob.released_at, sqlite_where=Blob.refcount <= 0)
+
+
 class Artifact(Base):
-    """Artifact model - stored output files."""
+    """Artifact model - a blob attached to an entry.
+
+    Identical outputs of different entries (or of one entry) are separate
+    artifacts sharing one blob.
+    """
 
     __tablename__ = "artifacts"
 
@@ -345,7 +467,7 @@ class Artifact(Base):
         String, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False
     )
     type = Column(String, nullable=False)
-    hash = Column(String, nullable=False, unique=True)
+    hash = Column(String, ForeignKey("blobs.hash"), nullable=False)
     size_bytes = Column(Integer, nullable=False)
     path = Column(String, nullable=False)
     thumbnail_path = Column(String, nullable=True)
@@ -358,6 +480,7 @@ class Artifact(Base):
     metadata_ = Column("metadata", Text, nullable=True)  # JSON string
 
     entry = relationship("Entry", back_populates="artifacts")
+    blob = relationship("Blob")
 
 
 Index("idx_artifacts_entry", Artifact.entry_id)
@@ -379,6 +502,32 @@ class EntryLineage(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
 
+# parent_id is covered by the primary key; ancestor walks look up by child
+Index("idx_lineage_child", EntryLineage.child_id)
+
+
+class MetricPoint(Base):
+    """One value of a step-wise metric series (e.g. a loss curve).
+
+    Append-only; the summary of each series is kept in Entry.metrics.
+    """
+
+    __tablename__ = "metric_points"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entry_id = Column(
+        String, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False
+    )
+    key = Column(String, nullable=False)
+    step = Column(Integer, nullable=False)
+    value = Column(Float, nullable=False)
+    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Series are read by entry and key in step order
+Index("idx_metric_points_series", MetricPoint.entry_id, MetricPoint.key, MetricPoint.step)
+
+
 class Tag(Base):
     """Tag model."""
 
@@ -432,6 +581,10 @@ class EntryTag(Base):
     tag = relationship("Tag")
 
 
+# Tag filters look entries up by tag ID; the primary key leads with entry_id
+Index("idx_entry_tags_tag", EntryTag.tag_id, EntryTag.entry_id)
+
+
 class IntegrationVariable(Base):
     """Integration variable model - stores default values for integrations.
 
@@ -461,29 +614,219 @@ Index(
 )
 
 
-def get_engine(db_path: str):
-    """Create a database engine."""
-    return create_engine(f"sqlite:///{db_path}", echo=False)
+# Full-text search index over entries. Rows share the rowid of their entry
+# and are maintained by triggers, so every write path keeps it in sync.
+# Narratives and notes are indexed by value only so JSON keys don't match.
+SEARCH_INDEX_DDL: list[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+        title, inputs, outputs, notes, narrative,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+        INSERT INTO entries_fts (rowid, title, inputs, outputs, notes, narrative)
+        SELECT new.rowid, new.title, new.inputs, new.outputs,
+            CASE WHEN json_valid(new.metadata)
+                THEN json_extract(new.metadata, '$.notes') END,
+            (SELECT group_concat(value, ' ') FROM pages, json_each(pages.narrative)
+                WHERE pages.id = new.page_id AND json_valid(pages.narrative));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_fts_update
+    AFTER UPDATE OF title, inputs, outputs, metadata, page_id ON entries BEGIN
+        DELETE FROM entries_fts WHERE rowid = old.rowid;
+        INSERT INTO entries_fts (rowid, title, inputs, outputs, notes, narrative)
+        SELECT new.rowid, new.title, new.inputs, new.outputs,
+            CASE WHEN json_valid(new.metadata)
+                THEN json_extract(new.metadata, '$.notes') END,
+            (SELECT group_concat(value, ' ') FROM pages, json_each(pages.narrative)
+                WHERE pages.id = new.page_id AND json_valid(pages.narrative));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+        DELETE FROM entries_fts WHERE rowid = old.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pages_fts_narrative
+    AFTER UPDATE OF narrative ON pages BEGIN
+        UPDATE entries_fts SET narrative = (
+            SELECT group_concat(value, ' ') FROM json_each(new.narrative)
+            WHERE json_valid(new.narrative)
+        )
+        WHERE rowid IN (SELECT rowid FROM entries WHERE page_id = new.id);
+    END
+    """,
+]
+
+# Repopulates the search index from scratch (e.g. after VACUUM renumbers rowids)
+SEARCH_INDEX_REBUILD: list[str] = [
+    "DELETE FROM entries_fts",
+    """
+    INSERT INTO entries_fts (rowid, title, inputs, outputs, notes, narrative)
+    SELECT entries.rowid, entries.title, entries.inputs, entries.outputs,
+        CASE WHEN json_valid(entries.metadata)
+            THEN json_extract(entries.metadata, '$.notes') END,
+        (SELECT group_concat(value, ' ') FROM pages, json_each(pages.narrative)
+            WHERE pages.id = entries.page_id AND json_valid(pages.narrative))
+    FROM entries
+    """,
+]
+
+
+# Blob reference counts, kept in step with the artifacts attached to each
+# blob. Inserting an artifact registers its blob on first use.
+BLOB_REFCOUNT_DDL: list[str] = [
+    """
+    CREATE TRIGGER IF NOT EXISTS artifacts_blob_attach AFTER INSERT ON artifacts BEGIN
+        INSERT INTO blobs (hash, size_bytes, type, refcount, created_at)
+        VALUES (new.hash, new.size_bytes, new.type, 1, new.created_at)
+        ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1, released_at = NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artifacts_blob_detach AFTER DELETE ON artifacts BEGIN
+        UPDATE blobs SET
+            refcount = refcount - 1,
+            released_at = CASE WHEN refcount <= 1 THEN CURRENT_TIMESTAMP END
+        WHERE hash = old.hash;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artifacts_blob_move
+    AFTER UPDATE OF hash ON artifacts WHEN new.hash != old.hash BEGIN
+        UPDATE blobs SET
+            refcount = refcount - 1,
+            released_at = CASE WHEN refcount <= 1 THEN CURRENT_TIMESTAMP END
+        WHERE hash = old.hash;
+        INSERT INTO blobs (hash, size_bytes, type, refcount, created_at)
+        VALUES (new.hash, new.size_bytes, new.type, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1, released_at = NULL;
+    END
+    """,
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    """Create the search index and refcount triggers alongside create_all() tables."""
+    if connection.dialect.name == "sqlite":
+        for statement in SEARCH_INDEX_DDL + BLOB_REFCOUNT_DDL:
+            connection.execute(text(statement))
+
+
+# Pragmas applied to every new SQLite connection. WAL lets readers proceed
+# while a writer is active; synchronous=NORMAL is durable in WAL mode apart
+# from the last transactions before a power loss.
+SQLITE_PRAGMAS: dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # Negative values are KiB, i.e. 64 MiB
+    "mmap_size": 256 * 1024 * 1024,
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,  # Milliseconds
+}
+
+# Default connection pool settings for get_engine()
+DEFAULT_POOL_OPTIONS: dict[str, Any] = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_recycle": -1,
+}
+
+# One sessionmaker per engine, dropped when the engine is garbage collected
+_session_factories: "weakref.WeakKeyDictionary[Engine, sessionmaker]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _apply_pragmas(pragmas: dict[str, Any]):
+    """Build a connect-event listener that applies the given pragmas."""
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def _defer_foreign_keys(connection):
+    """Check foreign keys at COMMIT rather than per statement.
+
+    SQLite resets defer_foreign_keys after every transaction, so it is
+    re-enabled each time a transaction begins. This keeps the semantics of
+    flush-then-commit sessions where rows may reference each other before
+    the transaction is complete.
+    """
+    connection.exec_driver_sql("PRAGMA defer_foreign_keys=ON")
+
+
+def get_engine(
+    db_path: str,
+    pragmas: Optional[dict[str, Any]] = None,
+    **pool_options: Any,
+) -> Engine:
+    """Create a database engine.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        pragmas: Overrides for SQLITE_PRAGMAS, applied on every new connection.
+        **pool_options: Overrides for DEFAULT_POOL_OPTIONS (pool_size,
+            max_overflow, pool_timeout, pool_recycle, ...).
+
+    Returns:
+        SQLAlchemy engine instance.
+    """
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        echo=False,
+        **{**DEFAULT_POOL_OPTIONS, **pool_options},
+    )
+
+    connection_pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    event.listen(engine, "connect", _apply_pragmas(connection_pragmas))
+    if str(connection_pragmas.get("foreign_keys", "")).upper() in ("ON", "1", "TRUE"):
+        event.listen(engine, "begin", _defer_foreign_keys)
+
+    return engine
+
+
+def get_session_factory(engine: Engine) -> sessionmaker:
+    """Get the session factory for an engine, creating it once."""
+    factory = _session_factories.get(engine)
+    if factory is None:
+        factory = sessionmaker(bind=engine)
+        _session_factories[engine] = factory
+    return factory
 
 
-def get_session(engine):
-    """Create a session factory."""
-    Session = sessionmaker(bind=engine)
-    return Session()
+def get_session(engine: Engine) -> Session:
+    """Create a new session bound to the engine."""
+    return get_session_factory(engine)()
 
 
-def init_db(db_path: str, use_migrations: bool = True):
+def init_db(db_path: str, use_migrations: bool = True, **engine_options: Any):
     """Initialize the database schema.
 
     Args:
         db_path: Path to the SQLite database file.
         use_migrations: If True, use Alembic migrations. If False, use create_all().
                        Defaults to True.
+        **engine_options: Passed through to get_engine().
 
     Returns:
         SQLAlchemy engine instance.
     """
-    engine = get_engine(db_path)
+    engine = get_engine(db_path, **engine_options)
 
     if use_migrations:
         from codex.db.migrate import initialize_migrations
@@ -4,23 +4,49 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+from sqlalchemy import (
+    and_,
+    column,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from codex.db.filters import JsonPath, parse_filters
 from codex.db.models import (
+    SEARCH_INDEX_REBUILD,
     Artifact,
     Entry,
     EntryLineage,
     EntryTag,
     IntegrationVariable,
+    MetricPoint,
     Notebook,
     NotebookTag,
     Page,
     PageTag,
-    Tag,
     get_engine,
-    get_session,
+    get_session_factory,
     init_db,
 )
+from codex.db.pagination import after_cursor, decode_cursor, paginate
+from codex.db.serialization import (
+    ENTRY_TAGS,
+    NOTEBOOK_TAGS,
+    PAGE_TAGS,
+    artifact_to_dict,
+    entry_to_dict,
+    notebook_to_dict,
+    page_to_dict,
+)
+from codex.db.tags import TagCache
 
 
 def _parse_datetime(value) -> datetime:
@@ -36,14 +62,47 @@ def _parse_datetime(value) -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
+# Upper bound for lineage walks requested through the API and CLI
+MAX_LINEAGE_DEPTH = 1000
+
+# Entries per transaction when importing in bulk
+BULK_CHUNK_SIZE = 1000
+
+# Lightweight handle on the FTS5 table maintained by SEARCH_INDEX_DDL
+_entries_fts = table("entries_fts", column("rowid"))
+
+
+def _fts_query(query: str) -> str:
+    """Convert free text into an FTS5 MATCH expression.
+
+    Each whitespace-separated term is quoted so user input can't produce
+    FTS syntax errors; all terms must match. A trailing '*' on a term is
+    kept as a prefix search.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*") and len(term) > 1
+        term = term.rstrip("*") if prefix else term
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
 class DatabaseManager:
     """Manager for database operations."""
 
-    def __init__(self, db_path: Path):
-        """Initialize the database manager."""
+    def __init__(self, db_path: Path, **engine_options):
+        """Initialize the database manager.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            **engine_options: Pragma and pool overrides passed to get_engine().
+        """
         self.db_path = db_path
+        self.engine_options = engine_options
         self.engine = None
-        self._session = None
+        self._session_factory = None
+        self.tags = TagCache()
 
     def initialize(self, use_migrations: bool = True):
         """Initialize the database.
@@ -52,13 +111,36 @@ class DatabaseManager:
             use_migrations: If True, use Alembic migrations. If False, use create_all().
                            Defaults to True.
         """
-        self.engine = init_db(str(self.db_path), use_migrations=use_migrations)
+        self.close()
+        self.engine = init_db(
+            str(self.db_path), use_migrations=use_migrations, **self.engine_options
+        )
+        self._session_factory = get_session_factory(self.engine)
+        self.warm_tags()
+
+    def warm_tags(self):
+        """Load every tag into the in-memory tag dictionary."""
+        session = self.get_session()
+        try:
+            self.tags.warm(session)
+        finally:
+            session.close()
 
     def get_session(self) -> Session:
         """Get a database session."""
-        if self.engine is None:
-            self.engine = get_engine(str(self.db_path))
-        return get_session(self.engine)
+        if self._session_factory is None:
+            if self.engine is None:
+                self.engine = get_engine(str(self.db_path), **self.engine_options)
+            self._session_factory = get_session_factory(self.engine)
+        return self._session_factory()
+
+    def close(self):
+        """Dispose of the engine and its pooled connections."""
+        if self.engine is not None:
+            self.engine.dispose()
+            self.engine = None
+        self._session_factory = None
+        self.tags.clear()
 
     def run_migrations(self, revision: str = "head") -> None:
         """Run database migrations up to the specified revision.
@@ -118,10 +200,10 @@ class DatabaseManager:
             session.add(notebook)
 
             # Handle tags
-            for tag_name in notebook_data.get("tags", []):
-                tag = self._get_or_create_tag(session, tag_name)
-                notebook_tag = NotebookTag(notebook_id=notebook.id, tag_id=tag.id)
-                session.add(notebook_tag)
+            tag_ids = self.tags.ensure(session, notebook_data.get("tags", []))
+            session.add_all(
+                NotebookTag(notebook_id=notebook.id, tag_id=tag_id) for tag_id in tag_ids.values()
+            )
 
             session.commit()
             return notebook
@@ -136,19 +218,23 @@ class DatabaseManager:
                 session.query(Notebook).filter(Notebook.id == notebook_id).first()
             )
             if notebook:
-                return self._notebook_to_dict(notebook)
+                return notebook_to_dict(notebook)
             return None
         finally:
             session.close()
 
-    def list_notebooks(self) -> list[dict]:
-        """List all notebooks."""
+    def list_notebooks(
+        self, limit: int | None = None, cursor: str | None = None
+    ) -> list[dict]:
+        """List notebooks, newest first.
+
+        Pass the cursor of the last returned row to fetch the next page.
+        """
         session = self.get_session()
         try:
-            notebooks = (
-                session.query(Notebook).order_by(Notebook.created_at.desc()).all()
-            )
-            return [self._notebook_to_dict(nb) for nb in notebooks]
+            query = session.query(Notebook).options(NOTEBOOK_TAGS)
+            notebooks = paginate(query, Notebook, limit, cursor).all()
+            return [notebook_to_dict(nb) for nb in notebooks]
         finally:
             session.close()
 
@@ -170,7 +256,7 @@ class DatabaseManager:
                     notebook.metadata_ = json.dumps(data["metadata"])
                 notebook.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
                 session.commit()
-                return self._notebook_to_dict(notebook)
+                return notebook_to_dict(notebook)
             return None
         finally:
             session.close()
@@ -212,10 +298,8 @@ class DatabaseManager:
             session.add(page)
 
             # Handle tags
-            for tag_name in page_data.get("tags", []):
-                tag = self._get_or_create_tag(session, tag_name)
-                page_tag = PageTag(page_id=page.id, tag_id=tag.id)
-                session.add(page_tag)
+            tag_ids = self.tags.ensure(session, page_data.get("tags", []))
+            session.add_all(PageTag(page_id=page.id, tag_id=tag_id) for tag_id in tag_ids.values())
 
             session.commit()
             return page
@@ -228,22 +312,24 @@ class DatabaseManager:
         try:
             page = session.query(Page).filter(Page.id == page_id).first()
             if page:
-                return self._page_to_dict(page)
+                return page_to_dict(page)
             return None
         finally:
             session.close()
 
-    def list_pages(self, notebook_id: str) -> list[dict]:
-        """List all pages in a notebook."""
+    def list_pages(
+        self, notebook_id: str, limit: int | None = None, cursor: str | None = None
+    ) -> list[dict]:
+        """List pages in a notebook, newest first."""
         session = self.get_session()
         try:
-            pages = (
+            query = (
                 session.query(Page)
+                .options(PAGE_TAGS)
                 .filter(Page.notebook_id == notebook_id)
-                .order_by(Page.date.desc())
-                .all()
             )
-            return [self._page_to_dict(p) for p in pages]
+            pages = paginate(query, Page, limit, cursor).all()
+            return [page_to_dict(p) for p in pages]
         finally:
             session.close()
 
@@ -263,7 +349,7 @@ class DatabaseManager:
                     page.metadata_ = json.dumps(data["metadata"])
                 page.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
                 session.commit()
-                return self._page_to_dict(page)
+                return page_to_dict(page)
             return None
         finally:
             session.close()
@@ -303,38 +389,135 @@ class DatabaseManager:
             session.add(entry)
 
             # Handle tags
-            for tag_name in entry_data.get("tags", []):
-                tag = self._get_or_create_tag(session, tag_name)
-                entry_tag = EntryTag(entry_id=entry.id, tag_id=tag.id)
-                session.add(entry_tag)
+            tag_ids = self.tags.ensure(session, entry_data.get("tags", []))
+            session.add_all(
+                EntryTag(entry_id=entry.id, tag_id=tag_id) for tag_id in tag_ids.values()
+            )
 
             session.commit()
             return entry
         finally:
             session.close()
 
+    def bulk_insert_entries(self, entries_data: list[dict]) -> dict[str, str]:
+        """Insert many entries, with their tags and lineage edges, in one transaction.
+
+        References are validated with one query per batch rather than per
+        row: every page must exist, and every parent must exist or be in
+        the batch. Rows are then written with executemany. Entries must
+        carry their IDs.
+
+        Returns:
+            Page ID -> notebook ID for the pages of the batch
+
+        Raises:
+            ValueError: If a page or parent doesn't exist or an ID is
+                taken; nothing is inserted
+        """
+        if not entries_data:
+            return {}
+        session = self.get_session()
+        try:
+            page_ids = {data["page_id"] for data in entries_data}
+            notebooks = dict(
+                session.execute(
+                    select(Page.id, Page.notebook_id).where(Page.id.in_(page_ids))
+                ).all()
+            )
+            missing = page_ids - notebooks.keys()
+            if missing:
+                raise ValueError(f"Page not found: {sorted(missing)[0]}")
+
+            batch_ids = {data["id"] for data in entries_data}
+            external = [
+                {"parent_id": data["parent_id"]}
+                for data in entries_data
+                if data.get("parent_id") and data["parent_id"] not in batch_ids
+            ]
+            missing = Entry.missing_references(session, external).get("parent_id")
+            if missing:
+                raise ValueError(f"Parent entry not found: {sorted(missing)[0]}")
+
+            try:
+                self._insert_entry_rows(session, entries_data)
+                session.commit()
+            except IntegrityError as e:
+                session.rollback()
+                raise ValueError(f"Could not insert entries: {e.orig}") from e
+            return notebooks
+        finally:
+            session.close()
+
+    def _insert_entry_rows(self, session: Session, entries_data: list[dict]):
+        """Write the entry, tag and lineage rows of a bulk insert."""
+        session.execute(
+            insert(Entry),
+            [
+                {
+                    "id": data["id"],
+                    "page_id": data["page_id"],
+                    "entry_type": data["entry_type"],
+                    "title": data["title"],
+                    "created_at": _parse_datetime(data.get("created_at")),
+                    "status": data.get("status", "created"),
+                    "parent_id": data.get("parent_id"),
+                    "inputs": json.dumps(data.get("inputs", {})),
+                    "outputs": json.dumps(data.get("outputs", {})),
+                    "execution": json.dumps(data.get("execution", {})),
+                    "metrics": json.dumps(data.get("metrics", {})),
+                    "metadata_": json.dumps(data.get("metadata", {})),
+                }
+                for data in entries_data
+            ],
+        )
+
+        tag_names = [name for data in entries_data for name in data.get("tags", [])]
+        if tag_names:
+            tag_ids = self.tags.ensure(session, tag_names)
+            session.execute(
+                insert(EntryTag),
+                [
+                    {"entry_id": data["id"], "tag_id": tag_ids[name]}
+                    for data in entries_data
+                    for name in dict.fromkeys(data.get("tags", []))
+                ],
+            )
+
+        edges = [
+            {
+                "parent_id": data["parent_id"],
+                "child_id": data["id"],
+                "relationship_type": "derives_from",
+                "created_at": _parse_datetime(data.get("created_at")),
+            }
+            for data in entries_data
+            if data.get("parent_id")
+        ]
+        if edges:
+            session.execute(insert(EntryLineage), edges)
+
     def get_entry(self, entry_id: str) -> dict | None:
         """Get an entry by ID."""
         session = self.get_session()
         try:
             entry = session.query(Entry).filter(Entry.id == entry_id).first()
             if entry:
-                return self._entry_to_dict(entry)
+                return entry_to_dict(entry)
             return None
         finally:
             session.close()
 
-    def list_entries(self, page_id: str) -> list[dict]:
-        """List all entries in a page."""
+    def list_entries(
+        self, page_id: str, limit: int | None = None, cursor: str | None = None
+    ) -> list[dict]:
+        """List entries in a page, newest first."""
         session = self.get_session()
         try:
-            entries = (
-                session.query(Entry)
-                .filter(Entry.page_id == page_id)
-                .order_by(Entry.created_at.desc())
-                .all()
+            query = (
+                session.query(Entry).options(ENTRY_TAGS).filter(Entry.page_id == page_id)
             )
-            return [self._entry_to_dict(e) for e in entries]
+            entries = paginate(query, Entry, limit, cursor).all()
+            return [entry_to_dict(e) for e in entries]
         finally:
             session.close()
 
@@ -357,7 +540,7 @@ class DatabaseManager:
                 if "metadata" in data:
                     entry.metadata_ = json.dumps(data["metadata"])
                 session.commit()
-                return self._entry_to_dict(entry)
+                return entry_to_dict(entry)
             return None
         finally:
             session.close()
@@ -394,91 +577,206 @@ class DatabaseManager:
         finally:
             session.close()
 
-    def get_ancestors(self, entry_id: str, depth: int = 3) -> list[dict]:
-        """Get ancestors of an entry."""
+    def get_lineage(self, entry_id: str, depth: int = 3) -> dict:
+        """Get the lineage graph around an entry.
+
+        Returns:
+            Dict with "ancestors" and "descendants" (entry dicts, each with
+            the number of hops from the entry as "depth", nearest first)
+            and the "edges" connecting them to each other and to the entry.
+        """
         session = self.get_session()
         try:
-            ancestors = []
-            current_ids = [entry_id]
-
-            for _ in range(depth):
-                if not current_ids:
-                    break
-
-                lineages = (
-                    session.query(EntryLineage)
-                    .filter(EntryLineage.child_id.in_(current_ids))
-                    .all()
-                )
-
-                parent_ids = [lineage.parent_id for lineage in lineages]
-                if parent_ids:
-                    entries = (
-                        session.query(Entry).filter(Entry.id.in_(parent_ids)).all()
-                    )
-                    ancestors.extend([self._entry_to_dict(e) for e in entries])
-                    current_ids = parent_ids
-                else:
-                    break
+            ancestors, ancestor_edges = self._walk_lineage(session, entry_id, depth, True)
+            descendants, descendant_edges = self._walk_lineage(
+                session, entry_id, depth, False
+            )
+            return {
+                "ancestors": ancestors,
+                "descendants": descendants,
+                "edges": ancestor_edges + descendant_edges,
+            }
+        finally:
+            session.close()
 
-            return ancestors
+    def get_ancestors(self, entry_id: str, depth: int = 3) -> list[dict]:
+        """Get ancestors of an entry, nearest first."""
+        session = self.get_session()
+        try:
+            return self._walk_lineage(session, entry_id, depth, True)[0]
         finally:
             session.close()
 
     def get_descendants(self, entry_id: str, depth: int = 3) -> list[dict]:
-        """Get descendants of an entry."""
+        """Get descendants of an entry, nearest first."""
         session = self.get_session()
         try:
-            descendants = []
-            current_ids = [entry_id]
+            return self._walk_lineage(session, entry_id, depth, False)[0]
+        finally:
+            session.close()
 
-            for _ in range(depth):
-                if not current_ids:
-                    break
+    def _walk_lineage(
+        self, session: Session, entry_id: str, depth: int, ancestors: bool
+    ) -> tuple[list[dict], list[dict]]:
+        """Walk lineage edges in one direction with a recursive CTE.
 
-                lineages = (
-                    session.query(EntryLineage)
-                    .filter(EntryLineage.parent_id.in_(current_ids))
-                    .all()
-                )
+        The walk is a UNION over (id, depth), so an entry reached through
+        several paths (a diamond) is expanded once per level rather than
+        once per path. Together with the depth bound, that also stops
+        cycles. Each entry is reported at its shortest distance.
+        """
+        if ancestors:
+            near, far = EntryLineage.child_id, EntryLineage.parent_id
+        else:
+            near, far = EntryLineage.parent_id, EntryLineage.child_id
+
+        walk = select(
+            literal(entry_id).label("id"), literal(0).label("depth")
+        ).cte("lineage_walk", recursive=True)
+        walk = walk.union(
+            select(far.label("id"), (walk.c.depth + 1).label("depth"))
+            .select_from(EntryLineage)
+            .join(walk, near == walk.c.id)
+            .where(walk.c.depth < depth, far != entry_id)
+        )
+        nodes = (
+            select(walk.c.id, func.min(walk.c.depth).label("depth"))
+            .where(walk.c.depth > 0)
+            .group_by(walk.c.id)
+            .cte("lineage_nodes")
+        )
 
-                child_ids = [lineage.child_id for lineage in lineages]
-                if child_ids:
-                    entries = session.query(Entry).filter(Entry.id.in_(child_ids)).all()
-                    descendants.extend([self._entry_to_dict(e) for e in entries])
-                    current_ids = child_ids
-                else:
-                    break
+        rows = (
+            session.query(Entry, nodes.c.depth)
+            .options(ENTRY_TAGS)
+            .join(nodes, Entry.id == nodes.c.id)
+            .order_by(nodes.c.depth, Entry.created_at, Entry.id)
+            .all()
+        )
+        entries = [{**entry_to_dict(e), "depth": d} for e, d in rows]
 
-            return descendants
-        finally:
-            session.close()
+        edges = []
+        if entries:
+            node_ids = select(nodes.c.id)
+            lineages = (
+                session.query(EntryLineage)
+                .filter(
+                    far.in_(node_ids),
+                    or_(near == entry_id, near.in_(node_ids)),
+                )
+                .all()
+            )
+            edges = [
+                {
+                    "parent_id": lineage.parent_id,
+                    "child_id": lineage.child_id,
+                    "relationship_type": lineage.relationship_type,
+                }
+                for lineage in lineages
+            ]
+        return entries, edges
 
     # Artifact operations
     def insert_artifact(self, artifact_data: dict) -> Artifact:
         """Insert a new artifact."""
         session = self.get_session()
         try:
-            artifact = Artifact(
-                id=artifact_data["id"],
-                entry_id=artifact_data["entry_id"],
-                type=artifact_data["type"],
-                hash=artifact_data["hash"],
-                size_bytes=artifact_data["size_bytes"],
-                path=artifact_data["path"],
-                thumbnail_path=artifact_data.get("thumbnail_path"),
-                created_at=_parse_datetime(artifact_data.get("created_at")),
-                archived=artifact_data.get("archived", False),
-                archive_strategy=artifact_data.get("archive_strategy"),
-                original_size_bytes=artifact_data.get("original_size_bytes"),
-                metadata_=json.dumps(artifact_data.get("metadata", {})),
-            )
+            artifact = self._artifact_from_dict(artifact_data)
             session.add(artifact)
             session.commit()
             return artifact
         finally:
             session.close()
 
+    def insert_artifacts(self, session: Session, artifacts_data: list[dict]) -> list[Artifact]:
+        """Add many artifacts to a session; they are inserted in batches on flush.
+
+        The caller commits, so the rows can share a transaction with other
+        changes, such as the status update of the entry that produced them.
+        """
+        artifacts = [self._artifact_from_dict(data) for data in artifacts_data]
+        session.add_all(artifacts)
+        return artifacts
+
+    def _artifact_from_dict(self, artifact_data: dict) -> Artifact:
+        return Artifact(
+            id=artifact_data["id"],
+            entry_id=artifact_data["entry_id"],
+            type=artifact_data["type"],
+            hash=artifact_data["hash"],
+            size_bytes=artifact_data["size_bytes"],
+            path=artifact_data["path"],
+            thumbnail_path=artifact_data.get("thumbnail_path"),
+            created_at=_parse_datetime(artifact_data.get("created_at")),
+            archived=artifact_data.get("archived", False),
+            archive_strategy=artifact_data.get("archive_strategy"),
+            original_size_bytes=artifact_data.get("original_size_bytes"),
+            metadata_=json.dumps(artifact_data.get("metadata", {})),
+        )
+
+    def insert_metric_points(self, session: Session, entry_id: str, points: list[dict]):
+        """Append values to the metric series of an entry within the caller's session.
+
+        Each point has a key, step and value, and optionally a timestamp.
+        """
+        if not points:
+            return
+        now = _parse_datetime(None)
+        session.execute(
+            insert(MetricPoint),
+            [
+                {
+                    "entry_id": entry_id,
+                    "key": point["key"],
+                    "step": point["step"],
+                    "value": point["value"],
+                    "timestamp": _parse_datetime(point["timestamp"])
+                    if point.get("timestamp")
+                    else now,
+                }
+                for point in points
+            ],
+        )
+
+    def get_metric_series(
+        self,
+        entry_id: str,
+        keys: list[str] | None = None,
+        step_from: int | None = None,
+        step_to: int | None = None,
+    ) -> dict[str, dict[str, list]]:
+        """Get the metric series of an entry as columns.
+
+        Returns:
+            Key -> {"step": [...], "value": [...], "timestamp": [...]},
+            each column in step order (append order within a step)
+        """
+        session = self.get_session()
+        try:
+            query = (
+                select(MetricPoint.key, MetricPoint.step, MetricPoint.value, MetricPoint.timestamp)
+                .where(MetricPoint.entry_id == entry_id)
+                .order_by(MetricPoint.key, MetricPoint.step, MetricPoint.id)
+            )
+            if keys:
+                query = query.where(MetricPoint.key.in_(keys))
+            if step_from is not None:
+                query = query.where(MetricPoint.step >= step_from)
+            if step_to is not None:
+                query = query.where(MetricPoint.step <= step_to)
+
+            series: dict[str, dict[str, list]] = {}
+            for key, step, value, timestamp in session.execute(query):
+                columns = series.get(key)
+                if columns is None:
+                    columns = series[key] = {"step": [], "value": [], "timestamp": []}
+                columns["step"].append(step)
+                columns["value"].append(value)
+                columns["timestamp"].append(timestamp.isoformat())
+            return series
+        finally:
+            session.close()
+
     def get_artifact(self, artifact_id: str) -> dict | None:
         """Get an artifact by ID."""
         session = self.get_session()
@@ -487,7 +785,7 @@ class DatabaseManager:
                 session.query(Artifact).filter(Artifact.id == artifact_id).first()
             )
             if artifact:
-                return self._artifact_to_dict(artifact)
+                return artifact_to_dict(artifact)
             return None
         finally:
             session.close()
@@ -500,7 +798,7 @@ class DatabaseManager:
                 session.query(Artifact).filter(Artifact.hash == hash_value).first()
             )
             if artifact:
-                return self._artifact_to_dict(artifact)
+                return artifact_to_dict(artifact)
             return None
         finally:
             session.close()
@@ -515,116 +813,242 @@ class DatabaseManager:
                 .order_by(Artifact.created_at.desc())
                 .all()
             )
-            return [self._artifact_to_dict(a) for a in artifacts]
+            return [artifact_to_dict(a) for a in artifacts]
+        finally:
+            session.close()
+
+    def list_artifact_hashes(self, type_prefix: str = "") -> list[str]:
+        """List the distinct blob hashes of artifacts whose type starts with a prefix."""
+        session = self.get_session()
+        try:
+            rows = (
+                session.query(Artifact.hash)
+                .filter(Artifact.type.startswith(type_prefix, autoescape=True))
+                .distinct()
+                .all()
+            )
+            return [row.hash for row in rows]
         finally:
             session.close()
 
     # Search operations
-    def search_entries(self, filters: dict) -> list[dict]:
-        """Search entries with filters."""
+    def search_entries(
+        self, filters: dict, limit: int | None = None, cursor: str | None = None
+    ) -> list[dict]:
+        """Search entries with filters.
+
+        Supported filters: query (full-text over titles, inputs, outputs,
+        notes and page narratives), tags (entries must have all of them),
+        where (JSON value filters such as "metrics.loss < 0.05", see
+        codex.db.filters; entries must match all of them), notebook_id,
+        page_id, entry_type, date_from and date_to.
+
+        With a query, results are ordered by relevance and each result
+        carries a highlighted "snippet" and its "rank"; otherwise newest
+        first. Either way, pass the cursor of the last result to continue.
+
+        Raises:
+            ValueError: If a where filter or the cursor is malformed
+        """
+        session = self.get_session()
+        try:
+            query = self._search_query(session, filters, limit, cursor)
+            if query is None:
+                return []
+            if not filters.get("query"):
+                return [entry_to_dict(e) for e in query.all()]
+            return [
+                {**entry_to_dict(e), "snippet": snippet_text, "rank": rank_value}
+                for e, snippet_text, rank_value in query.all()
+            ]
+        finally:
+            session.close()
+
+    def explain_search(self, filters: dict) -> list[str]:
+        """Get SQLite's query plan for a search, one line per step.
+
+        Lines mentioning "USING INDEX idx_entries_json_..." show that a
+        where filter is answered from an expression index.
+        """
         session = self.get_session()
         try:
-            query = session.query(Entry)
+            query = self._search_query(session, filters)
+            if query is None:
+                return []
+            compiled = query.statement.compile(dialect=session.get_bind().dialect)
+            params = compiled.construct_params(_check=False)
+            # Bound values only sway the plan's estimates, not its validity
+            values = [
+                str(params[name]) if isinstance(params[name], datetime) else params[name]
+                for name in compiled.positiontup
+            ]
+            rows = session.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}", tuple(values)
+            )
+            return [row[-1] for row in rows]
+        finally:
+            session.close()
 
-            if filters.get("notebook_id"):
-                query = query.join(Page).filter(
-                    Page.notebook_id == filters["notebook_id"]
+    def _search_query(
+        self,
+        session: Session,
+        filters: dict,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ):
+        """Build the query for search_entries, or None if nothing can match."""
+        fts_query = _fts_query(filters["query"]) if filters.get("query") else ""
+
+        if fts_query:
+            snippet = func.snippet(
+                literal_column("entries_fts"), -1, "<mark>", "</mark>", "…", 12
+            )
+            query = (
+                session.query(Entry, snippet.label("snippet"))
+                .options(ENTRY_TAGS)
+                .join(
+                    _entries_fts,
+                    _entries_fts.c.rowid == literal_column("entries.rowid"),
                 )
+                .filter(text("entries_fts MATCH :fts_query"))
+                .params(fts_query=fts_query)
+            )
+        else:
+            query = session.query(Entry).options(ENTRY_TAGS)
+
+        if filters.get("notebook_id"):
+            query = query.join(Page).filter(
+                Page.notebook_id == filters["notebook_id"]
+            )
+
+        if filters.get("page_id"):
+            query = query.filter(Entry.page_id == filters["page_id"])
+
+        if filters.get("entry_type"):
+            query = query.filter(Entry.entry_type == filters["entry_type"])
+
+        if filters.get("date_from"):
+            query = query.filter(Entry.created_at >= filters["date_from"])
+
+        if filters.get("date_to"):
+            query = query.filter(Entry.created_at <= filters["date_to"])
+
+        if filters.get("where"):
+            query = query.filter(*(f.clause() for f in parse_filters(filters["where"])))
+
+        if filters.get("tags"):
+            # Resolve names in memory; an unknown tag can't match anything
+            tag_names = set(filters["tags"])
+            tag_ids = self.tags.lookup(session, tag_names)
+            if len(tag_ids) < len(tag_names):
+                return None
+            tagged = (
+                session.query(EntryTag.entry_id)
+                .filter(EntryTag.tag_id.in_(tag_ids.values()))
+                .group_by(EntryTag.entry_id)
+                .having(func.count() == len(tag_ids))
+            )
+            query = query.filter(Entry.id.in_(tagged))
+
+        if not fts_query:
+            return paginate(query, Entry, limit, cursor)
+
+        # Relevance order: rank ascending (bm25 is negative, best first),
+        # then newest first among equal ranks
+        rank = func.bm25(literal_column("entries_fts"))
+        if cursor:
+            created_at, id_value, last_rank = decode_cursor(cursor)
+            if last_rank is None:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            query = query.filter(
+                or_(
+                    rank > last_rank,
+                    and_(rank == last_rank, after_cursor(Entry, created_at, id_value)),
+                )
+            )
+        query = query.add_columns(rank.label("rank")).order_by(
+            rank, Entry.created_at.desc(), Entry.id.desc()
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query
 
-            if filters.get("page_id"):
-                query = query.filter(Entry.page_id == filters["page_id"])
+    def create_json_index(self, path: str) -> str:
+        """Index a JSON value of entries, e.g. "metrics.loss", for where filters.
 
-            if filters.get("entry_type"):
-                query = query.filter(Entry.entry_type == filters["entry_type"])
+        Returns:
+            Name of the (possibly already existing) index
 
-            if filters.get("date_from"):
-                query = query.filter(Entry.created_at >= filters["date_from"])
+        Raises:
+            ValueError: If the path is malformed
+        """
+        target = JsonPath.parse(path)
+        session = self.get_session()
+        try:
+            session.execute(text(target.index_ddl))
+            # Statistics let the planner weigh the index against the others
+            session.execute(text(f"ANALYZE {target.index_name}"))
+            session.commit()
+            return target.index_name
+        finally:
+            session.close()
 
-            if filters.get("date_to"):
-                query = query.filter(Entry.created_at <= filters["date_to"])
+    def drop_json_index(self, path: str) -> bool:
+        """Drop the index on a JSON value of entries.
 
-            entries = query.order_by(Entry.created_at.desc()).all()
-            return [self._entry_to_dict(e) for e in entries]
+        Returns:
+            False if there was no such index
+        """
+        target = JsonPath.parse(path)
+        session = self.get_session()
+        try:
+            exists = session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+                {"name": target.index_name},
+            ).first()
+            if exists is None:
+                return False
+            session.execute(text(f"DROP INDEX {target.index_name}"))
+            session.commit()
+            return True
         finally:
             session.close()
 
-    # Helper methods
-    def _get_or_create_tag(self, session: Session, tag_name: str) -> Tag:
-        """Get or create a tag."""
-        tag = session.query(Tag).filter(Tag.name == tag_name).first()
-        if not tag:
-            tag = Tag(name=tag_name)
-            session.add(tag)
-            session.flush()
-        return tag
-
-    def _notebook_to_dict(self, notebook: Notebook) -> dict:
-        """Convert a notebook to a dictionary."""
-        return {
-            "id": notebook.id,
-            "title": notebook.title,
-            "description": notebook.description,
-            "created_at": (
-                notebook.created_at.isoformat() if notebook.created_at else None
-            ),
-            "updated_at": (
-                notebook.updated_at.isoformat() if notebook.updated_at else None
-            ),
-            "settings": json.loads(notebook.settings) if notebook.settings else {},
-            "metadata": json.loads(notebook.metadata_) if notebook.metadata_ else {},
-            "tags": [nt.tag.name for nt in notebook.tags] if notebook.tags else [],
-        }
+    def list_json_indexes(self) -> list[dict]:
+        """List the indexes on JSON values of entries, with their definitions."""
+        session = self.get_session()
+        try:
+            rows = session.execute(
+                text(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                    "AND name GLOB 'idx_entries_json_*' ORDER BY name"
+                )
+            ).all()
+            return [{"name": name, "sql": sql} for name, sql in rows]
+        finally:
+            session.close()
 
-    def _page_to_dict(self, page: Page) -> dict:
-        """Convert a page to a dictionary."""
-        return {
-            "id": page.id,
-            "notebook_id": page.notebook_id,
-            "title": page.title,
-            "date": page.date.isoformat() if page.date else None,
-            "created_at": page.created_at.isoformat() if page.created_at else None,
-            "updated_at": page.updated_at.isoformat() if page.updated_at else None,
-            "narrative": json.loads(page.narrative) if page.narrative else {},
-            "metadata": json.loads(page.metadata_) if page.metadata_ else {},
-            "tags": [pt.tag.name for pt in page.tags] if page.tags else [],
-        }
+    def rebuild_search_index(self) -> int:
+        """Rebuild the full-text search index from the entries table.
 
-    def _entry_to_dict(self, entry: Entry) -> dict:
-        """Convert an entry to a dictionary."""
-        return {
-            "id": entry.id,
-            "page_id": entry.page_id,
-            "entry_type": entry.entry_type,
-            "title": entry.title,
-            "created_at": entry.created_at.isoformat() if entry.created_at else None,
-            "status": entry.status,
-            "parent_id": entry.parent_id,
-            "inputs": json.loads(entry.inputs) if entry.inputs else {},
-            "outputs": json.loads(entry.outputs) if entry.outputs else {},
-            "execution": json.loads(entry.execution) if entry.execution else {},
-            "metrics": json.loads(entry.metrics) if entry.metrics else {},
-            "metadata": json.loads(entry.metadata_) if entry.metadata_ else {},
-            "tags": [et.tag.name for et in entry.tags] if entry.tags else [],
-        }
+        Returns:
+            Number of indexed entries.
+        """
+        session = self.get_session()
+        try:
+            for statement in SEARCH_INDEX_REBUILD:
+                session.execute(text(statement))
+            session.commit()
+            return session.execute(text("SELECT COUNT(*) FROM entries_fts")).scalar()
+        finally:
+            session.close()
 
-    def _artifact_to_dict(self, artifact: Artifact) -> dict:
-        """Convert an artifact to a dictionary."""
-        return {
-            "id": artifact.id,
-            "entry_id": artifact.entry_id,
-            "type": artifact.type,
-            "hash": artifact.hash,
-            "size_bytes": artifact.size_bytes,
-            "path": artifact.path,
-            "thumbnail_path": artifact.thumbnail_path,
-            "created_at": (
-                artifact.created_at.isoformat() if artifact.created_at else None
-            ),
-            "archived": artifact.archived,
-            "archive_strategy": artifact.archive_strategy,
-            "original_size_bytes": artifact.original_size_bytes,
-            "metadata": json.loads(artifact.metadata_) if artifact.metadata_ else {},
-        }
+    # Helper methods
+    def set_entry_tags(self, session: Session, entry_id: str, tag_names: list[str]):
+        """Replace an entry's tags within the caller's session."""
+        session.query(EntryTag).filter(EntryTag.entry_id == entry_id).delete()
+        tag_ids = self.tags.ensure(session, tag_names)
+        session.add_all(EntryTag(entry_id=entry_id, tag_id=tag_id) for tag_id in tag_ids.values())
 
     # Integration variable operations
     def set_integration_variable(
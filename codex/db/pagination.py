@@ -0,0 +1,98 @@
+"""Keyset (cursor) pagination helpers.
+
+Listings are ordered newest first on ``(created_at, id)``; the id breaks
+ties between rows created in the same instant. A cursor is an opaque,
+URL-safe token holding the sort key of the last row on the previous page,
+so fetching the next page is an index range scan instead of an OFFSET.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime | str, id_value: str, rank: Optional[float] = None) -> str:
+    """Encode a row's sort key as a cursor.
+
+    Args:
+        created_at: The row's creation time (datetime or ISO string)
+        id_value: The row's primary key
+        rank: Relevance rank for full-text results, if ordered by it
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    key = [created_at, id_value] if rank is None else [created_at, id_value, rank]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str, Optional[float]]:
+    """Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple of (created_at, id, rank); rank is None for plain listings
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+        created_at = datetime.fromisoformat(key[0])
+        id_value = str(key[1])
+        rank = float(key[2]) if len(key) > 2 else None
+    except (ValueError, TypeError, IndexError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return created_at, id_value, rank
+
+
+def after_cursor(model: Any, created_at: datetime, id_value: str):
+    """Filter clause selecting rows that sort after the given key."""
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < id_value),
+    )
+
+
+def paginate(
+    query: Query, model: Any, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Query:
+    """Order a query newest first and restrict it to one page.
+
+    Args:
+        query: Query over ``model``
+        model: Mapped class with ``created_at`` and ``id`` columns
+        limit: Maximum number of rows, or None for all remaining rows
+        cursor: Cursor from the previous page, or None to start at the top
+
+    Returns:
+        The paginated query
+    """
+    if cursor:
+        created_at, id_value, _ = decode_cursor(cursor)
+        query = query.filter(after_cursor(model, created_at, id_value))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def next_cursor(items: list, limit: Optional[int]) -> Optional[str]:
+    """Cursor for the page following ``items``, or None if it was the last.
+
+    Items may be dicts or objects exposing ``created_at`` and ``id``; search
+    results also carry a ``rank`` when ordered by relevance.
+    """
+    if not limit or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last["created_at"], last["id"], last.get("rank"))
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,105 @@
+"""Conversion of database models to plain dictionaries.
+
+These are shared by the database manager, the core classes and the API.
+Queries that serialize more than one row should load tags up front with
+the matching ``*_TAGS`` loader option, e.g.::
+
+    session.query(Entry).options(ENTRY_TAGS)
+
+so a listing costs one extra SELECT for all tags instead of two lazy
+loads per row.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from codex.db.models import (
+    Artifact,
+    Entry,
+    EntryTag,
+    Notebook,
+    NotebookTag,
+    Page,
+    PageTag,
+)
+
+NOTEBOOK_TAGS = selectinload(Notebook.tags).options(joinedload(NotebookTag.tag))
+PAGE_TAGS = selectinload(Page.tags).options(joinedload(PageTag.tag))
+ENTRY_TAGS = selectinload(Entry.tags).options(joinedload(EntryTag.tag))
+
+
+def _json(value: Optional[str]) -> dict:
+    return json.loads(value) if value else {}
+
+
+def _iso(value: Optional[date | datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def notebook_to_dict(notebook: Notebook) -> dict:
+    """Convert a notebook to a dictionary."""
+    return {
+        "id": notebook.id,
+        "title": notebook.title,
+        "description": notebook.description,
+        "created_at": _iso(notebook.created_at),
+        "updated_at": _iso(notebook.updated_at),
+        "settings": _json(notebook.settings),
+        "metadata": _json(notebook.metadata_),
+        "tags": [nt.tag.name for nt in notebook.tags],
+    }
+
+
+def page_to_dict(page: Page) -> dict:
+    """Convert a page to a dictionary."""
+    return {
+        "id": page.id,
+        "notebook_id": page.notebook_id,
+        "title": page.title,
+        "date": _iso(page.date),
+        "created_at": _iso(page.created_at),
+        "updated_at": _iso(page.updated_at),
+        "narrative": _json(page.narrative),
+        "metadata": _json(page.metadata_),
+        "tags": [pt.tag.name for pt in page.tags],
+    }
+
+
+def entry_to_dict(entry: Entry) -> dict:
+    """Convert an entry to a dictionary."""
+    return {
+        "id": entry.id,
+        "page_id": entry.page_id,
+        "entry_type": entry.entry_type,
+        "title": entry.title,
+        "created_at": _iso(entry.created_at),
+        "status": entry.status,
+        "parent_id": entry.parent_id,
+        "inputs": _json(entry.inputs),
+        "outputs": _json(entry.outputs),
+        "execution": _json(entry.execution),
+        "metrics": _json(entry.metrics),
+        "metadata": _json(entry.metadata_),
+        "tags": [et.tag.name for et in entry.tags],
+    }
+
+
+def artifact_to_dict(artifact: Artifact) -> dict:
+    """Convert an artifact to a dictionary."""
+    return {
+        "id": artifact.id,
+        "entry_id": artifact.entry_id,
+        "type": artifact.type,
+        "hash": artifact.hash,
+        "size_bytes": artifact.size_bytes,
+        "path": artifact.path,
+        "thumbnail_path": artifact.thumbnail_path,
+        "created_at": _iso(artifact.created_at),
+        "archived": artifact.archived,
+        "archive_strategy": artifact.archive_strategy,
+        "original_size_bytes": artifact.original_size_bytes,
+        "metadata": _json(artifact.metadata_),
+    }
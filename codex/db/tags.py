@@ -0,0 +1,118 @@
+"""In-memory dictionary of tag names and IDs.
+
+Tags are few and never renamed or deleted, so every tag name a database
+manager has seen is kept in memory: tagging a row costs a dictionary
+lookup instead of a SELECT per name. Names missing from memory, which
+another process may have created, are looked up with one SELECT for the
+whole set, and new names are created together with one
+``INSERT OR IGNORE`` and one SELECT.
+"""
+
+import threading
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from codex.db.models import Tag
+
+
+class TagCache:
+    """Thread-safe map of tag names to IDs for one database."""
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._warm = False
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self, session: Session):
+        """Load every existing tag."""
+        rows = session.execute(select(Tag.name, Tag.id)).all()
+        with self._lock:
+            self._ids.update(rows)
+            self._warm = True
+
+    def lookup(self, session: Session, names: Iterable[str]) -> dict[str, int]:
+        """Get the IDs of existing tags; names that don't exist are left out.
+
+        Names that aren't cached are selected from the database, since
+        another process may have created them.
+        """
+        if not self._warm:
+            self.warm(session)
+        found = {}
+        missing = []
+        with self._lock:
+            for name in names:
+                tag_id = self._ids.get(name)
+                if tag_id is None:
+                    missing.append(name)
+                    self.misses += 1
+                else:
+                    found[name] = tag_id
+                    self.hits += 1
+        if not missing:
+            return found
+
+        # Tags created earlier in this transaction are cached once it commits
+        pending = session.info.get("new_tags", {})
+        loaded = dict(
+            session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all()
+        )
+        with self._lock:
+            self._ids.update(
+                (name, tag_id) for name, tag_id in loaded.items() if name not in pending
+            )
+        return {**found, **loaded}
+
+    def ensure(self, session: Session, names: Iterable[str]) -> dict[str, int]:
+        """Get the IDs of tags, creating the missing ones in the session.
+
+        New IDs are only remembered once the session commits, so a rolled
+        back transaction can't leave IDs of tags that don't exist.
+        """
+        names = list(dict.fromkeys(names))
+        ids = self.lookup(session, names)
+        missing = [name for name in names if name not in ids]
+        if not missing:
+            return ids
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        session.execute(
+            sqlite_insert(Tag).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": name, "created_at": now} for name in missing],
+        )
+        created = dict(
+            session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all()
+        )
+        self._pending(session).update(created)
+        return {**ids, **created}
+
+    def _pending(self, session: Session) -> dict[str, int]:
+        """Tags created in the session's transaction, remembered when it commits."""
+        pending = session.info.get("new_tags")
+        if pending is None:
+            pending = session.info["new_tags"] = {}
+            event.listen(session, "after_commit", self._remember)
+            event.listen(session, "after_rollback", lambda s: s.info["new_tags"].clear())
+        return pending
+
+    def _remember(self, session: Session):
+        with self._lock:
+            self._ids.update(session.info["new_tags"])
+        session.info["new_tags"].clear()
+
+    def clear(self):
+        """Forget every tag; the next lookup reloads them."""
+        with self._lock:
+            self._ids.clear()
+            self._warm = False
+
+    def stats(self) -> dict:
+        """Get the number of cached tags and hit/miss counters."""
+        with self._lock:
+            return {"tags": len(self._ids), "hits": self.hits, "misses": self.misses}
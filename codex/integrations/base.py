@@ -67,7 +67,10 @@ class IntegrationBase:
                 - outputs: dict of output data
                 - artifacts: list of artifact dicts with keys:
                     - type: MIME type
-                    - data: bytes
+                    - data: bytes, or
+                    - stream: binary file object or iterable of byte chunks,
+                      for outputs too large to hold in memory (closed after
+                      it has been stored)
                     - metadata: optional dict
         """
         raise NotImplementedError
@@ -0,0 +1,156 @@
+"""Shared test fixtures."""
+
+import asyncio
+import hashlib
+import hmac
+import re
+import threading
+import uuid
+from urllib.parse import quote
+
+import pytest
+from aiohttp import web
+
+
+class FakeS3:
+    """In-memory stand-in for an S3-compatible server such as MinIO.
+
+    Supports what the S3 blob backend uses: HEAD, GET, PUT and DELETE of
+    objects, multipart uploads and presigned GETs, with path-style
+    addressing. Requests must carry a valid SigV4 Authorization header or
+    presigned signature, which is recomputed from the request as received.
+    """
+
+    def __init__(self, access_key: str = "test-key", secret_key: str = "test-secret"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.objects: dict[str, bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.url = ""
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        key = request.match_info["key"]
+        query = request.query
+        self.requests.append((request.method, key))
+        if not self._authorized(request):
+            return web.Response(status=403)
+
+        if request.method == "POST" and "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {}
+            return web.Response(
+                text=f"<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            )
+        if request.method == "PUT" and "partNumber" in query:
+            data = await request.read()
+            self.uploads[query["uploadId"]][int(query["partNumber"])] = data
+            return web.Response(headers={"ETag": f'"{len(data)}"'})
+        if request.method == "POST" and "uploadId" in query:
+            parts = self.uploads.pop(query["uploadId"])
+            numbers = [int(n) for n in re.findall(r"<PartNumber>(\d+)<", await request.text())]
+            self.objects[key] = b"".join(parts[n] for n in numbers)
+            return web.Response(text="<CompleteMultipartUploadResult/>")
+        if request.method == "DELETE" and "uploadId" in query:
+            self.uploads.pop(query["uploadId"], None)
+            return web.Response(status=204)
+
+        if request.method == "PUT":
+            self.objects[key] = await request.read()
+            return web.Response(headers={"ETag": '"object"'})
+        if request.method == "DELETE":
+            self.objects.pop(key, None)
+            return web.Response(status=204)
+        if key not in self.objects:
+            return web.Response(status=404)
+        data = self.objects[key]
+        content_type = query.get("response-content-type", "application/octet-stream")
+        if request.method == "HEAD":
+            return web.Response(headers={"Content-Length": str(len(data))})
+        return web.Response(body=data, content_type=content_type)
+
+    def _authorized(self, request: web.Request) -> bool:
+        """Check the request's SigV4 signature, from its header or query."""
+        query = [(k, v) for k, v in request.query.items() if k != "X-Amz-Signature"]
+        if "X-Amz-Signature" in request.query:
+            credential = request.query.get("X-Amz-Credential", "")
+            signed_headers = request.query.get("X-Amz-SignedHeaders", "")
+            signature = request.query["X-Amz-Signature"]
+            date = request.query.get("X-Amz-Date", "")
+            payload_hash = "UNSIGNED-PAYLOAD"
+        else:
+            match = re.fullmatch(
+                r"AWS4-HMAC-SHA256 Credential=(\S+), SignedHeaders=(\S+), Signature=(\w+)",
+                request.headers.get("Authorization", ""),
+            )
+            if not match:
+                return False
+            credential, signed_headers, signature = match.groups()
+            date = request.headers.get("x-amz-date", "")
+            payload_hash = request.headers.get("x-amz-content-sha256", "")
+
+        access_key, _, scope = credential.partition("/")
+        if access_key != self.access_key or not scope.startswith(date[:8]):
+            return False
+        canonical_query = "&".join(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted(query)
+        )
+        canonical_headers = "".join(
+            f"{name}:{request.headers.get(name, '').strip()}\n"
+            for name in signed_headers.split(";")
+        )
+        canonical_request = "\n".join(
+            [
+                request.method,
+                request.raw_path.split("?")[0],
+                canonical_query,
+                canonical_headers,
+                signed_headers,
+                payload_hash,
+            ]
+        )
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                date,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        key = ("AWS4" + self.secret_key).encode()
+        for part in scope.split("/"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        expected = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    def start(self):
+        async def serve():
+            app = web.Application(client_max_size=1024**3)
+            app.router.add_route("*", "/{bucket}/{key:.+}", self._handle)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            port = self._runner.addresses[0][1]
+            self.url = f"http://127.0.0.1:{port}"
+
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(serve(), self._loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+@pytest.fixture
+def s3_server(monkeypatch):
+    """Running FakeS3 server, with credentials in the environment."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test-key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test-secret")
+    server = FakeS3()
+    server.start()
+    yield server
+    server.stop()
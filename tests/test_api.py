@@ -0,0 +1,345 @@
+"""Tests for the HTTP API."""
+
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from codex.api.main import app
+from codex.core.derivatives import DerivativeSpec
+from codex.core.workspace import Workspace, WorkspaceRegistry
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Initialized workspace with one entry."""
+    ws = Workspace.initialize(tmp_path, "Test Workspace")
+    page = ws.create_notebook("Test Notebook").create_page("Test Page")
+    entry = page.create_entry("custom", "Entry", {})
+    yield ws, entry
+    ws.close()
+
+
+@pytest.fixture
+def client():
+    """Test client with a fresh workspace registry.
+
+    The lifespan isn't run, so no default workspace is created in the
+    current directory; requests pass workspace_path explicitly.
+    """
+    registry = WorkspaceRegistry()
+    app.state.workspace_registry = registry
+    yield TestClient(app)
+    registry.close()
+    app.state.workspace_registry = None
+
+
+class TestArtifactDownload:
+    """Tests for streaming artifact downloads."""
+
+    def _upload(self, workspace, data=None):
+        ws, entry = workspace
+        # Large enough to get a file of its own rather than go into a pack
+        data = data if data is not None else bytes(range(256)) * 512
+        artifact = entry.add_artifact("video/mp4", data)
+        return ws, artifact["hash"], data
+
+    def _url(self, ws, artifact_hash, **params):
+        query = "&".join(f"{k}={v}" for k, v in {"workspace_path": ws.path, **params}.items())
+        return f"/api/artifacts/{artifact_hash}?{query}"
+
+    def test_full_download_with_cache_headers(self, client, workspace):
+        """Test the blob is served with a strong ETag and immutable caching."""
+        ws, artifact_hash, data = self._upload(workspace)
+
+        response = client.get(self._url(ws, artifact_hash))
+        assert response.status_code == 200
+        assert response.content == data
+        assert response.headers["content-type"] == "video/mp4"
+        assert response.headers["etag"] == f'"{artifact_hash[7:]}"'
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_range_request(self, client, workspace):
+        """Test a byte range is served as partial content."""
+        ws, artifact_hash, data = self._upload(workspace)
+
+        response = client.get(self._url(ws, artifact_hash), headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206
+        assert response.content == data[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(data)}"
+
+    def test_if_none_match(self, client, workspace):
+        """Test a matching ETag yields 304 Not Modified."""
+        ws, artifact_hash, _ = self._upload(workspace)
+        etag = f'"{artifact_hash[7:]}"'
+
+        response = client.get(self._url(ws, artifact_hash), headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_head(self, client, workspace):
+        """Test HEAD returns headers without a body."""
+        ws, artifact_hash, data = self._upload(workspace)
+
+        response = client.head(self._url(ws, artifact_hash))
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response.headers["content-length"] == str(len(data))
+
+    def test_upload_streams_into_blob_store(self, client, workspace):
+        """Test an uploaded file is stored and recorded with its size."""
+        ws, entry = workspace
+        data = bytes(range(256)) * 8192
+
+        response = client.post(
+            f"/api/artifacts?workspace_path={ws.path}&entry_id={entry.id}",
+            files={"file": ("run.bin", data, "application/octet-stream")},
+        )
+        assert response.status_code == 200
+        artifact = response.json()
+        assert artifact["size_bytes"] == len(data)
+        assert client.get(self._url(ws, artifact["hash"])).content == data
+
+    def test_invalid_and_missing_hashes(self, client, workspace):
+        """Test malformed and unknown hashes are 404s."""
+        ws, _ = workspace
+
+        assert client.get(self._url(ws, "..%2F..%2Fconfig.json")).status_code == 404
+        assert client.get(self._url(ws, "sha256:" + "0" * 64)).status_code == 404
+
+    def test_thumbnail_rendered_on_first_request(self, client, workspace):
+        """Test thumbnails of each size are rendered lazily and cached by ETag."""
+        ws, entry = workspace
+        buf = io.BytesIO()
+        Image.new("RGB", (1000, 500), "blue").save(buf, "JPEG")
+        artifact_hash = entry.add_artifact("image/jpeg", buf.getvalue())["hash"]
+        digest = artifact_hash[7:]
+
+        response = client.get(self._url(ws, artifact_hash, thumbnail="true", size=128))
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["etag"] == f'"{digest}.thumb-128"'
+        assert Image.open(io.BytesIO(response.content)).size == (128, 64)
+
+        response = client.get(self._url(ws, artifact_hash, thumbnail="true"))
+        assert response.headers["etag"] == f'"{digest}.thumb"'
+
+        response = client.get(self._url(ws, artifact_hash, thumbnail="true", size=100))
+        assert response.status_code == 400
+
+        text_hash = entry.add_artifact("text/plain", b"notes")["hash"]
+        response = client.get(self._url(ws, text_hash, thumbnail="true"))
+        assert response.status_code == 404
+
+    def test_image_derivatives(self, client, workspace):
+        """Test resized derivatives are negotiated from Accept and cached."""
+        ws, entry = workspace
+        buf = io.BytesIO()
+        Image.new("RGBA", (1200, 800), (0, 128, 255, 200)).save(buf, "PNG")
+        artifact_hash = entry.add_artifact("image/png", buf.getvalue())["hash"]
+        digest = artifact_hash[7:]
+        url = self._url(ws, artifact_hash, width=300)
+
+        response = client.get(url, headers={"Accept": "image/webp,image/*;q=0.8"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert response.headers["vary"] == "Accept"
+        assert response.headers["etag"] == f'"{digest}.w300-h0-q80.webp"'
+        image = Image.open(io.BytesIO(response.content))
+        assert (image.format, image.size, image.mode) == ("WEBP", (300, 200), "RGBA")
+
+        response = client.get(url, headers={"Accept": "image/png"})
+        assert response.headers["content-type"] == "image/jpeg"
+
+        response = client.get(
+            self._url(ws, artifact_hash, width=100, height=100, format="png")
+        )
+        assert "vary" not in response.headers
+        assert Image.open(io.BytesIO(response.content)).size == (100, 100)
+
+        response = client.get(
+            url, headers={"Accept": "image/webp", "If-None-Match": f'"{digest}.w300-h0-q80.webp"'}
+        )
+        assert response.status_code == 304
+        cached = ws.storage_manager.derivatives.path(digest, DerivativeSpec(300, format="webp"))
+        assert cached.is_file()
+
+        assert client.get(self._url(ws, artifact_hash, width=0)).status_code == 400
+        assert client.get(self._url(ws, artifact_hash, format="gif")).status_code == 400
+        assert client.get(self._url(ws, artifact_hash, quality=101)).status_code == 400
+        text_hash = entry.add_artifact("text/plain", b"notes")["hash"]
+        assert client.get(self._url(ws, text_hash, width=100)).status_code == 404
+
+    def test_archived_blob_is_decompressed(self, client, workspace):
+        """Test archived blobs are served with their original bytes."""
+        ws, artifact_hash, data = self._upload(workspace)
+        assert ws.storage_manager.archive(artifact_hash, "gzip")
+
+        response = client.get(self._url(ws, artifact_hash))
+        assert response.status_code == 200
+        assert response.content == data
+        assert response.headers["etag"] == f'"{artifact_hash[7:]}"'
+
+    def test_remote_blob_redirects_to_presigned_url(
+        self, client, tmp_path, s3_server, monkeypatch
+    ):
+        """Test blobs in an S3 backend are redirected to, or read through the cache."""
+        ws = Workspace.initialize(
+            tmp_path, "Remote", blob_backend=f"s3://bucket/?endpoint={s3_server.url}"
+        )
+        entry = ws.create_notebook("NB").create_page("Page").create_entry("custom", "E", {})
+        data = bytes(range(256)) * 512
+        artifact_hash = entry.add_artifact("video/mp4", data)["hash"]
+        ws.storage_manager.get_blob_path(artifact_hash).unlink()
+        url = self._url(ws, artifact_hash)
+
+        response = client.get(url, follow_redirects=False)
+        assert response.status_code == 307
+        assert response.headers["location"].startswith(s3_server.url)
+        assert response.headers["etag"] == f'"{artifact_hash[7:]}"'
+
+        # Blobs the backend doesn't have, e.g. stored before it was set up,
+        # are served from local storage
+        other_hash = entry.add_artifact("video/mp4", data[::-1])["hash"]
+        s3_server.objects.pop(other_hash[7:])
+        response = client.get(self._url(ws, other_hash), follow_redirects=False)
+        assert response.status_code == 200
+        assert response.content == data[::-1]
+
+        # With redirects off, revalidating only checks the blob exists...
+        monkeypatch.setattr("codex.api.routes.artifacts.PRESIGNED_REDIRECTS", False)
+        count = len(s3_server.requests)
+        response = client.get(url, headers={"If-None-Match": f'"{artifact_hash[7:]}"'})
+        assert response.status_code == 304
+        assert [method for method, _ in s3_server.requests[count:]] == ["HEAD"]
+        assert not ws.storage_manager.get_blob_path(artifact_hash).exists()
+
+        # ...while a download fetches it into the node's cache
+        response = client.get(url, headers={"Range": "bytes=0-9"})
+        assert response.status_code == 206
+        assert response.content == data[:10]
+        ws.close()
+
+    def test_packed_blob_is_served(self, client, workspace):
+        """Test small blobs stored in pack files are served like any other."""
+        ws, artifact_hash, data = self._upload(workspace, b'{"rows": 3}')
+        assert ws.storage_manager.is_packed(artifact_hash)
+
+        response = client.get(self._url(ws, artifact_hash))
+        assert response.status_code == 200
+        assert response.content == data
+        assert response.headers["etag"] == f'"{artifact_hash[7:]}"'
+
+
+class TestEntryImport:
+    """Tests for bulk entry import."""
+
+    def test_bulk_import(self, client, workspace):
+        """Test entries are imported in chunks and bad references are rejected."""
+        ws, entry = workspace
+        entries = [
+            {
+                "page_id": entry.page_id,
+                "entry_type": "custom",
+                "title": f"Run {i}",
+                "status": "completed",
+                "parent_id": entry.id,
+                "tags": ["backfill"],
+            }
+            for i in range(30)
+        ]
+
+        response = client.post(
+            "/api/entries/bulk",
+            json={"workspace_path": str(ws.path), "entries": entries, "chunk_size": 8},
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert (report["entries"], report["chunks"]) == (30, 4)
+        assert report["rows_per_second"] > 0
+        assert len(ws.db_manager.get_descendants(entry.id)) == 30
+
+        response = client.post(
+            "/api/entries/bulk",
+            json={
+                "workspace_path": str(ws.path),
+                "entries": [{**entries[0], "page_id": "missing"}],
+            },
+        )
+        assert response.status_code == 400
+        assert "missing" in response.json()["detail"]
+
+
+class TestSearch:
+    """Tests for the search endpoints."""
+
+    def test_where_filters(self, client, workspace):
+        """Test JSON value filters on both search methods."""
+        ws, entry = workspace
+        entry.update(metrics={"loss": 0.01})
+        path = str(ws.path)
+
+        response = client.post(
+            "/api/search", json={"workspace_path": path, "where": ["metrics.loss < 0.05"]}
+        )
+        assert response.status_code == 200
+        assert [r["id"] for r in response.json()["results"]] == [entry.id]
+
+        response = client.get(
+            "/api/search",
+            params={"workspace_path": path, "where": ["metrics.loss < 0.05", "inputs.cfg = 7"]},
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+
+        response = client.get(
+            "/api/search", params={"workspace_path": path, "where": "metrics.loss ~ 1"}
+        )
+        assert response.status_code == 400
+        response = client.post(
+            "/api/search", json={"workspace_path": path, "where": ["nope.loss < 1"]}
+        )
+        assert response.status_code == 422
+
+
+class TestMetricSeries:
+    """Tests for the metric series endpoints."""
+
+    def test_log_and_fetch(self, client, workspace):
+        """Test batched ingestion and downsampled retrieval."""
+        ws, entry = workspace
+        url = f"/api/entries/{entry.id}/metrics"
+        points = [{"key": "loss", "step": s, "value": 1 / (s + 1)} for s in range(500)]
+
+        response = client.post(url, json={"workspace_path": str(ws.path), "points": points})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["appended"] == 500
+        assert body["series"]["loss"]["count"] == 500
+
+        response = client.get(
+            url, params={"workspace_path": str(ws.path), "key": "loss", "max_points": 50}
+        )
+        assert response.status_code == 200
+        loss = response.json()["series"]["loss"]
+        assert loss["count"] == 500
+        assert len(loss["step"]) == len(loss["value"]) == 50
+
+        response = client.get(url, params={"workspace_path": str(ws.path), "method": "mean"})
+        assert response.status_code == 422
+        for value in (float("nan"), float("inf")):
+            # Python's JSON encoder writes NaN and Infinity, as other clients may
+            point = {"key": "loss", "step": 500, "value": value}
+            body = {"workspace_path": str(ws.path), "points": [point]}
+            response = client.post(
+                url, content=json.dumps(body), headers={"Content-Type": "application/json"}
+            )
+            assert response.status_code == 400
+        response = client.post(
+            "/api/entries/missing/metrics", json={"workspace_path": str(ws.path), "points": []}
+        )
+        assert response.status_code == 404
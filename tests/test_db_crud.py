@@ -1,16 +1,25 @@
 """Tests for database CRUD operations on Base class."""
 
+import time
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
 
 from codex.db.models import (
     Artifact,
+    Base,
     Entry,
     EntryLineage,
     Notebook,
     NotebookTag,
     Page,
     Tag,
+    foreign_key_errors,
+    get_engine,
     get_session,
+    get_session_factory,
     init_db,
 )
 
@@ -25,6 +34,19 @@ def db_session(tmp_path):
     session.close()
 
 
+@contextmanager
+def _statements(session):
+    """Collect the SQL statements executed on the session's engine."""
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
 class TestForeignKeyIntrospection:
     """Tests for foreign key introspection."""
 
@@ -385,6 +407,93 @@ class TestForeignKeyValidation:
         assert "page_id" in result
         assert "parent_id" not in result
 
+    def test_validate_foreign_keys_in_one_query(self, db_session):
+        """All references of a row should be checked by a single query."""
+        Notebook.create(db_session, validate_fk=False, id="nb-one", title="Notebook")
+        Page.create(db_session, validate_fk=False, id="page-one", notebook_id="nb-one", title="P")
+        db_session.commit()
+        db_session.expunge_all()
+
+        with _statements(db_session) as statements:
+            with pytest.raises(ValueError, match="parent_id='entry-missing'"):
+                Entry.validate_foreign_keys(
+                    db_session, {"page_id": "page-one", "parent_id": "entry-missing"}
+                )
+        assert len([s for s in statements if s.startswith("SELECT")]) == 1
+
+    def test_references_held_by_session_are_not_queried(self, db_session):
+        """Rows the session has already flushed should be trusted."""
+        notebook = Notebook.create(db_session, validate_fk=False, id="nb-held", title="Notebook")
+
+        with _statements(db_session) as statements:
+            Page.create(db_session, id="page-held", notebook_id=notebook.id, title="P")
+        assert not [s for s in statements if s.startswith("SELECT")]
+
+    def test_model_for_table(self):
+        """Table names should map to model classes."""
+        assert Base.model_for_table("pages") is Page
+        assert Base.model_for_table("entry_lineage") is EntryLineage
+        assert Base.model_for_table("nonexistent") is None
+
+    def test_missing_references(self, db_session):
+        """missing_references should find dangling values with one query per column."""
+        Notebook.create(db_session, validate_fk=False, id="nb-bulk", title="Notebook")
+        db_session.commit()
+        rows = [
+            {"id": f"page-{i}", "notebook_id": "nb-bulk" if i % 3 else f"nb-gone-{i}"}
+            for i in range(30)
+        ]
+
+        with _statements(db_session) as statements:
+            missing = Page.missing_references(db_session, rows, batch_size=4)
+        assert missing == {"notebook_id": {f"nb-gone-{i}" for i in range(0, 30, 3)}}
+        # 11 distinct values in batches of 4
+        assert len([s for s in statements if s.startswith("SELECT")]) == 3
+        assert Page.missing_references(db_session, rows[1:3]) == {}
+
+    def test_foreign_key_errors_at_commit(self, db_session):
+        """Violations found by SQLite at commit should raise ValueError."""
+        Page.create(
+            db_session,
+            validate_fk=False,
+            id="page-late",
+            notebook_id="nonexistent-nb",
+            title="Dangling",
+        )
+        with pytest.raises(ValueError, match="Foreign key constraint failed"):
+            with foreign_key_errors(db_session):
+                db_session.commit()
+        assert db_session.execute(text("SELECT COUNT(*) FROM pages")).scalar() == 0
+
+    def test_validation_microbenchmark(self, db_session):
+        """Validating a row should cost one query."""
+        Notebook.create(db_session, validate_fk=False, id="nb-bench", title="Notebook")
+        Page.create(
+            db_session, validate_fk=False, id="page-bench", notebook_id="nb-bench", title="P"
+        )
+        Entry.create(
+            db_session,
+            validate_fk=False,
+            id="entry-bench",
+            page_id="page-bench",
+            entry_type="custom",
+            title="E",
+            inputs="{}",
+        )
+        db_session.commit()
+        db_session.expunge_all()
+        data = {"page_id": "page-bench", "parent_id": "entry-bench"}
+        rounds = 500
+
+        with _statements(db_session) as statements:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                Entry.validate_foreign_keys(db_session, data)
+            elapsed = time.perf_counter() - start
+        assert len([s for s in statements if s.startswith("SELECT")]) == rounds
+        # Generous bound; about 0.2 ms here, half the cost of a query per reference
+        assert elapsed / rounds < 0.005
+
 
 class TestTagModel:
     """Tests for Tag model CRUD operations."""
@@ -539,3 +648,49 @@ class TestCompositePrimaryKey:
         result = EntryLineage.get_by_id(db_session, ("entry-parent", "entry-child"))
         assert result is not None
         assert result.relationship_type == "derives_from"
+
+
+class TestEngineConfiguration:
+    """Tests for the tuned SQLite engine."""
+
+    def test_pragmas_applied(self, tmp_path):
+        """New connections should have WAL, FK enforcement and busy timeout."""
+        engine = get_engine(str(tmp_path / "test.db"))
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        engine.dispose()
+
+    def test_pragma_and_pool_overrides(self, tmp_path):
+        """Pragmas and pool options should be overridable."""
+        engine = get_engine(
+            str(tmp_path / "test.db"), pragmas={"busy_timeout": 100}, pool_size=2
+        )
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 100
+        assert engine.pool.size() == 2
+        engine.dispose()
+
+    def test_session_factory_reused(self, tmp_path):
+        """Sessions for the same engine should share one sessionmaker."""
+        engine = get_engine(str(tmp_path / "test.db"))
+        assert get_session_factory(engine) is get_session_factory(engine)
+        engine.dispose()
+
+    def test_foreign_keys_enforced_at_commit(self, db_session):
+        """Dangling references should be rejected by SQLite when committing."""
+        Page.create(
+            db_session,
+            validate_fk=False,
+            id="page-dangling",
+            notebook_id="nonexistent-nb",
+            title="Dangling",
+        )
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+
+        count = db_session.execute(text("SELECT COUNT(*) FROM pages")).scalar()
+        assert count == 0
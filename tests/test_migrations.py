@@ -1,5 +1,6 @@
 """Tests for database migrations."""
 
+from sqlalchemy import text
 
 from codex.core.workspace import Workspace
 from codex.db.migrate import (
@@ -9,10 +10,13 @@ from codex.db.migrate import (
     get_migration_history,
     get_pending_migrations,
     is_up_to_date,
+    run_migrations,
     stamp_revision,
 )
 from codex.db.models import Base, get_engine, init_db
 
+HEAD_REVISION = "006_metric_points"
+
 
 class TestMigrations:
     """Tests for migration functionality."""
@@ -22,7 +26,7 @@ class TestMigrations:
         db_path = tmp_path / "test.db"
         head = get_head_revision(str(db_path))
         assert head is not None
-        assert head == "001_initial_schema"
+        assert head == HEAD_REVISION
 
     def test_new_database_runs_migrations(self, tmp_path):
         """Test that a new database runs migrations."""
@@ -33,7 +37,7 @@ class TestMigrations:
 
         # Check that migrations were applied
         current = get_current_revision(str(db_path))
-        assert current == "001_initial_schema"
+        assert current == HEAD_REVISION
         assert is_up_to_date(str(db_path))
 
     def test_existing_database_gets_stamped(self, tmp_path):
@@ -54,7 +58,7 @@ class TestMigrations:
 
         # Should now be stamped at head
         current = get_current_revision(str(db_path))
-        assert current == "001_initial_schema"
+        assert current == HEAD_REVISION
         assert is_up_to_date(str(db_path))
 
     def test_workspace_uses_migrations(self, tmp_path):
@@ -63,7 +67,7 @@ class TestMigrations:
 
         # Check that migrations were applied
         status = ws.db_manager.get_migration_status()
-        assert status["current_revision"] == "001_initial_schema"
+        assert status["current_revision"] == HEAD_REVISION
         assert status["is_up_to_date"]
         assert len(status["pending_migrations"]) == 0
 
@@ -79,7 +83,8 @@ class TestMigrations:
         initial = history[0]
         assert initial["revision"] == "001_initial_schema"
         assert initial["is_applied"]
-        assert initial["is_current"]
+        assert history[-1]["revision"] == HEAD_REVISION
+        assert history[-1]["is_current"]
 
     def test_get_pending_migrations_empty(self, tmp_path):
         """Test getting pending migrations when database is up to date."""
@@ -129,7 +134,106 @@ class TestMigrations:
 
         # Should be at head revision
         current = get_current_revision(str(db_path))
-        assert current == "001_initial_schema"
+        assert current == HEAD_REVISION
+
+    def test_search_index_migration_backfills(self, tmp_path):
+        """Test upgrading to the search index indexes existing entries."""
+        db_path = tmp_path / "test.db"
+        run_migrations(str(db_path), "001_initial_schema")
+
+        engine = get_engine(str(db_path))
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO notebooks (id, title, created_at, updated_at) "
+                    "VALUES ('nb', 'NB', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                )
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO pages (id, notebook_id, title, created_at, updated_at, "
+                    "narrative) VALUES ('p', 'nb', 'P', CURRENT_TIMESTAMP, "
+                    "CURRENT_TIMESTAMP, "
+                    "'{\"goals\": \"bolometer\"}')"
+                )
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO entries (id, page_id, entry_type, title, status, "
+                    "inputs, created_at) VALUES ('e', 'p', 'custom', "
+                    "'Cryostat cooldown', 'created', '{}', CURRENT_TIMESTAMP)"
+                )
+            )
+        engine.dispose()
+
+        run_migrations(str(db_path))
+
+        engine = get_engine(str(db_path))
+        with engine.connect() as conn:
+            for term in ("cryostat", "bolometer"):
+                count = conn.execute(
+                    text("SELECT COUNT(*) FROM entries_fts WHERE entries_fts MATCH :q"),
+                    {"q": term},
+                ).scalar()
+                assert count == 1
+        engine.dispose()
+
+    def test_blob_refcount_migration_backfills(self, tmp_path):
+        """Test upgrading to shared blobs counts existing artifacts per blob."""
+        db_path = tmp_path / "test.db"
+        run_migrations(str(db_path), "003_lineage_child_index")
+
+        engine = get_engine(str(db_path))
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO notebooks (id, title, created_at, updated_at) "
+                    "VALUES ('nb', 'NB', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                )
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO pages (id, notebook_id, title, created_at, updated_at) "
+                    "VALUES ('p', 'nb', 'P', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                )
+            )
+            for entry_id in ("e1", "e2"):
+                conn.execute(
+                    text(
+                        "INSERT INTO entries (id, page_id, entry_type, title, status, "
+                        "inputs, created_at) VALUES (:id, 'p', 'custom', 'E', 'created', "
+                        "'{}', CURRENT_TIMESTAMP)"
+                    ),
+                    {"id": entry_id},
+                )
+            conn.execute(
+                text(
+                    "INSERT INTO artifacts (id, entry_id, type, hash, size_bytes, path, "
+                    "created_at) VALUES ('a1', 'e1', 'text/plain', 'sha256:aa', 4, 'x', "
+                    "CURRENT_TIMESTAMP)"
+                )
+            )
+        engine.dispose()
+
+        run_migrations(str(db_path))
+
+        engine = get_engine(str(db_path))
+        with engine.begin() as conn:
+            # The same blob can now be attached to a second entry
+            conn.execute(
+                text(
+                    "INSERT INTO artifacts (id, entry_id, type, hash, size_bytes, path, "
+                    "created_at) VALUES ('a2', 'e2', 'text/plain', 'sha256:aa', 4, 'x', "
+                    "CURRENT_TIMESTAMP)"
+                )
+            )
+        with engine.begin() as conn:
+            assert conn.execute(text("SELECT refcount FROM blobs")).scalar() == 2
+            conn.execute(text("DELETE FROM entries"))
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT refcount, released_at FROM blobs")).one()
+            assert row[0] == 0 and row[1] is not None
+        engine.dispose()
 
     def test_init_db_without_migrations(self, tmp_path):
         """Test initializing database without migrations."""